@@ -12,6 +12,7 @@ import hashlib
 from pathlib import Path
 from flask import jsonify, request, send_file, render_template, abort
 from werkzeug.utils import secure_filename
+from skill_cache import invalidate, is_failure
 
 DMS_BASE    = os.path.abspath("data/dms")
 CONFIG_FILE = os.path.join(DMS_BASE, "dms_config.json")
@@ -140,6 +141,8 @@ def register_dms_routes(app):
             from providers import select_provider
             _, provider = select_provider("auto")
             ergebnis    = dms_einsortieren(provider=provider)
+            if not is_failure(ergebnis):
+                invalidate(["dms_archiv_uebersicht"])
             return jsonify({"ergebnis": ergebnis})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -242,6 +245,7 @@ def register_dms_routes(app):
             ergebnis = dms_loeschen(pfad, passwort)
             if ergebnis.startswith("❌"):
                 return jsonify({"error": ergebnis}), 400
+            invalidate(["dms_archiv_uebersicht"])
             return jsonify({"ok": True, "message": ergebnis})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -0,0 +1,220 @@
+"""
+google_services.py – Gemeinsamer Cache für Google-Anmeldedaten und API-Services
+================================================================================
+Die Google-Nodes (Kalender, Gmail, Docs, Sheets, Drive, Forms) holen ihre
+Services über google_service(). Pro (token.json, Scopes) werden die
+Anmeldedaten einmal geladen und im Prozess gehalten; token.json wird nur
+neu gelesen, wenn sich die Datei geändert hat, und nur nach einer
+Erneuerung oder Autorisierung geschrieben.
+
+Ein Hintergrund-Thread erneuert Tokens, bevor sie ablaufen
+(GOOGLE_TOKEN_REFRESH_MARGIN Sekunden vorher), damit kein Node-Lauf auf
+den Refresh warten muss.
+
+Gebaute Service-Objekte werden pro Thread wiederverwendet – die
+httplib2-Verbindung darunter ist nicht thread-sicher, die Worker-Threads
+der Workflow-Engine leben aber lange genug, dass sich der Cache lohnt.
+"""
+
+import os
+import threading
+from datetime import datetime, timezone
+
+CHECK_INTERVAL = 60    # Sekunden zwischen zwei Prüfungen des Refresh-Threads
+
+
+def _refresh_margin() -> int:
+    try:
+        return max(0, int(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", "300")))
+    except ValueError:
+        return 300
+
+
+def google_libs_available() -> bool:
+    """True, wenn google-auth, google-auth-oauthlib und google-api-python-client da sind."""
+    try:
+        import google.oauth2.credentials        # noqa: F401
+        import google_auth_oauthlib.flow        # noqa: F401
+        import google.auth.transport.requests   # noqa: F401
+        import googleapiclient.discovery        # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _Entry:
+    """Anmeldedaten einer token.json samt Dateistand und eigenem Lock."""
+
+    def __init__(self, token_path: str, scopes: tuple):
+        self.token_path = token_path
+        self.scopes     = scopes
+        self.creds      = None
+        self.mtime      = None
+        self.lock       = threading.Lock()
+
+
+class GoogleServiceCache:
+    """Prozessweiter, thread-sicherer Cache für Credentials und gebaute Services."""
+
+    def __init__(self, refresh_margin: int = None):
+        self.refresh_margin = _refresh_margin() if refresh_margin is None else refresh_margin
+        self._entries       = {}                 # (token_path, scopes) → _Entry
+        self._lock          = threading.Lock()
+        self._local         = threading.local()  # .services: key → Service-Objekt
+        self._refresher     = None
+        self._stop          = threading.Event()
+
+    # ── Anmeldedaten ──────────────────────────────────────────
+    def _entry(self, token_path: str, scopes) -> _Entry:
+        key = (os.path.abspath(token_path), tuple(scopes))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(*key)
+            return entry
+
+    @staticmethod
+    def _mtime(path: str):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def _save(self, entry: _Entry):
+        os.makedirs(os.path.dirname(entry.token_path), exist_ok=True)
+        with open(entry.token_path, "w", encoding="utf-8") as f:
+            f.write(entry.creds.to_json())
+        entry.mtime = self._mtime(entry.token_path)
+
+    def _needs_refresh(self, creds) -> bool:
+        if not creds.valid:
+            return True
+        expiry = getattr(creds, "expiry", None)
+        if expiry is None:
+            return False
+        now = datetime.now(timezone.utc).replace(tzinfo=None)   # google-auth: naive UTC
+        return (expiry - now).total_seconds() < self.refresh_margin
+
+    def credentials(self, token_path: str, scopes, client_secrets: str):
+        """
+        Gültige Anmeldedaten für token.json und Scopes. Lädt die Datei nur bei
+        geänderter mtime, erneuert abgelaufene Tokens und startet beim ersten
+        Mal die Browser-Autorisierung mit client_secrets (credentials.json).
+        """
+        from google.oauth2.credentials      import Credentials
+        from google_auth_oauthlib.flow      import InstalledAppFlow
+        from google.auth.transport.requests import Request
+
+        entry = self._entry(token_path, scopes)
+        with entry.lock:
+            mtime = self._mtime(entry.token_path)
+            if entry.creds is None or mtime != entry.mtime:
+                entry.creds, entry.mtime = None, mtime
+                if mtime is not None:
+                    try:
+                        entry.creds = Credentials.from_authorized_user_file(
+                            entry.token_path, list(entry.scopes))
+                    except Exception:
+                        entry.creds = None
+
+            creds = entry.creds
+            if creds is not None and not creds.valid:
+                if creds.expired and creds.refresh_token:
+                    try:
+                        creds.refresh(Request())
+                        self._save(entry)
+                    except Exception:
+                        entry.creds = None
+
+            if entry.creds is None or not entry.creds.valid:
+                # Beim ersten Mal: Browser öffnet sich, User klickt "Allow"
+                flow        = InstalledAppFlow.from_client_secrets_file(
+                    client_secrets, list(entry.scopes))
+                entry.creds = flow.run_local_server(port=0, open_browser=True)
+                self._save(entry)
+
+            self._start_refresher()
+            return entry.creds
+
+    # ── Services ──────────────────────────────────────────────
+    def _services(self) -> dict:
+        services = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        return services
+
+    def service(self, api: str, version: str, scopes, token_path: str, client_secrets: str):
+        """
+        Gebauter API-Service (googleapiclient), pro Thread wiederverwendet.
+        Neu gebaut wird nur, wenn sich die Anmeldedaten geändert haben
+        (neu geladene token.json oder neue Autorisierung).
+        """
+        creds    = self.credentials(token_path, scopes, client_secrets)
+        entry    = self._entry(token_path, scopes)
+        key      = (api, version, entry.token_path, entry.scopes)
+        services = self._services()
+        cached   = services.get(key)
+        if cached is not None and cached[0] is creds:
+            return cached[1]
+        from googleapiclient.discovery import build
+        svc = build(api, version, credentials=creds, cache_discovery=False)
+        services[key] = (creds, svc)
+        return svc
+
+    # ── Hintergrund-Refresh ───────────────────────────────────
+    def refresh_due(self):
+        """Erneuert alle Tokens, die innerhalb der Marge ablaufen."""
+        from google.auth.transport.requests import Request
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            with entry.lock:
+                creds = entry.creds
+                if creds is None or not creds.refresh_token or not self._needs_refresh(creds):
+                    continue
+                try:
+                    creds.refresh(Request())
+                    self._save(entry)
+                except Exception as e:
+                    print(f"[Google] Token-Erneuerung fehlgeschlagen ({entry.token_path}): {e}")
+
+    def _start_refresher(self):
+        with self._lock:
+            if self._refresher is not None or self.refresh_margin <= 0:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, args=(self._stop,),
+                                               name="google-token-refresh", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self, stop: threading.Event):
+        while not stop.wait(CHECK_INTERVAL):
+            try:
+                self.refresh_due()
+            except Exception as e:
+                print(f"[Google] Refresh-Thread: {e}")
+
+    def clear(self):
+        """Cache leeren und den Refresh-Thread beenden."""
+        self._stop.set()
+        with self._lock:
+            self._entries.clear()
+            self._refresher = None
+        self._local = threading.local()
+        self._stop  = threading.Event()
+
+
+_cache      = None
+_cache_lock = threading.Lock()
+
+
+def get_google_cache() -> GoogleServiceCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GoogleServiceCache()
+        return _cache
+
+
+def google_service(api: str, version: str, scopes, token_path: str, client_secrets: str):
+    """Kurzform für get_google_cache().service(...)."""
+    return get_google_cache().service(api, version, scopes, token_path, client_secrets)
@@ -0,0 +1,255 @@
+"""
+http_cache.py – Gemeinsamer HTTP-Client der Workflow-Nodes (http, rss)
+=======================================================================
+- Eine requests.Session mit Verbindungs-Pool für alle Nodes und Threads
+- GET-Antworten mit ETag/Last-Modified landen in einem SQLite-Cache
+  (data/http_cache.db); beim nächsten Abruf wird nur noch bedingt gefragt
+  (If-None-Match / If-Modified-Since) – bei 304 kommt der Body aus dem Cache
+- Der Cache ist auf HTTP_CACHE_MAX_MB begrenzt (0 = aus); verdrängt werden
+  die am längsten nicht benutzten Einträge
+- Für RSS merkt sich der Client gesehene GUIDs je Schlüssel, damit ein
+  Feed-Node nur neue Einträge seit dem letzten Lauf meldet
+
+Tabellen:
+  responses  – key, url, etag, last_modified, status, content_type,
+               encoding, body, size, stored, used
+  rss_seen   – feed, guid, seen
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+
+HTTP_CACHE_DB  = os.path.join("data", "http_cache.db")
+DEFAULT_MAX_MB = 50
+POOL_SIZE      = 16
+SEEN_KEEP      = 1000   # gesehene GUIDs je Feed
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key           TEXT PRIMARY KEY,
+    url           TEXT,
+    etag          TEXT,
+    last_modified TEXT,
+    status        INTEGER,
+    content_type  TEXT,
+    encoding      TEXT,
+    body          BLOB,
+    size          INTEGER,
+    stored        REAL,
+    used          REAL
+);
+CREATE INDEX IF NOT EXISTS responses_used ON responses (used);
+CREATE TABLE IF NOT EXISTS rss_seen (
+    feed  TEXT,
+    guid  TEXT,
+    seen  REAL,
+    PRIMARY KEY (feed, guid)
+);
+"""
+
+
+def cache_max_bytes() -> int:
+    try:
+        return max(0, int(float(os.getenv("HTTP_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024))
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+
+class HttpResponse:
+    """Antwort eines (bedingten) GET; from_cache=True bei 304 aus dem Cache."""
+
+    def __init__(self, status_code: int, content: bytes, content_type: str = "",
+                 from_cache: bool = False, encoding: str = None):
+        self.status_code  = status_code
+        self.content      = content
+        self.content_type = content_type or ""
+        self.from_cache   = from_cache
+        self.encoding     = encoding
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        encoding = self.encoding
+        if not encoding and "charset=" in self.content_type:
+            encoding = self.content_type.split("charset=", 1)[1].split(";")[0].strip()
+        return self.content.decode(encoding or "utf-8", errors="replace")
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class HttpClient:
+    """Gepoolte Session plus Antwort-Cache und RSS-GUID-Gedächtnis; thread-sicher."""
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path      = os.path.abspath(path or HTTP_CACHE_DB)
+        self.max_bytes = cache_max_bytes() if max_bytes is None else max_bytes
+        self._session  = None
+        self._conn     = None
+        self._lock     = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            with self._lock:
+                if self._session is None:
+                    s = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                    s.mount("http://", adapter)
+                    s.mount("https://", adapter)
+                    self._session = s
+        return self._session
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(responses)")}
+            if "encoding" not in columns:      # Cache aus einer älteren Version
+                self._conn.execute("ALTER TABLE responses ADD COLUMN encoding TEXT")
+        return self._conn
+
+    # ── Anfragen ──────────────────────────────────────────────
+    def request(self, method: str, url: str, **kwargs):
+        """Beliebige Anfrage über die gepoolte Session (ohne Cache)."""
+        return self.session.request(method, url, **kwargs)
+
+    @staticmethod
+    def _key(url: str, headers: dict) -> str:
+        vary = "\n".join(f"{k.lower()}:{v}" for k, v in sorted((headers or {}).items()))
+        return hashlib.sha1(f"{url}\n{vary}".encode("utf-8")).hexdigest()
+
+    def get(self, url: str, headers: dict = None, timeout: float = 30) -> HttpResponse:
+        """
+        GET mit Revalidierung: kennt der Cache die URL, wird mit ETag bzw.
+        Last-Modified gefragt und bei 304 der gespeicherte Body geliefert.
+        """
+        headers = dict(headers or {})
+        if self.max_bytes <= 0:
+            resp = self.session.get(url, headers=headers, timeout=timeout)
+            return HttpResponse(resp.status_code, resp.content,
+                                resp.headers.get("Content-Type", ""), encoding=resp.encoding)
+
+        key    = self._key(url, headers)
+        with self._lock:
+            cached = self._db().execute("SELECT * FROM responses WHERE key = ?",
+                                        (key,)).fetchone()
+        send = dict(headers)
+        if cached is not None:
+            if cached["etag"]:
+                send["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                send["If-Modified-Since"] = cached["last_modified"]
+
+        resp = self.session.get(url, headers=send, timeout=timeout)
+        if resp.status_code == 304 and cached is not None:
+            with self._lock:
+                db = self._db()
+                db.execute("UPDATE responses SET used = ? WHERE key = ?", (time.time(), key))
+                db.commit()
+            # Mit derselben Kodierung wie bei der 200-Antwort → gleicher .text
+            return HttpResponse(cached["status"], cached["body"], cached["content_type"],
+                                from_cache=True, encoding=cached["encoding"])
+
+        etag     = resp.headers.get("ETag")
+        modified = resp.headers.get("Last-Modified")
+        no_store = "no-store" in resp.headers.get("Cache-Control", "").lower()
+        if resp.status_code == 200 and (etag or modified) and not no_store:
+            self._store(key, url, etag, modified, resp)
+        elif cached is not None:
+            with self._lock:
+                db = self._db()
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+        return HttpResponse(resp.status_code, resp.content,
+                            resp.headers.get("Content-Type", ""), encoding=resp.encoding)
+
+    def _store(self, key, url, etag, modified, resp):
+        body = resp.content
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, url, etag, last_modified, status,"
+                " content_type, encoding, body, size, stored, used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, etag, modified, resp.status_code,
+                 resp.headers.get("Content-Type", ""), resp.encoding, body, len(body), now, now))
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db):
+        """Verdrängt die am längsten nicht benutzten Antworten über der Größengrenze."""
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row in db.execute("SELECT key, size FROM responses ORDER BY used").fetchall():
+            db.execute("DELETE FROM responses WHERE key = ?", (row["key"],))
+            total -= row["size"]
+            if total <= self.max_bytes:
+                break
+
+    # ── RSS: gesehene Einträge ────────────────────────────────
+    def unseen(self, feed: str, guids: list) -> set:
+        """Liefert die GUIDs, die für diesen Feed-Schlüssel noch nicht gesehen wurden."""
+        with self._lock:
+            known = {r["guid"] for r in self._db().execute(
+                "SELECT guid FROM rss_seen WHERE feed = ?", (feed,))}
+        return {g for g in guids if g not in known}
+
+    def has_seen(self, feed: str) -> bool:
+        """True, sobald für diesen Feed-Schlüssel GUIDs gemerkt sind (nicht der erste Lauf)."""
+        with self._lock:
+            return self._db().execute("SELECT 1 FROM rss_seen WHERE feed = ? LIMIT 1",
+                                      (feed,)).fetchone() is not None
+
+    def mark_seen(self, feed: str, guids: list):
+        """
+        Merkt sich die GUIDs als gesehen (erst nachdem sie gemeldet wurden).
+        Pro Feed-Schlüssel bleiben die SEEN_KEEP neuesten GUIDs erhalten.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.executemany("INSERT OR REPLACE INTO rss_seen (feed, guid, seen) VALUES (?, ?, ?)",
+                           [(feed, g, now) for g in guids])
+            db.execute(
+                "DELETE FROM rss_seen WHERE feed = ? AND guid NOT IN"
+                " (SELECT guid FROM rss_seen WHERE feed = ? ORDER BY seen DESC LIMIT ?)",
+                (feed, feed, SEEN_KEEP))
+            db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_client      = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,235 @@
+"""
+job_manager.py – Hintergrund-Jobs für lang laufende Skills
+===========================================================
+Ein Job wird sofort angelegt und bekommt eine ID; die Arbeit läuft in einem
+begrenzten Worker-Pool. Fortschritt, Zwischenausgaben und Endergebnis sind
+per Polling (GET /api/jobs/<id>) oder SSE (GET /api/jobs/<id>/stream) abrufbar.
+
+Status: queued → running → done | error | cancelled
+
+Skills mit einem Parameter `progress` bekommen einen Callback:
+    progress("Dokument 3 von 10", 0.3)   # Text und/oder Anteil 0..1
+Strukturierte Ereignisse (z.B. Workflow-Nodes gestartet/fertig) meldet
+die Arbeit über job.emit("node_started", {...}).
+Skills ohne eigenes Zeitlimit (SKILL_META) dürfen als Job JOB_TIMEOUT
+Sekunden laufen. Abgeschlossene Jobs werden nach JOB_RETENTION Sekunden
+verworfen, höchstens JOB_MAX_FINISHED bleiben erhalten.
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+FINISHED_STATES = ("done", "error", "cancelled")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _json_safe(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class Job:
+    """Ein Hintergrund-Job mit Fortschritt, Ausgaben und Ergebnis."""
+
+    def __init__(self, name: str, params: dict = None):
+        self.id           = uuid.uuid4().hex[:12]
+        self.name         = name
+        self.params       = params or {}
+        self.status       = "queued"
+        self.progress     = None        # 0..1 oder None
+        self.output       = []          # Zwischenausgaben (Text)
+        self.events       = []          # strukturierte Ereignisse (emit)
+        self.result       = None
+        self.error        = None
+        self.created      = time.time()
+        self.started      = None
+        self.finished     = None
+        self.cancel_event = threading.Event()
+        self.cancelled    = False       # Abbruch vom Nutzer angefordert
+        self.version      = 0           # wird bei jeder Änderung erhöht
+        self._cond        = threading.Condition()
+        self._future      = None
+
+    # ── Aktualisierung ────────────────────────────────────────
+    def _update(self, **fields):
+        with self._cond:
+            for key, value in fields.items():
+                setattr(self, key, value)
+            self.version += 1
+            self._cond.notify_all()
+
+    def report(self, text: str = None, anteil: float = None):
+        """Fortschritts-Callback für Skills: Text anhängen und/oder Anteil setzen."""
+        with self._cond:
+            if text:
+                self.output.append(str(text))
+            if anteil is not None:
+                self.progress = max(0.0, min(1.0, float(anteil)))
+            self.version += 1
+            self._cond.notify_all()
+
+    def emit(self, kind: str, data: dict = None):
+        """Strukturiertes Ereignis anhängen, z.B. emit("node_finished", {"nid": "n1"})."""
+        with self._cond:
+            self.events.append({"event": kind, **(data or {})})
+            self.version += 1
+            self._cond.notify_all()
+
+    def events_since(self, index: int) -> list:
+        with self._cond:
+            return self.events[index:]
+
+    def wait_for_change(self, version: int, timeout: float = 15.0) -> int:
+        """Blockiert bis sich der Job gegenüber `version` geändert hat."""
+        with self._cond:
+            if self.version == version and self.status not in FINISHED_STATES:
+                self._cond.wait(timeout)
+            return self.version
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, since: int = 0) -> dict:
+        with self._cond:
+            return {
+                "id":           self.id,
+                "name":         self.name,
+                "status":       self.status,
+                "progress":     self.progress,
+                "output":       self.output[since:],
+                "output_count": len(self.output),
+                "event_count":  len(self.events),
+                "result":       self.result,
+                "error":        self.error,
+                "created":      self.created,
+                "started":      self.started,
+                "finished":     self.finished,
+            }
+
+
+class JobManager:
+    """Begrenzter Worker-Pool plus Job-Register mit Aufbewahrungsfrist."""
+
+    def __init__(self, max_workers: int = None, retention: float = None,
+                 max_finished: int = None):
+        self.max_workers  = max_workers or _env_int("JOB_WORKERS", 4)
+        self.retention    = retention if retention is not None else _env_int("JOB_RETENTION", 3600)
+        self.max_finished = max_finished or _env_int("JOB_MAX_FINISHED", 200)
+        self.job_timeout  = _env_int("JOB_TIMEOUT", 3600)   # Skills ohne eigenes Limit
+        self._pool  = ThreadPoolExecutor(max_workers=self.max_workers,
+                                         thread_name_prefix="job")
+        self._jobs  = {}
+        self._lock  = threading.Lock()
+
+    # ── Anlegen ───────────────────────────────────────────────
+    def submit(self, name: str, work, params: dict = None) -> Job:
+        """
+        Startet `work(job)` im Hintergrund. Der Rückgabewert wird zum
+        Job-Ergebnis; Exceptions setzen den Status "error".
+        """
+        self._prune()
+        job = Job(name, params)
+        with self._lock:
+            self._jobs[job.id] = job
+        job._future = self._pool.submit(self._run, job, work)
+        return job
+
+    def submit_skill(self, manager, skill_name: str, params: dict = None) -> Job:
+        """Startet einen Skill als Job (über SkillManager.run_skill, falls vorhanden)."""
+        params = dict(params or {})
+
+        def _work(job: Job):
+            run_skill = getattr(manager, "run_skill", None)
+            if run_skill is None:
+                return manager.execute(skill_name, **params)
+            return run_skill(skill_name, params, cancel_event=job.cancel_event,
+                             progress=job.report, timeout=self.job_timeout)
+
+        return self.submit(skill_name, _work, params)
+
+    def _run(self, job: Job, work):
+        if job.cancelled:
+            return
+        job._update(status="running", started=time.time())
+        try:
+            result = work(job)
+            if job.cancelled:
+                job._update(status="cancelled", result=_json_safe(result),
+                            finished=time.time())
+            else:
+                job._update(status="done", result=_json_safe(result), progress=1.0,
+                            finished=time.time())
+        except Exception as e:
+            job._update(status="error", error=str(e), finished=time.time())
+
+    # ── Abfragen / Abbruch ────────────────────────────────────
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list:
+        self._prune()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j.to_dict() for j in sorted(jobs, key=lambda j: j.created, reverse=True)]
+
+    def cancel(self, job_id: str) -> bool:
+        """Bricht einen Job ab. False wenn unbekannt oder bereits beendet."""
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job.cancelled = True
+        job.cancel_event.set()
+        if job._future is not None and job._future.cancel():
+            job._update(status="cancelled", finished=time.time())   # lief noch nicht
+        else:
+            job._update()   # Beobachter wecken
+        return True
+
+    def _prune(self):
+        """Verwirft abgelaufene bzw. überzählige abgeschlossene Jobs."""
+        now = time.time()
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.is_finished),
+                              key=lambda j: j.finished or 0)
+            for job in finished:
+                if now - (job.finished or now) > self.retention:
+                    del self._jobs[job.id]
+            finished = [j for j in finished if j.id in self._jobs]
+            for job in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job.id]
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ── Globale Instanz ───────────────────────────────────────────
+_job_manager      = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager()
+    return _job_manager
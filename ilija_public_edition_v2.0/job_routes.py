@@ -0,0 +1,104 @@
+"""
+Job-Routen für web_server.py
+============================
+- POST /api/jobs                 Skill als Hintergrund-Job starten
+- GET  /api/jobs                 Alle Jobs (neueste zuerst)
+- GET  /api/jobs/<id>?since=n    Status, Fortschritt, Ausgaben ab Index n, Ergebnis
+- GET  /api/jobs/<id>/stream     Dasselbe als Server-Sent-Events
+- POST /api/jobs/<id>/cancel     Job abbrechen
+"""
+
+import json
+from flask import Response, jsonify, request, stream_with_context
+
+from job_manager import get_job_manager
+
+
+def submit_skill_job(manager, skill_name: str, params: dict):
+    """Startet einen Skill-Job und liefert die 202-Antwort (auch für /api/skill/execute)."""
+    job = get_job_manager().submit_skill(manager, skill_name, params)
+    return jsonify({
+        "job_id":     job.id,
+        "status":     job.status,
+        "status_url": f"/api/jobs/{job.id}",
+        "stream_url": f"/api/jobs/{job.id}/stream",
+    }), 202
+
+
+def register_job_routes(app, get_kernel_func, kernel_lock):
+    """Registriert die Job-Routen an der Flask-App."""
+
+    @app.route("/api/jobs", methods=["POST"])
+    def job_submit():
+        data       = request.get_json() or {}
+        skill_name = data.get("skill", "").strip()
+        params     = data.get("params", {})
+        if not skill_name:
+            return jsonify({"error": "Kein Skill angegeben"}), 400
+
+        with kernel_lock:
+            manager = get_kernel_func().manager
+        if skill_name not in manager.skills:
+            return jsonify({"error": f"Unbekannter Skill: {skill_name}"}), 404
+        return submit_skill_job(manager, skill_name, params)
+
+    @app.route("/api/jobs", methods=["GET"])
+    def job_list():
+        return jsonify({"jobs": get_job_manager().list_jobs()})
+
+    @app.route("/api/jobs/<job_id>", methods=["GET"])
+    def job_status(job_id):
+        job = get_job_manager().get(job_id)
+        if job is None:
+            return jsonify({"error": "Job nicht gefunden"}), 404
+        try:
+            since = max(0, int(request.args.get("since", 0)))
+        except ValueError:
+            since = 0
+        return jsonify(job.to_dict(since=since))
+
+    @app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+    def job_cancel(job_id):
+        if not get_job_manager().cancel(job_id):
+            return jsonify({"error": "Job nicht gefunden oder bereits beendet"}), 404
+        return jsonify({"ok": True, "id": job_id})
+
+    @app.route("/api/jobs/<job_id>/stream", methods=["GET"])
+    def job_stream(job_id):
+        """
+        SSE: "progress" bei jeder Änderung (nur neue Ausgaben), am Ende
+        "done" mit Status und Ergebnis. Ohne Änderung alle 15s ein Keep-Alive.
+        Strukturierte Ereignisse (job.emit) kommen vorher als eigene Events,
+        z.B. "node_started"/"node_finished" bei Workflow-Jobs.
+        """
+        job = get_job_manager().get(job_id)
+        if job is None:
+            return jsonify({"error": "Job nicht gefunden"}), 404
+
+        def _events():
+            sent    = 0
+            events  = 0
+            version = -1
+            while True:
+                if job.version != version:
+                    version  = job.version
+                    finished = job.is_finished   # vor den Ereignissen lesen
+                    for event in job.events_since(events):
+                        events += 1
+                        yield (f"event: {event['event']}\n"
+                               f"data: {json.dumps(event, ensure_ascii=False)}\n\n")
+                    state = job.to_dict(since=sent)
+                    sent  = state["output_count"]
+                    kind  = "done" if finished else "progress"
+                    yield (f"event: {kind}\n"
+                           f"data: {json.dumps(state, ensure_ascii=False)}\n\n")
+                    if kind == "done":
+                        return
+                elif job.wait_for_change(version) == version:
+                    yield ": keep-alive\n\n"
+
+        return Response(
+            stream_with_context(_events()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
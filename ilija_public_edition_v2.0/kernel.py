@@ -5,10 +5,14 @@ Terminal-Modus: python kernel.py
 """
 
 import os
+import re
 import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from providers    import select_provider, get_available_providers
-from skill_manager import SkillManager
+from providers    import select_provider, get_available_providers, SystemPrompt
+from skill_manager import SkillManager, CORE_SKILLS
 from agent_state  import AgentState, AgentStatus
 
 load_dotenv()
@@ -74,12 +78,59 @@ Du darfst und sollst alle installierten Skills ausführen wenn der Nutzer es ver
 Antworte auf Deutsch. Aktueller Provider: {provider}
 """
 
+# Je Anfrage ausgewählte Skills – steht hinter dem stabilen Teil, damit dessen
+# Präfix-Cache beim Provider (Claude cache_control) erhalten bleibt
+SELECTED_SKILLS_TEMPLATE = """
+════════════════════════════════════════
+WEITERE SKILLS FÜR DIESE ANFRAGE (gleiche Regeln und Syntax wie oben):
+{skills}
+════════════════════════════════════════
+"""
+
+# ── SKILL-Aufruf-Erkennung ────────────────────────────────────
+SKILL_MARKER     = "SKILL:"
+SKILL_CALL_RE    = re.compile(r'SKILL:(\w+)\(([^)]*)\)')
+SKILL_PARTIAL_RE = re.compile(r'SKILL:\w*(\([^)]*)?')   # unvollständiger Aufruf am Puffer-Ende
+
+# ── Parallele SKILL-Aufrufe ───────────────────────────────────
+_call_pool      = None
+_call_pool_lock = threading.Lock()
+
+
+def _skill_call_pool() -> ThreadPoolExecutor:
+    """Gemeinsamer, begrenzter Pool für mehrere SKILL-Aufrufe einer Antwort."""
+    global _call_pool
+    if _call_pool is None:
+        with _call_pool_lock:
+            if _call_pool is None:
+                try:
+                    workers = int(os.getenv("SKILL_PARALLEL_CALLS", "4"))
+                except ValueError:
+                    workers = 4
+                _call_pool = ThreadPoolExecutor(max_workers=max(1, workers),
+                                                thread_name_prefix="skill-call")
+    return _call_pool
+
+
+# ── Skill-Auswahl für den Prompt ──────────────────────────────
+PROMPT_CACHE_SIZE    = 32   # gerenderte Prompts (je Skill-Auswahl)
+SKILL_QUERY_MESSAGES = 3    # letzte Nutzer-Nachrichten als Relevanz-Anfrage
+
+
+def _skill_prompt_top_k() -> int:
+    """SKILL_PROMPT_TOP_K aus .env – 0 schaltet die Auswahl ab (alle Skills)."""
+    try:
+        return int(os.getenv("SKILL_PROMPT_TOP_K", "8"))
+    except ValueError:
+        return 8
+
 
 class Kernel:
     def __init__(self, provider_mode: str = "auto"):
         print("[Ilija] Starte Public Edition...")
         self.state   = AgentState()
         self.manager = SkillManager()
+        self._prompt_cache = None   # (skills-version, provider, skills) -> gerenderter Prompt
 
         name, provider = select_provider(provider_mode)
         self.provider  = provider
@@ -87,11 +138,77 @@ class Kernel:
         print(f"[Ilija] Provider: {name}")
         print(f"[Ilija] Skills geladen: {len(self.manager.skills)}")
 
-    def get_system_prompt(self) -> str:
-        return SYSTEM_PROMPT_TEMPLATE.format(
-            skills   = self.manager.get_skills_description(),
-            provider = self.state.active_provider,
-        )
+        # Optional: Änderungen in skills/ automatisch übernehmen
+        if os.getenv("SKILLS_WATCH", "false").strip().lower() in ("1", "true", "yes", "on"):
+            try:
+                interval = float(os.getenv("SKILLS_WATCH_INTERVAL", "2"))
+            except ValueError:
+                interval = 2.0
+            self.manager.start_watcher(interval)
+
+    def get_system_prompt(self, query: str = None) -> str:
+        """
+        System-Prompt mit Skill-Katalog. Enthält nur die zur Anfrage passenden
+        Skills (plus Kern-Skills), siehe SKILL_PROMPT_TOP_K. Ohne `query` werden
+        die letzten Nutzer-Nachrichten aus dem Verlauf verwendet.
+
+        Regeln und Kern-Skills bilden den stabilen Anfang (SystemPrompt.static),
+        die ausgewählten Skills folgen dahinter (SystemPrompt.dynamic).
+        Gerenderte Prompts werden pro (Skills-Version, Provider, Auswahl) gecacht.
+        """
+        if query is None:
+            query = self._skill_query()
+        select = getattr(self.manager, "select_relevant_skills", None)
+        names  = tuple(select(query, _skill_prompt_top_k())) if select else None
+        if names is not None and len(names) == len(self.manager.skills):
+            names = None                                    # alle Skills: kein Auswahl-Block
+
+        version   = getattr(self.manager, "version", None)
+        cache_key = (version, self.state.active_provider, names)
+        cache     = getattr(self, "_prompt_cache", None)
+        if cache is None:
+            cache = self._prompt_cache = OrderedDict()
+        if cache_key in cache:
+            cache.move_to_end(cache_key)
+            return cache[cache_key]
+
+        if names is None:
+            static  = self._static_prompt(version, None)
+            dynamic = ""
+        else:
+            core    = tuple(n for n in CORE_SKILLS if n in self.manager.skills)
+            extra   = [n for n in names if n not in core]
+            static  = self._static_prompt(version, core)
+            dynamic = (SELECTED_SKILLS_TEMPLATE.format(
+                           skills=self.manager.get_skills_description(extra))
+                       if extra else "")
+        prompt = SystemPrompt(static, dynamic)
+        cache[cache_key] = prompt
+        if len(cache) > PROMPT_CACHE_SIZE:
+            cache.popitem(last=False)
+        return prompt
+
+    def _static_prompt(self, version, core) -> str:
+        """Stabiler Teil: Regeln mit allen Skills (core=None) bzw. nur den Kern-Skills."""
+        cache_key = ("static", version, self.state.active_provider, core)
+        cache     = self._prompt_cache
+        if cache_key not in cache:
+            if core is None:
+                skills = self.manager.get_skills_description()
+            else:
+                skills = (self.manager.get_skills_description(list(core)) if core
+                          else "Siehe Skills für diese Anfrage weiter unten.")
+            cache[cache_key] = SYSTEM_PROMPT_TEMPLATE.format(
+                skills   = skills,
+                provider = self.state.active_provider,
+            )
+        return cache[cache_key]
+
+    def _skill_query(self) -> str:
+        """Relevanz-Anfrage aus den letzten Nutzer-Nachrichten des Verlaufs."""
+        user_msgs = [m.get("content", "") for m in self.state.chat_history
+                     if m.get("role") == "user"]
+        return " ".join(str(c) for c in user_msgs[-SKILL_QUERY_MESSAGES:])
 
     def chat(self, user_input: str) -> str:
         """Verarbeitet eine Nutzer-Nachricht und gibt die Antwort zurück."""
@@ -117,51 +234,175 @@ class Kernel:
             self.state.add_message("assistant", error_msg)
             return error_msg
 
+    def chat_stream(self, user_input: str):
+        """
+        Wie chat(), aber als Generator: liefert Events, sobald der Provider Text
+        erzeugt. SKILL-Aufrufe werden erkannt und ausgeführt, sobald sie im
+        Stream vollständig vorliegen.
+
+        Events (dicts):
+          {"type": "token", "text": "..."}                    – Antwort-Text
+          {"type": "skill", "skill": "name", "result": "..."} – Skill-Ergebnis
+          {"type": "done",  "response": "..."}                – fertige Antwort
+          {"type": "error", "error": "..."}                   – Fehler
+        """
+        self.state.set_status(AgentStatus.THINKING, user_input[:80])
+        self.state.add_message("user", user_input)
+
+        final_parts = []
+        pending     = ""
+        try:
+            stream = self.provider.chat_stream(
+                messages = list(self.state.chat_history),
+                system   = self.get_system_prompt(),
+            )
+            for chunk in stream:
+                segments, pending = self._scan_stream_buffer(pending + chunk)
+                for segment in segments:
+                    if segment[0] == "text":
+                        final_parts.append(segment[1])
+                        yield {"type": "token", "text": segment[1]}
+                    else:
+                        _, skill_name, skill_result = segment
+                        final_parts.append(f"\n\n{skill_result}\n")
+                        yield {"type": "skill", "skill": skill_name,
+                               "result": str(skill_result)}
+
+            # Rest (unvollständiger SKILL-Aufruf o.ä.) unverändert ausgeben
+            if pending:
+                final_parts.append(pending)
+                yield {"type": "token", "text": pending}
+
+            final_response = "".join(final_parts)
+            self.state.add_message("assistant", final_response)
+            self.state.set_status(AgentStatus.IDLE)
+            yield {"type": "done", "response": final_response}
+
+        except Exception as e:
+            self.state.last_error = str(e)
+            self.state.set_status(AgentStatus.ERROR)
+            error_msg = f"❌ Fehler: {e}"
+            self.state.add_message("assistant", "".join(final_parts) + error_msg)
+            yield {"type": "error", "error": error_msg}
+
+    def _scan_stream_buffer(self, pending: str) -> tuple:
+        """
+        Zerlegt den Stream-Puffer in sicheren Text und ausgeführte Skills.
+        Text ab einem (möglicherweise erst teilweise empfangenen) "SKILL:" bleibt
+        im Puffer, bis der Aufruf vollständig ist oder sicher keiner mehr wird.
+        Gibt ([("text", str) | ("skill", name, result), ...], rest) zurück.
+        """
+        segments = []
+        text     = ""
+        while pending:
+            idx = pending.find(SKILL_MARKER)
+            if idx < 0:
+                # Ende des Puffers könnte der Anfang von "SKILL:" sein → zurückhalten
+                keep = 0
+                for n in range(min(len(SKILL_MARKER) - 1, len(pending)), 0, -1):
+                    if SKILL_MARKER.startswith(pending[-n:]):
+                        keep = n
+                        break
+                text   += pending[:len(pending) - keep]
+                pending = pending[len(pending) - keep:]
+                break
+
+            text   += pending[:idx]
+            pending = pending[idx:]
+            m = SKILL_CALL_RE.match(pending)
+            if m:
+                if text:
+                    segments.append(("text", text))
+                    text = ""
+                skill_name, params_str = m.group(1), m.group(2)
+                segments.append(("skill", skill_name,
+                                 self._execute_skill_call(skill_name, params_str)))
+                pending = pending[m.end():]
+            elif SKILL_PARTIAL_RE.fullmatch(pending):
+                break  # Aufruf noch unvollständig → auf weitere Chunks warten
+            else:
+                # Kein gültiger Aufruf → "SKILL:" als normalen Text durchreichen
+                text   += SKILL_MARKER
+                pending = pending[len(SKILL_MARKER):]
+        if text:
+            segments.append(("text", text))
+        return segments, pending
+
     def _handle_skill_calls(self, response: str) -> str:
         """Erkennt und führt Skill-Aufrufe in der Antwort aus."""
-        import re
-        pattern = r'SKILL:(\w+)\(([^)]*)\)'
-        matches = re.findall(pattern, response)
+        matches = SKILL_CALL_RE.findall(response)
 
         if not matches:
             return response
 
         result = response
-        for skill_name, params_str in matches:
-            self.state.set_status(AgentStatus.EXECUTING, skill_name)
+        for (skill_name, params_str), skill_result in zip(
+                matches, self._execute_skill_calls(matches)):
+            call_str = f'SKILL:{skill_name}({params_str})'
+            result   = result.replace(call_str, f'\n\n{skill_result}\n')
 
-            # Parameter parsen
-            kwargs = {}
-            if params_str.strip():
-                try:
-                    # Einfaches key="value" Parsing
-                    for param in re.findall(r'(\w+)\s*=\s*"([^"]*)"', params_str):
-                        kwargs[param[0]] = param[1]
-                    for param in re.findall(r"(\w+)\s*=\s*'([^']*)'", params_str):
-                        kwargs[param[0]] = param[1]
-                except Exception:
-                    pass
+        return result
 
-            # Fritzbox-Skill braucht Kernel-Referenz für den KI-Loop (STT→chat→TTS).
-            # WICHTIG: Immer PhoneKernel übergeben, NIEMALS den Haupt-Kernel!
-            # Der Haupt-Kernel hat Zugriff auf alle Skills (DMS, E-Mail, ERP...).
-            # Ein Anrufer darf KEINEN dieser Skills auslösen können.
-            if skill_name == "skill_ausfuehren" and "kernel" not in kwargs:
+    def _execute_skill_calls(self, matches: list) -> list:
+        """
+        Führt mehrere SKILL-Aufrufe aus und liefert die Ergebnisse in der
+        ursprünglichen Reihenfolge. Unabhängige Skills laufen parallel;
+        Skills mit SKILL_META "serial" (zustandsbehaftet, z.B. skill_ausfuehren)
+        laufen nacheinander in der Reihenfolge der Antwort.
+        """
+        if len(matches) == 1:
+            return [self._execute_skill_call(*matches[0])]
+
+        skill_meta = getattr(self.manager, "skill_meta", {})
+        results    = [None] * len(matches)
+        futures    = {}
+        pool       = _skill_call_pool()
+        for i, (skill_name, params_str) in enumerate(matches):
+            if not skill_meta.get(skill_name, {}).get("serial"):
+                futures[i] = pool.submit(self._execute_skill_call, skill_name, params_str)
+
+        for i, (skill_name, params_str) in enumerate(matches):
+            if i not in futures:
+                results[i] = self._execute_skill_call(skill_name, params_str)
+        for i, future in futures.items():
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                results[i] = f"❌ Fehler in Skill '{matches[i][0]}': {e}"
+        return results
+
+    def _execute_skill_call(self, skill_name: str, params_str: str):
+        """Parst die Parameter eines SKILL-Aufrufs und führt den Skill aus."""
+        self.state.set_status(AgentStatus.EXECUTING, skill_name)
+
+        # Parameter parsen
+        kwargs = {}
+        if params_str.strip():
+            try:
+                # Einfaches key="value" Parsing
+                for param in re.findall(r'(\w+)\s*=\s*"([^"]*)"', params_str):
+                    kwargs[param[0]] = param[1]
+                for param in re.findall(r"(\w+)\s*=\s*'([^']*)'", params_str):
+                    kwargs[param[0]] = param[1]
+            except Exception:
+                pass
+
+        # Fritzbox-Skill braucht Kernel-Referenz für den KI-Loop (STT→chat→TTS).
+        # WICHTIG: Immer PhoneKernel übergeben, NIEMALS den Haupt-Kernel!
+        # Der Haupt-Kernel hat Zugriff auf alle Skills (DMS, E-Mail, ERP...).
+        # Ein Anrufer darf KEINEN dieser Skills auslösen können.
+        if skill_name == "skill_ausfuehren" and "kernel" not in kwargs:
+            try:
+                from customer_kernel import CustomerKernel
+                kwargs["kernel"] = CustomerKernel(haupt_kernel=self)
+            except Exception:
                 try:
-                    from customer_kernel import CustomerKernel
-                    kwargs["kernel"] = CustomerKernel(haupt_kernel=self)
+                    from phone_kernel import PhoneKernel
+                    kwargs["kernel"] = PhoneKernel(haupt_kernel=self)
                 except Exception:
-                    try:
-                        from phone_kernel import PhoneKernel
-                        kwargs["kernel"] = PhoneKernel(haupt_kernel=self)
-                    except Exception:
-                        kwargs["kernel"] = self  # Fallback (sollte nie eintreten)
-
-            skill_result = self.manager.execute(skill_name, **kwargs)
-            call_str     = f'SKILL:{skill_name}({params_str})'
-            result       = result.replace(call_str, f'\n\n{skill_result}\n')
+                    kwargs["kernel"] = self  # Fallback (sollte nie eintreten)
 
-        return result
+        return self.manager.execute(skill_name, **kwargs)
 
     def switch_provider(self, mode: str):
         """Wechselt den KI-Provider."""
@@ -169,12 +410,19 @@ class Kernel:
             name, provider = select_provider(mode)
             self.provider              = provider
             self.state.active_provider = name
+            self._prompt_cache         = None
             return f"✅ Provider gewechselt zu: {name}"
         except Exception as e:
             return f"❌ Provider-Wechsel fehlgeschlagen: {e}"
 
     def reload_skills(self) -> str:
-        return self.manager.reload()
+        result = self.manager.reload()
+        self._prompt_cache = None
+        return result
+
+    def create_context(self) -> "KernelContext":
+        """Eigener Ausführungskontext (z.B. für einen Workflow-Lauf), siehe KernelContext."""
+        return KernelContext(self)
 
     def get_debug_info(self) -> str:
         status    = self.state.get_status_dict()
@@ -193,6 +441,23 @@ class Kernel:
         )
 
 
+class KernelContext(Kernel):
+    """
+    Ausführungskontext mit eigenem Chat-Verlauf und eigenem Provider-Handle.
+    Skills teilt er mit dem Haupt-Kernel; der Prompt-Cache wird beim Anlegen
+    kopiert. Ein Provider-Wechsel am Haupt-Kernel betrifft laufende Kontexte
+    nicht, deren Verlauf landet nie im Chat des Nutzers.
+    Anlegen unter kernel_lock, danach ohne Lock verwendbar.
+    """
+
+    def __init__(self, kernel: Kernel):
+        self.state    = AgentState()
+        self.state.active_provider = kernel.state.active_provider
+        self.manager  = kernel.manager
+        self.provider = kernel.provider
+        self._prompt_cache = OrderedDict(getattr(kernel, "_prompt_cache", None) or {})
+
+
 # ── Terminal-Modus ────────────────────────────────────────────
 def run_terminal():
     print("\n" + "═"*56)
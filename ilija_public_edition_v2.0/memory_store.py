@@ -0,0 +1,314 @@
+"""
+memory_store.py – Gesprächsgedächtnis der Workflow-Nodes (SQLite)
+==================================================================
+memory_window und memory_summary lesen und schreiben über diesen Store
+statt über eine JSON-Datei je Schlüssel. Jede Gesprächsrunde ist eine
+eigene Zeile (nur anhängen), das Fenster wird per Index gelesen; parallele
+Läufe auf demselben Schlüssel verlieren so keine Einträge mehr.
+
+Tabellen:
+  turns      – id, key, role, content, time
+  summaries  – key, summary, updated
+  pending    – id, key, user, assistant, time (noch nicht zusammengefasst)
+
+Je Schlüssel bleiben höchstens MEMORY_RETENTION Nachrichten erhalten
+(älteste fliegen beim Schreiben heraus). Vorhandene Dateien aus data/memory/
+werden beim ersten Öffnen einmalig übernommen.
+
+Zusammenfassungen (memory_summary) pflegt die SummaryQueue im Hintergrund:
+neue Runden werden in `pending` vorgemerkt und erst nach MEMORY_SUMMARY_EVERY
+Runden gemeinsam mit einem einzigen LLM-Aufruf eingearbeitet. Der Lauf
+wartet darauf nicht; vorgemerkte Runden überstehen einen Neustart.
+"""
+
+import os
+import json
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+MEMORY_DB         = os.path.join("data", "memory.db")
+LEGACY_DIR        = os.path.join("data", "memory")
+DEFAULT_RETENTION = 200
+CONTENT_LIMIT     = 600    # Zeichen je gespeicherter Nachricht
+DEFAULT_EVERY     = 1      # Runden je Zusammenfassungs-Aufruf
+BATCH_LIMIT       = 20     # höchstens so viele Runden je Aufruf im Prompt
+TURN_PROMPT_CHARS = 300    # Zeichen je Nachricht im Zusammenfassungs-Prompt
+
+_FAILURE_PREFIXES = ("❌", "⏱", "⛔")   # Kernel.chat meldet Fehler als Text
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    key      TEXT NOT NULL,
+    role     TEXT NOT NULL,
+    content  TEXT,
+    time     TEXT
+);
+CREATE INDEX IF NOT EXISTS turns_key ON turns (key, id);
+CREATE TABLE IF NOT EXISTS summaries (
+    key      TEXT PRIMARY KEY,
+    summary  TEXT,
+    updated  TEXT
+);
+CREATE TABLE IF NOT EXISTS pending (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    key        TEXT NOT NULL,
+    user       TEXT,
+    assistant  TEXT,
+    time       TEXT
+);
+CREATE INDEX IF NOT EXISTS pending_key ON pending (key, id);
+CREATE TABLE IF NOT EXISTS meta (
+    name     TEXT PRIMARY KEY,
+    value    TEXT
+);
+"""
+
+
+def retention() -> int:
+    try:
+        return max(2, int(os.getenv("MEMORY_RETENTION", DEFAULT_RETENTION)))
+    except ValueError:
+        return DEFAULT_RETENTION
+
+
+def summary_every() -> int:
+    try:
+        return max(1, int(os.getenv("MEMORY_SUMMARY_EVERY", DEFAULT_EVERY)))
+    except ValueError:
+        return DEFAULT_EVERY
+
+
+class MemoryStore:
+    """Gesprächsrunden und Zusammenfassungen je Schlüssel; thread-sicher über einen Lock."""
+
+    def __init__(self, path: str = None, keep: int = None, legacy_dir: str = None):
+        self.path       = os.path.abspath(path or MEMORY_DB)
+        self.keep       = keep if keep is not None else retention()
+        self.legacy_dir = legacy_dir if legacy_dir is not None else LEGACY_DIR
+        self._conn      = None
+        self._lock      = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate(self._conn)
+        return self._conn
+
+    def _migrate(self, db):
+        """Übernimmt die alten JSON-Dateien (<key>.json, <key>_summary.json) einmalig."""
+        if db.execute("SELECT 1 FROM meta WHERE name = 'legacy_imported'").fetchone():
+            return
+        if os.path.isdir(self.legacy_dir):
+            for fname in sorted(os.listdir(self.legacy_dir)):
+                if not fname.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self.legacy_dir, fname), "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                key = data.get("key") or fname[:-len(".json")]
+                if "summary" in data:
+                    db.execute("INSERT OR IGNORE INTO summaries (key, summary, updated)"
+                               " VALUES (?, ?, ?)", (key, data["summary"], data.get("updated")))
+                else:
+                    db.executemany(
+                        "INSERT INTO turns (key, role, content, time) VALUES (?, ?, ?, ?)",
+                        [(key, m.get("role", "user"), m.get("content", ""), m.get("time"))
+                         for m in data.get("window", [])])
+        db.execute("INSERT INTO meta (name, value) VALUES ('legacy_imported', ?)",
+                   (datetime.now().isoformat(),))
+        db.commit()
+
+    # ── Gesprächsrunden ───────────────────────────────────────
+    def append(self, key: str, user_msg: str, assistant_msg: str):
+        """Eine Runde (Nutzer + Antwort) anhängen und alte Nachrichten kappen."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT INTO turns (key, role, content, time) VALUES (?, ?, ?, ?)",
+                [(key, "user",      str(user_msg)[:CONTENT_LIMIT],      now),
+                 (key, "assistant", str(assistant_msg)[:CONTENT_LIMIT], now)])
+            db.execute(
+                "DELETE FROM turns WHERE key = ? AND id <= (SELECT id FROM turns WHERE key = ?"
+                " ORDER BY id DESC LIMIT 1 OFFSET ?)", (key, key, self.keep))
+            db.commit()
+
+    def window(self, key: str, rounds: int = 10) -> list:
+        """Die letzten `rounds` Runden, älteste zuerst: [{"role", "content", "time"}, ...]"""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT role, content, time FROM turns WHERE key = ?"
+                " ORDER BY id DESC LIMIT ?", (key, max(1, rounds) * 2)).fetchall()
+        return [dict(r) for r in reversed(rows)]
+
+    # ── Zusammenfassungen ─────────────────────────────────────
+    def summary(self, key: str) -> str:
+        with self._lock:
+            row = self._db().execute("SELECT summary FROM summaries WHERE key = ?",
+                                     (key,)).fetchone()
+        return row["summary"] if row else ""
+
+    def set_summary(self, key: str, summary: str):
+        with self._lock:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO summaries (key, summary, updated) VALUES (?, ?, ?)",
+                       (key, summary, datetime.now().isoformat()))
+            db.commit()
+
+    # ── Vorgemerkte Runden (noch nicht zusammengefasst) ───────
+    def add_pending(self, key: str, user_msg: str, assistant_msg: str) -> int:
+        """Runde für die nächste Zusammenfassung vormerken; gibt die Anzahl offener Runden zurück."""
+        with self._lock:
+            db = self._db()
+            db.execute("INSERT INTO pending (key, user, assistant, time) VALUES (?, ?, ?, ?)",
+                       (key, str(user_msg)[:CONTENT_LIMIT], str(assistant_msg)[:CONTENT_LIMIT],
+                        datetime.now().isoformat()))
+            db.commit()
+            return db.execute("SELECT COUNT(*) FROM pending WHERE key = ?", (key,)).fetchone()[0]
+
+    def pending(self, key: str) -> list:
+        """Offene Runden eines Schlüssels, älteste zuerst: [{"id", "user", "assistant"}, ...]"""
+        with self._lock:
+            rows = self._db().execute("SELECT id, user, assistant FROM pending WHERE key = ?"
+                                      " ORDER BY id", (key,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def drop_pending(self, key: str, upto_id: int):
+        """Offene Runden bis einschließlich upto_id entfernen (sind eingearbeitet)."""
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM pending WHERE key = ? AND id <= ?", (key, upto_id))
+            db.commit()
+
+    # ── Abfragen ──────────────────────────────────────────────
+    def stats(self, key: str) -> dict:
+        """Anzahl Runden und letzter Eintrag eines Schlüssels."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT COUNT(*) AS n, MAX(time) AS updated FROM turns WHERE key = ?",
+                (key,)).fetchone()
+        return {"count": row["n"] // 2, "updated": row["updated"]}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def summary_prompt(old_summary: str, turns: list) -> str:
+    """Ein Prompt für alle offenen Runden: bisherige Zusammenfassung + neue Interaktionen."""
+    lines = [f"Nutzer: {t['user'][:TURN_PROMPT_CHARS]}\n"
+             f"Ilija: {t['assistant'][:TURN_PROMPT_CHARS]}" for t in turns]
+    title = "Neue Interaktion" if len(turns) == 1 else "Neue Interaktionen (älteste zuerst)"
+    return (
+        "Erstelle eine prägnante Zusammenfassung (max. 150 Wörter) "
+        "der bisherigen Gesprächsinhalte.\n\n"
+        + (f"Bisherige Zusammenfassung:\n{old_summary}\n\n" if old_summary else "")
+        + f"{title}:\n" + "\n\n".join(lines) + "\n\n"
+        "Neue Zusammenfassung (nur der reine Text, keine Einleitung):"
+    )
+
+
+class SummaryQueue:
+    """
+    Pflegt Zusammenfassungen im Hintergrund. submit() merkt eine Runde vor;
+    sobald ein Schlüssel `every` offene Runden hat, fasst ein Worker-Thread
+    alle zusammen (ein chat()-Aufruf je Schlüssel). Schlägt der Aufruf fehl,
+    bleiben die Runden vorgemerkt und kommen beim nächsten Mal mit.
+    """
+
+    def __init__(self, store: MemoryStore = None, every: int = None):
+        self.store   = store
+        self.every   = every
+        self._queue  = queue.Queue()
+        self._queued = set()      # Schlüssel, die schon in der Warteschlange stehen
+        self._chat   = {}         # Schlüssel → zuletzt übergebene chat-Funktion
+        self._lock   = threading.Lock()
+        self._thread = None
+
+    def _store(self) -> MemoryStore:
+        return self.store or get_memory_store()
+
+    def submit(self, key: str, user_msg: str, assistant_msg: str, chat, every: int = None):
+        """
+        Runde vormerken. chat(prompt) -> str erzeugt die neue Zusammenfassung;
+        every überschreibt für diesen Aufruf den Standard (MEMORY_SUMMARY_EVERY).
+        """
+        count = self._store().add_pending(key, user_msg, assistant_msg)
+        every = every or self.every or summary_every()
+        with self._lock:
+            self._chat[key] = chat
+            if count < every or key in self._queued:
+                return
+            self._queued.add(key)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="memory-summary",
+                                                daemon=True)
+                self._thread.start()
+        self._queue.put(key)
+
+    def _loop(self):
+        while True:
+            key = self._queue.get()
+            try:
+                with self._lock:
+                    self._queued.discard(key)
+                    chat = self._chat.get(key)
+                self.summarize(key, chat)
+            except Exception as e:
+                print(f"[Memory] Zusammenfassung '{key}': {e}")
+            finally:
+                self._queue.task_done()
+
+    def summarize(self, key: str, chat) -> bool:
+        """
+        Alle offenen Runden eines Schlüssels einarbeiten (blockierend). Ist die
+        Antwort leer oder ein Fehlertext, bleiben alte Zusammenfassung und
+        offene Runden unverändert (False).
+        """
+        store = self._store()
+        turns = store.pending(key)
+        if not turns or chat is None:
+            return False
+        new_summary = str(chat(summary_prompt(store.summary(key), turns[-BATCH_LIMIT:])) or "").strip()
+        if not new_summary or new_summary.startswith(_FAILURE_PREFIXES):
+            print(f"[Memory] Zusammenfassung '{key}' übersprungen: {new_summary[:80] or 'leer'}")
+            return False
+        store.set_summary(key, new_summary)
+        store.drop_pending(key, turns[-1]["id"])
+        return True
+
+    def flush(self):
+        """Wartet, bis alle eingereihten Zusammenfassungen geschrieben sind."""
+        self._queue.join()
+
+
+_store      = None
+_store_lock = threading.Lock()
+_summaries  = None
+
+
+def get_memory_store() -> MemoryStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MemoryStore()
+        return _store
+
+
+def get_summary_queue() -> SummaryQueue:
+    global _summaries
+    with _store_lock:
+        if _summaries is None:
+            _summaries = SummaryQueue()
+        return _summaries
@@ -0,0 +1,264 @@
+"""
+message_filter.py – Lokale Vorstufe des chatfilter-Nodes (Modus "intelligent")
+===============================================================================
+Der chatfilter-Node soll nur echte Nutzer-Nachrichten an den Chat weiterlassen.
+Bisher wurde dafür jeder nicht leere Text dem LLM vorgelegt (JA/NEIN) – bei
+Postfach-Abfragen im Minutentakt ein voller Provider-Aufruf je Durchlauf.
+
+MessageFilter entscheidet in Stufen und fragt das LLM nur im Zweifel:
+
+  regel     – nur sichere Signale: leer, 📭 ❌ ⚠️ ⏱ ⛔ am Anfang, leere
+              JSON-Werte
+  cache     – dieselbe Eingabe wurde schon vom LLM entschieden (SHA-256)
+  modell    – Naive Bayes über Zeichen-Trigramme und Wörter, beim ersten
+              Gebrauch aus den mitgelieferten BEISPIELE trainiert; lässt nur
+              eindeutig echte Nachrichten (Abstand ≥ MODEL_MARGIN) ohne LLM
+              durch – verworfen wird nie ohne LLM. E-Mail-Ausgaben ("📬 …")
+              gehen immer ans LLM, das automatische Mails erkennen soll.
+  llm       – alles Übrige: JA/NEIN-Prompt wie bisher, Ergebnis wird gecacht
+  fallback  – LLM nicht erreichbar, Fehlertext (❌ ⏱ ⛔) oder weder JA noch
+              NEIN → gilt als echte Nachricht und wird nicht gecacht
+
+stats() zählt, wie oft jede Stufe entschieden hat; "llm_gespart" ist die
+Summe der lokalen Entscheidungen.
+"""
+
+import re
+import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+PROMPT_CHARS = 500     # so viel Text sieht das LLM (und der Cache-Schlüssel)
+CACHE_SIZE   = 1000    # gecachte Entscheidungen (LRU)
+MODEL_MARGIN = 0.4     # mittlere Log-Odds je Merkmal, ab der das Modell entscheidet
+MIN_FEATURES = 8       # Texte mit weniger Merkmalen entscheidet das Modell nicht
+WORD_WEIGHT  = 3       # Wörter zählen so oft wie drei Trigramme
+
+TIERS = ("regel", "cache", "modell", "llm", "fallback")
+
+_SIGNAL_PREFIXES = ("📭", "❌", "⚠️", "⏱", "⛔")
+_EMPTY_VALUES    = {"", "[]", "{}", "null", "none", "0", '""', "''", "-"}
+_MAIL_HEADER     = ("📬",)     # E-Mail-Nodes: Urteil über automatische Mails fällt das LLM
+
+# ── Mitgelieferte Trainingsbeispiele ──────────────────────────
+# True = echte Nachricht eines Nutzers, False = System-Signal / technische Ausgabe
+BEISPIELE = [
+    ("Hallo Ilija, wie wird das Wetter morgen in Berlin?", True),
+    ("Bitte erinnere mich um 15 Uhr an den Zahnarzttermin.", True),
+    ("Kannst du die Rechnung von letzter Woche nochmal schicken?", True),
+    ("Wie spät ist es gerade in Tokio?", True),
+    ("Danke für die schnelle Antwort! Passt dir Donnerstag um 10?", True),
+    ("Ich brauche bis Freitag ein Angebot für 20 Stühle.", True),
+    ("Schreib mir bitte eine kurze Zusammenfassung des Artikels.", True),
+    ("Hey, bist du heute Abend beim Training dabei?", True),
+    ("Können wir das Meeting auf nächste Woche verschieben?", True),
+    ("Was kostet die Reparatur ungefähr und wann hättest du Zeit?", True),
+    ("Mein Paket ist immer noch nicht angekommen, was kann ich tun?", True),
+    ("Guten Morgen! Hast du die Unterlagen schon bekommen?", True),
+    ("Ich habe eine Frage zu meinem Vertrag, kannst du mich anrufen?", True),
+    ("Liebe Grüße und bis bald, melde dich wenn du Zeit hast.", True),
+    ("Ich komme heute etwa zehn Minuten später, sorry!", True),
+    ("Wann habt ihr morgen geöffnet?", True),
+    ("Ich möchte meinen Termin am Montag leider absagen.", True),
+    ("Könntest du mir sagen, wo ich das Formular finde?", True),
+    ("Super, vielen Dank! Dann sehen wir uns am Wochenende.", True),
+    ("Wir würden gerne einen Tisch für vier Personen reservieren.", True),
+    ("Hast du Lust, am Samstag mit ins Kino zu kommen?", True),
+    ("Please send me the report by tomorrow, thanks!", True),
+    ("Can you help me with my order? It still hasn't arrived.", True),
+    ("Hi, are we still meeting for lunch today?", True),
+    ("Keine neuen Nachrichten.", False),
+    ("Keine ungelesenen E-Mails im Posteingang.", False),
+    ("Fehler: Verbindung zum Server fehlgeschlagen (Timeout nach 30s).", False),
+    ("HTTP 503 Service Unavailable", False),
+    ('Traceback (most recent call last): File "main.py", line 3, in <module>', False),
+    ("ConnectionError: Max retries exceeded with url: /getUpdates", False),
+    ("Token ungültig oder abgelaufen.", False),
+    ("Keine Einträge gefunden.", False),
+    ("0 Ergebnisse für die Abfrage.", False),
+    ("Status: OK, 0 neue Elemente.", False),
+    ("Postfach leer.", False),
+    ("Zugriff verweigert (403 Forbidden).", False),
+    ("Kein Input — Workflow gestoppt.", False),
+    ("Timeout beim Abruf der Daten.", False),
+    ("Abruf erfolgreich, keine Änderungen seit dem letzten Lauf.", False),
+    ("Keine Daten vorhanden.", False),
+    ("Rate limit exceeded, retry after 60 seconds.", False),
+    ("Verbindung unterbrochen, erneuter Versuch in 5 Sekunden.", False),
+    ("Error: invalid API key provided.", False),
+    ("No new messages.", False),
+    ("No results found.", False),
+    ("Request failed with status code 500.", False),
+    ("Keine neuen Antworten im Formular.", False),
+    ("Synchronisation abgeschlossen: 0 hinzugefügt, 0 geändert, 0 gelöscht.", False),
+]
+
+
+def _normalize(text: str) -> str:
+    """Kleinbuchstaben, Ziffern → 0, Leerraum zusammengefasst."""
+    text = re.sub(r"\d", "0", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _grams(text: str) -> list:
+    """Merkmale: Zeichen-Trigramme plus Wörter und ?/! (mit WORD_WEIGHT gewichtet)."""
+    text   = _normalize(text)
+    padded = f" {text} "
+    words  = ["w:" + w for w in re.findall(r"\w+|[?!]", text)]
+    return [padded[i:i + 3] for i in range(len(padded) - 2)] + words * WORD_WEIGHT
+
+
+class NgramModel:
+    """Multinomialer Naive Bayes über Trigramme und Wörter (Laplace-Glättung)."""
+
+    def __init__(self, examples: list):
+        counts = {True: Counter(), False: Counter()}
+        docs   = Counter()
+        for text, label in examples:
+            counts[label].update(_grams(text))
+            docs[label] += 1
+        vocab        = set(counts[True]) | set(counts[False])
+        self._counts = counts
+        self._totals = {label: sum(c.values()) + len(vocab) + 1 for label, c in counts.items()}
+        self._prior  = math.log((docs[True] + 1) / (docs[False] + 1))
+
+    def score(self, text: str):
+        """Mittlere Log-Odds (echt gegen Signal) je Merkmal und Anzahl Merkmale."""
+        grams = _grams(text)
+        if not grams:
+            return 0.0, 0
+        odds = self._prior
+        for g in grams:
+            odds += (math.log((self._counts[True][g] + 1) / self._totals[True])
+                     - math.log((self._counts[False][g] + 1) / self._totals[False]))
+        return odds / len(grams), len(grams)
+
+    def decide(self, text: str):
+        """True/False bei sicherer Entscheidung, sonst None."""
+        score, n = self.score(text)
+        if n < MIN_FEATURES or abs(score) < MODEL_MARGIN:
+            return None
+        return score > 0
+
+
+def rule_decision(text: str):
+    """Sichere Signale ohne Modell: False, sonst None."""
+    stripped = text.strip()
+    if stripped.lower() in _EMPTY_VALUES or stripped.startswith(_SIGNAL_PREFIXES):
+        return False
+    return None
+
+
+def parse_llm_answer(answer):
+    """JA → True, NEIN → False; Fehlertext, leer oder unklar → None."""
+    answer = str(answer or "").strip().upper()
+    if answer.startswith("JA"):
+        return True
+    if answer.startswith("NEIN"):
+        return False
+    return None
+
+
+def llm_prompt(text: str) -> str:
+    return (
+        "Du bist ein strikter Nachrichtenfilter. "
+        "Deine einzige Aufgabe: Entscheide ob der folgende Text "
+        "eine echte Benutzer-Nachricht enthält die beantwortet werden soll.\n\n"
+        "Antworte NUR mit einem einzigen Wort: JA oder NEIN.\n\n"
+        "JA = Text enthält mindestens eine echte Nachricht eines Users.\n"
+        "NEIN = Text ist leer, eine Fehlermeldung, ein System-Signal "
+        "(z.B. '📭', 'keine Nachrichten', 'Fehler', technische Info).\n\n"
+        f"Text:\n{text}"
+    )
+
+
+class MessageFilter:
+    """Stufenweise Klassifikation mit Entscheidungs-Cache und Zählern je Stufe."""
+
+    def __init__(self, examples: list = None, cache_size: int = None):
+        self.examples   = BEISPIELE if examples is None else examples
+        self.cache_size = CACHE_SIZE if cache_size is None else cache_size
+        self._model     = None
+        self._cache     = OrderedDict()   # SHA-256 → bool
+        self._counts    = dict.fromkeys(TIERS, 0)
+        self._lock      = threading.Lock()
+
+    def _get_model(self) -> NgramModel:
+        if self._model is None:
+            self._model = NgramModel(self.examples)
+        return self._model
+
+    def _count(self, tier: str):
+        with self._lock:
+            self._counts[tier] += 1
+
+    def classify(self, text: str, chat=None):
+        """
+        (ist_echt, stufe). chat(prompt) -> str ist der LLM-Aufruf für unsichere
+        Fälle; ohne chat, bei Fehlern oder unklarer Antwort gilt der Text als
+        echte Nachricht.
+        """
+        decision = rule_decision(text)
+        if decision is not None:
+            self._count("regel")
+            return decision, "regel"
+
+        text = text.strip()[:PROMPT_CHARS]
+        key  = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            decision = self._cache.get(key)
+            if decision is not None:
+                self._cache.move_to_end(key)
+                self._counts["cache"] += 1
+                return decision, "cache"
+
+        if not text.startswith(_MAIL_HEADER) and self._get_model().decide(text):
+            self._count("modell")
+            return True, "modell"
+
+        try:
+            if chat is None:
+                raise RuntimeError("kein LLM")
+            decision = parse_llm_answer(chat(llm_prompt(text)))
+        except Exception:
+            decision = None
+        if decision is None:
+            # Kernel.chat meldet Fehler als Text ("❌ Fehler: …") – nie cachen
+            self._count("fallback")
+            return True, "fallback"
+
+        with self._lock:
+            self._counts["llm"] += 1
+            if self.cache_size > 0:
+                self._cache[key] = decision
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return decision, "llm"
+
+    def clear(self):
+        """Leert den Entscheidungs-Cache und setzt die Zähler zurück."""
+        with self._lock:
+            self._cache.clear()
+            self._counts = dict.fromkeys(TIERS, 0)
+
+    def stats(self) -> dict:
+        """Entscheidungen je Stufe, eingesparte LLM-Aufrufe und Cache-Größe."""
+        with self._lock:
+            counts = dict(self._counts)
+            size   = len(self._cache)
+        return {"tiers": counts,
+                "llm_gespart": counts["regel"] + counts["cache"] + counts["modell"],
+                "cache_eintraege": size}
+
+
+_filter      = None
+_filter_lock = threading.Lock()
+
+
+def get_message_filter() -> MessageFilter:
+    global _filter
+    with _filter_lock:
+        if _filter is None:
+            _filter = MessageFilter()
+        return _filter
@@ -5,11 +5,103 @@ Unterstützte Provider: Claude (Anthropic), ChatGPT (OpenAI), Gemini (Google), O
 
 import os
 import json
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+# ── Gemeinsamer Transport (Connection-Pooling) ────────────────
+# Ein prozessweiter Client/Session je Provider und API-Key. Alle Kernel
+# (Kernel, PhoneKernel, CustomerKernel, DMS ...) teilen sich dieselben
+# Keep-Alive-Verbindungen → kein neuer TCP+TLS-Handshake pro LLM-Aufruf.
+_transports      = {}   # (provider, key) -> Client/Session
+_transports_lock = threading.Lock()
+
+
+def _env_number(name: str, default, cast):
+    try:
+        return cast(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def transport_settings() -> dict:
+    """Pool-Größe und Timeouts (über .env konfigurierbar, ungültige Werte → Standard)."""
+    return {
+        "pool_size":       max(1, _env_number("PROVIDER_POOL_SIZE", 10, int)),
+        "connect_timeout": _env_number("PROVIDER_CONNECT_TIMEOUT", 10.0, float),
+        "read_timeout":    _env_number("PROVIDER_READ_TIMEOUT", 300.0, float),
+    }
+
+
+def shared_transport(provider: str, api_key: str, factory):
+    """
+    Gibt den gemeinsamen Client für (provider, api_key) zurück.
+    factory(settings) wird nur beim ersten Zugriff aufgerufen.
+    """
+    cache_key = (provider, api_key or "")
+    client = _transports.get(cache_key)
+    if client is not None:
+        return client
+    with _transports_lock:
+        client = _transports.get(cache_key)
+        if client is None:
+            client = factory(transport_settings())
+            _transports[cache_key] = client
+    return client
+
+
+def reset_transports():
+    """Schließt alle gepoolten Verbindungen (z.B. nach Einstellungs-Änderung)."""
+    with _transports_lock:
+        clients = list(_transports.values())
+        _transports.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def _http_session(settings: dict):
+    """requests.Session mit Keep-Alive-Pool der konfigurierten Größe."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=settings["pool_size"],
+                          pool_maxsize=settings["pool_size"])
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _httpx_client(settings: dict):
+    """httpx.Client für die Anthropic-/OpenAI-SDKs (beide bauen auf httpx auf)."""
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=settings["pool_size"],
+                            max_keepalive_connections=settings["pool_size"]),
+        timeout=httpx.Timeout(settings["read_timeout"],
+                              connect=settings["connect_timeout"]),
+    )
+
+
+class SystemPrompt(str):
+    """
+    System-Prompt aus einem stabilen Teil (Regeln + Kern-Skills) und einem Teil,
+    der sich je Anfrage ändern darf (ausgewählte Skills). Wirkt überall als
+    normaler str; ClaudeProvider setzt den Cache-Breakpoint hinter `static`,
+    damit der Präfix-Cache über wechselnde Skill-Auswahlen hinweg trifft.
+    """
+
+    def __new__(cls, static: str, dynamic: str = ""):
+        prompt         = super().__new__(cls, static + dynamic)
+        prompt.static  = static
+        prompt.dynamic = dynamic
+        return prompt
+
+
 class Provider:
     def __init__(self, name: str):
         self.name = name
@@ -17,27 +109,61 @@ class Provider:
     def chat(self, messages: list, system: str = None) -> str:
         raise NotImplementedError
 
+    def chat_stream(self, messages: list, system: str = None):
+        """
+        Generator: liefert die Antwort stückweise (Text-Chunks), sobald der
+        Provider sie erzeugt. Fallback für Provider ohne Streaming:
+        die komplette Antwort als ein einziger Chunk.
+        """
+        yield self.chat(messages, system)
+
 
 class ClaudeProvider(Provider):
     def __init__(self):
         super().__init__("Claude")
         import anthropic
-        self.client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        api_key     = os.getenv("ANTHROPIC_API_KEY")
+        self.client = shared_transport(
+            "anthropic", api_key,
+            lambda cfg: anthropic.Anthropic(api_key=api_key, http_client=_httpx_client(cfg)))
         self.model  = os.getenv("ANTHROPIC_MODEL", "claude-opus-4-6")
 
-    def chat(self, messages: list, system: str = None) -> str:
+    def _request_kwargs(self, messages: list, system: str = None) -> dict:
         kwargs = {"model": self.model, "max_tokens": 4096, "messages": messages}
         if system:
-            kwargs["system"] = system
-        response = self.client.messages.create(**kwargs)
+            if os.getenv("ANTHROPIC_PROMPT_CACHE", "true").lower() == "false":
+                kwargs["system"] = system
+            else:
+                # Prompt-Caching: der große, statische System-Prompt (Skill-Katalog)
+                # wird serverseitig gecacht statt bei jedem Turn neu verarbeitet.
+                # Der je Anfrage wechselnde Teil steht hinter dem Breakpoint.
+                static  = getattr(system, "static", system)
+                dynamic = getattr(system, "dynamic", "")
+                kwargs["system"] = [{"type": "text", "text": static,
+                                     "cache_control": {"type": "ephemeral"}}]
+                if dynamic:
+                    kwargs["system"].append({"type": "text", "text": dynamic})
+        return kwargs
+
+    def chat(self, messages: list, system: str = None) -> str:
+        response = self.client.messages.create(**self._request_kwargs(messages, system))
         return response.content[0].text
 
+    def chat_stream(self, messages: list, system: str = None):
+        with self.client.messages.stream(**self._request_kwargs(messages, system)) as stream:
+            for text in stream.text_stream:
+                if text:
+                    yield text
+
 
 class OpenAIProvider(Provider):
     def __init__(self):
         super().__init__("ChatGPT")
         from openai import OpenAI
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        api_key     = os.getenv("OPENAI_API_KEY")
+        self.client = shared_transport(
+            "openai", api_key,
+            lambda cfg: OpenAI(api_key=api_key, http_client=_httpx_client(cfg)))
         self.model  = os.getenv("OPENAI_MODEL", "gpt-4o")
 
     def chat(self, messages: list, system: str = None) -> str:
@@ -48,16 +174,37 @@ class OpenAIProvider(Provider):
         response = self.client.chat.completions.create(model=self.model, messages=msgs)
         return response.choices[0].message.content
 
+    def chat_stream(self, messages: list, system: str = None):
+        msgs = []
+        if system:
+            msgs.append({"role": "system", "content": system})
+        msgs.extend(messages)
+        stream = self.client.chat.completions.create(
+            model=self.model, messages=msgs, stream=True)
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                yield text
+
 
 class GeminiProvider(Provider):
     def __init__(self):
         super().__init__("Gemini")
         self.api_key   = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY", "")
         self.model_name = os.getenv("GOOGLE_MODEL", "gemini-2.5-flash")
+        self.session    = shared_transport("gemini", self.api_key, _http_session)
 
-    def chat(self, messages: list, system: str = None) -> str:
-        import requests
+    CHAT_READ_TIMEOUT = 30   # Sekunden für generateContent (wie vor dem Session-Pool)
+
+    def _timeout(self, stream: bool = False) -> tuple:
+        """Streaming darf lange laufen (PROVIDER_READ_TIMEOUT), chat() bleibt bei 30 s."""
+        cfg = transport_settings()
+        return (cfg["connect_timeout"],
+                cfg["read_timeout"] if stream else self.CHAT_READ_TIMEOUT)
 
+    def _build_parts(self, messages: list, system: str = None) -> list:
         # Bewährter EVO-Ansatz: alles als flacher Text-Block in einem einzigen Content-Objekt.
         # Verhindert den "letzter Turn muss user sein"-Fehler bei Gesprächsverläufen.
         parts = []
@@ -74,17 +221,22 @@ class GeminiProvider(Provider):
                 parts.append({"text": f"Assistant: {content}"})
             else:
                 parts.append({"text": f"User: {content}"})
+        return parts
 
+    def _request_body(self, messages: list, system: str = None) -> dict:
+        return {"contents": [{"parts": self._build_parts(messages, system)}],
+                "generationConfig": {"temperature": 0.7, "maxOutputTokens": 2048}}
+
+    def chat(self, messages: list, system: str = None) -> str:
         url = (f"https://generativelanguage.googleapis.com/v1beta/models/"
                f"{self.model_name}:generateContent")
         try:
-            resp = requests.post(
+            resp = self.session.post(
                 url,
                 headers={"Content-Type": "application/json",
                          "X-goog-api-key": self.api_key},
-                json={"contents": [{"parts": parts}],
-                      "generationConfig": {"temperature": 0.7, "maxOutputTokens": 2048}},
-                timeout=30,
+                json=self._request_body(messages, system),
+                timeout=self._timeout(),
             )
             data = resp.json()
             if resp.status_code == 429:
@@ -98,21 +250,71 @@ class GeminiProvider(Provider):
         except Exception as e:
             raise Exception(f"Gemini Fehler: {e}")
 
+    def chat_stream(self, messages: list, system: str = None):
+        # streamGenerateContent mit alt=sse liefert "data: {...}"-Zeilen
+        url = (f"https://generativelanguage.googleapis.com/v1beta/models/"
+               f"{self.model_name}:streamGenerateContent?alt=sse")
+        try:
+            resp = self.session.post(
+                url,
+                headers={"Content-Type": "application/json",
+                         "X-goog-api-key": self.api_key},
+                json=self._request_body(messages, system),
+                timeout=self._timeout(stream=True),
+                stream=True,
+            )
+        except Exception as e:
+            raise Exception(f"Gemini Fehler: {e}")
+        with resp:
+            if resp.status_code == 429:
+                raise Exception("Gemini Fehler: Rate-Limit – bitte kurz warten")
+            if resp.status_code != 200:
+                raise Exception(f"Gemini Fehler: HTTP {resp.status_code}: {resp.text[:500]}")
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                try:
+                    data = json.loads(line[5:].strip())
+                    parts = data["candidates"][0]["content"].get("parts", [])
+                except (ValueError, KeyError, IndexError):
+                    continue
+                text = "".join(p.get("text", "") for p in parts)
+                if text:
+                    yield text
+
 
 class OllamaProvider(Provider):
     def __init__(self, model: str = None):
         super().__init__("Ollama")
         self.model = model or os.getenv("OLLAMA_MODEL", "qwen2.5:7b")
+        self.host  = os.getenv("OLLAMA_HOST", "")
 
-    def chat(self, messages: list, system: str = None) -> str:
+    @property
+    def client(self):
         import ollama
+        return shared_transport(
+            "ollama", self.host,
+            lambda cfg: ollama.Client(host=self.host or None,
+                                      timeout=cfg["read_timeout"]))
+
+    def chat(self, messages: list, system: str = None) -> str:
         msgs = []
         if system:
             msgs.append({"role": "system", "content": system})
         msgs.extend(messages)
-        response = ollama.chat(model=self.model, messages=msgs)
+        response = self.client.chat(model=self.model, messages=msgs)
         return response["message"]["content"]
 
+    def chat_stream(self, messages: list, system: str = None):
+        msgs = []
+        if system:
+            msgs.append({"role": "system", "content": system})
+        msgs.extend(messages)
+        for chunk in self.client.chat(model=self.model, messages=msgs, stream=True):
+            text = chunk["message"]["content"]
+            if text:
+                yield text
+
 
 def select_provider(mode: str = "auto") -> tuple:
     """
@@ -0,0 +1,181 @@
+"""
+run_store.py – Lauf-Historie der Workflow-Engine (SQLite)
+==========================================================
+Jeder Workflow-Lauf bekommt eine ID; für jeden Node werden Eingabe, Ausgabe,
+Status und Dauer gespeichert, sobald er fertig ist. Ein abgebrochener oder
+fehlgeschlagener Lauf lässt sich so ab dem ersten nicht erfolgreichen Node
+fortsetzen, ohne die teuren Nodes davor (KI, Google-APIs) zu wiederholen.
+
+Tabellen:
+  runs       – id, workflow_id, name, status, started, finished,
+               definition, inputs, resumed_from
+  run_nodes  – run_id, nid, type, position, input, output, status,
+               started, duration, reused
+
+Status eines Laufs: running → done | error | cancelled
+Es bleiben höchstens WORKFLOW_RUN_HISTORY Läufe erhalten (0 = keine Historie).
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+RUN_DB       = os.path.join("data", "workflow_runs.db")
+DEFAULT_KEEP = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           TEXT PRIMARY KEY,
+    workflow_id  TEXT,
+    name         TEXT,
+    status       TEXT,
+    started      REAL,
+    finished     REAL,
+    definition   TEXT,
+    inputs       TEXT,
+    resumed_from TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_workflow ON runs (workflow_id, started);
+CREATE TABLE IF NOT EXISTS run_nodes (
+    run_id    TEXT,
+    nid       TEXT,
+    type      TEXT,
+    position  INTEGER,
+    input     TEXT,
+    output    TEXT,
+    status    TEXT,
+    started   REAL,
+    duration  REAL,
+    reused    INTEGER DEFAULT 0,
+    PRIMARY KEY (run_id, nid)
+);
+"""
+
+
+def history_size() -> int:
+    try:
+        return max(0, int(os.getenv("WORKFLOW_RUN_HISTORY", DEFAULT_KEEP)))
+    except ValueError:
+        return DEFAULT_KEEP
+
+
+class RunStore:
+    """Läufe und Node-Ergebnisse in einer SQLite-Datei; thread-sicher über einen Lock."""
+
+    def __init__(self, path: str = None, keep: int = None):
+        self.path  = os.path.abspath(path or RUN_DB)
+        self.keep  = keep if keep is not None else history_size()
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    # ── Schreiben ─────────────────────────────────────────────
+    def start_run(self, definition: dict, inputs: dict = None,
+                  resumed_from: str = None) -> str:
+        run_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT INTO runs (id, workflow_id, name, status, started, definition,"
+                " inputs, resumed_from) VALUES (?, ?, ?, 'running', ?, ?, ?, ?)",
+                (run_id, definition.get("id"), definition.get("name"), time.time(),
+                 json.dumps(definition, ensure_ascii=False, default=str),
+                 json.dumps(inputs or {}, ensure_ascii=False, default=str), resumed_from))
+            db.commit()
+        return run_id
+
+    def record_node(self, run_id: str, nid: str, ntype: str, position: int,
+                    input_text: str, output: str, status: str,
+                    started: float, duration: float, reused: bool = False):
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO run_nodes (run_id, nid, type, position, input,"
+                " output, status, started, duration, reused)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, nid, ntype, position, input_text, output, status,
+                 started, duration, int(reused)))
+            db.commit()
+
+    def finish_run(self, run_id: str, status: str):
+        with self._lock:
+            db = self._db()
+            db.execute("UPDATE runs SET status = ?, finished = ? WHERE id = ?",
+                       (status, time.time(), run_id))
+            self._prune(db)
+            db.commit()
+
+    def _prune(self, db):
+        """Verwirft die ältesten Läufe über der Höchstzahl."""
+        old = [r["id"] for r in db.execute(
+            "SELECT id FROM runs ORDER BY started DESC LIMIT -1 OFFSET ?", (self.keep,))]
+        for run_id in old:
+            db.execute("DELETE FROM run_nodes WHERE run_id = ?", (run_id,))
+            db.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    # ── Abfragen ──────────────────────────────────────────────
+    @staticmethod
+    def _summary(row) -> dict:
+        return {
+            "id":           row["id"],
+            "workflow_id":  row["workflow_id"],
+            "name":         row["name"],
+            "status":       row["status"],
+            "started":      row["started"],
+            "finished":     row["finished"],
+            "resumed_from": row["resumed_from"],
+        }
+
+    def get_run(self, run_id: str):
+        """Lauf mit Definition, Eingaben und Nodes (in Ausführungsreihenfolge) oder None."""
+        with self._lock:
+            db  = self._db()
+            row = db.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            nodes = db.execute("SELECT * FROM run_nodes WHERE run_id = ? ORDER BY position",
+                               (run_id,)).fetchall()
+        run = self._summary(row)
+        run["definition"] = json.loads(row["definition"] or "{}")
+        run["inputs"]     = json.loads(row["inputs"] or "{}")
+        run["nodes"]      = [{
+            "nid":      n["nid"],
+            "type":     n["type"],
+            "position": n["position"],
+            "input":    n["input"],
+            "output":   n["output"],
+            "status":   n["status"],
+            "started":  n["started"],
+            "duration": n["duration"],
+            "reused":   bool(n["reused"]),
+        } for n in nodes]
+        return run
+
+    def list_runs(self, workflow_id: str = None, limit: int = 50) -> list:
+        """Neueste Läufe zuerst, optional nur für einen Workflow."""
+        query, args = "SELECT * FROM runs", []
+        if workflow_id:
+            query += " WHERE workflow_id = ?"
+            args.append(workflow_id)
+        query += " ORDER BY started DESC LIMIT ?"
+        args.append(max(1, int(limit)))
+        with self._lock:
+            rows = self._db().execute(query, args).fetchall()
+        return [self._summary(r) for r in rows]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
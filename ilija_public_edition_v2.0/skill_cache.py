@@ -0,0 +1,192 @@
+"""
+skill_cache.py – TTL-/LRU-Ergebnis-Cache für lesende Skills
+============================================================
+Skills deklarieren ihre Cache-Regel in SKILL_META:
+
+    SKILL_META = {
+        "wikipedia_suche": {"cache": {"ttl": 3600, "key": ["suchbegriff", "sprache"],
+                                      "max_entries": 256, "persist": True}},
+    }
+
+  ttl                – Gültigkeit in Sekunden (Pflicht, > 0)
+  key                – Parameter, die den Cache-Schlüssel bilden (Standard: alle)
+  max_entries        – LRU-Grenze pro Skill (Standard: 128)
+  persist            – Einträge zusätzlich in data/skill_cache.json ablegen
+  no_cache_prefixes  – weitere Textanfänge, die nicht gecacht werden
+
+Fehler-, Timeout- und Abbruch-Ergebnisse (❌ ⏱ ⛔) werden nie gecacht.
+
+Schreibende Skills leeren die Caches lesender Skills über
+SKILL_META[name]["invalidates"] = ["lesender_skill", ...] (nach einem Aufruf
+ohne Fehler) oder direkt über invalidate([...]).
+"""
+
+import os
+import json
+import time
+import weakref
+import threading
+from collections import OrderedDict
+
+CACHE_FILE          = os.path.join("data", "skill_cache.json")
+DEFAULT_MAX_ENTRIES = 128
+_ERROR_PREFIXES     = ("❌", "⏱", "⛔")
+
+
+def cache_policy(meta: dict) -> dict:
+    """Cache-Regel aus SKILL_META oder None, wenn der Skill nicht gecacht wird."""
+    policy = (meta or {}).get("cache")
+    if not isinstance(policy, dict) or not policy.get("ttl"):
+        return None
+    return policy
+
+
+def is_failure(result) -> bool:
+    """Fehler-, Timeout- oder Abbruch-Ergebnis (❌ ⏱ ⛔ am Anfang)."""
+    return isinstance(result, str) and result.lstrip().startswith(_ERROR_PREFIXES)
+
+
+def _cacheable(result, policy: dict = None) -> bool:
+    if result is None or is_failure(result):
+        return False
+    prefixes = tuple((policy or {}).get("no_cache_prefixes") or ())
+    return not (prefixes and isinstance(result, str) and result.lstrip().startswith(prefixes))
+
+
+_caches = weakref.WeakSet()   # alle SkillResultCache-Instanzen des Prozesses
+
+
+def invalidate(skills):
+    """Verwirft die gecachten Ergebnisse dieser Skills in allen Caches des Prozesses."""
+    for cache in list(_caches):
+        cache.clear(list(skills))
+
+
+class SkillResultCache:
+    """Begrenzter TTL-Cache pro Skill mit Treffer-/Fehlzähler."""
+
+    def __init__(self, path: str = None):
+        self.path     = path or CACHE_FILE
+        self._entries = {}    # skill -> OrderedDict(key -> (expires_at, result))
+        self._stats   = {}    # skill -> {"hits": n, "misses": n}
+        self._persist = set() # Skills mit persist=True
+        self._lock    = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._loaded  = False
+        _caches.add(self)
+
+    # ── Schlüssel ─────────────────────────────────────────────
+    @staticmethod
+    def make_key(policy: dict, kwargs: dict) -> str:
+        names = policy.get("key")
+        if names is not None:
+            kwargs = {k: kwargs.get(k) for k in names}
+        return json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+
+    # ── Lesen / Schreiben ─────────────────────────────────────
+    def get(self, skill: str, policy: dict, kwargs: dict):
+        """Gibt (True, ergebnis) bei einem gültigen Treffer, sonst (False, None)."""
+        if policy.get("persist"):
+            self._load()
+        key = self.make_key(policy, kwargs)
+        with self._lock:
+            stats   = self._stats.setdefault(skill, {"hits": 0, "misses": 0})
+            entries = self._entries.get(skill)
+            hit     = entries.get(key) if entries else None
+            if hit and hit[0] > time.time():
+                entries.move_to_end(key)
+                stats["hits"] += 1
+                return True, hit[1]
+            if hit:
+                del entries[key]
+            stats["misses"] += 1
+        return False, None
+
+    def put(self, skill: str, policy: dict, kwargs: dict, result):
+        if not _cacheable(result, policy):
+            return
+        key = self.make_key(policy, kwargs)
+        with self._lock:
+            entries = self._entries.setdefault(skill, OrderedDict())
+            entries[key] = (time.time() + float(policy["ttl"]), result)
+            entries.move_to_end(key)
+            limit = int(policy.get("max_entries", DEFAULT_MAX_ENTRIES))
+            while len(entries) > limit:
+                entries.popitem(last=False)
+        if policy.get("persist"):
+            self._persist.add(skill)
+            self._save()
+
+    def clear(self, skills=None):
+        """Leert den Cache für die angegebenen Skills (None = alle)."""
+        with self._lock:
+            if skills is None:
+                self._entries.clear()
+            else:
+                for skill in skills:
+                    self._entries.pop(skill, None)
+        if self._persist:
+            self._save()
+
+    def stats(self) -> dict:
+        """Treffer/Fehlzugriffe/Einträge pro Skill plus Summen."""
+        with self._lock:
+            per_skill = {
+                skill: {**counts, "entries": len(self._entries.get(skill, ()))}
+                for skill, counts in self._stats.items()
+            }
+        hits   = sum(s["hits"] for s in per_skill.values())
+        misses = sum(s["misses"] for s in per_skill.values())
+        return {"hits": hits, "misses": misses, "skills": per_skill}
+
+    # ── Persistenz ────────────────────────────────────────────
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            now = time.time()
+            for skill, items in data.items():
+                self._persist.add(skill)
+                entries = self._entries.setdefault(skill, OrderedDict())
+                for key, (expires_at, result) in items.items():
+                    if expires_at > now and key not in entries:
+                        entries[key] = (expires_at, result)
+
+    def _save(self):
+        """Schreibt alle JSON-fähigen, noch gültigen Einträge atomar auf Platte."""
+        now = time.time()
+        with self._lock:
+            data = {}
+            for skill, entries in self._entries.items():
+                if skill not in self._persist:
+                    continue
+                items = {}
+                for key, (expires_at, result) in entries.items():
+                    if expires_at <= now:
+                        continue
+                    try:
+                        json.dumps(result)
+                    except (TypeError, ValueError):
+                        continue
+                    items[key] = [expires_at, result]
+                if items:
+                    data[skill] = items
+        if not data and not os.path.exists(self.path):
+            return
+        try:
+            with self._io_lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[SkillCache] ⚠ Speichern fehlgeschlagen: {e}")
@@ -0,0 +1,330 @@
+"""
+skill_executor.py – Begrenzte Ausführung von Skills mit Timeout und Abbruch
+============================================================================
+Skills laufen nicht mehr direkt im aufrufenden (Flask-/Workflow-)Thread,
+sondern in einem begrenzten Thread-Pool. Skills mit "executor": "process"
+(CPU-lastig, z.B. OCR) laufen in einem eigenen Prozess, der bei Timeout oder
+Abbruch hart beendet wird.
+
+Metadaten pro Skill (SKILL_META im Skill-Modul):
+    SKILL_META = {
+        "outlook_kalender_lesen": {"timeout": 180},
+        "dms_einsortieren":       {"timeout": 900, "executor": "process"},
+    }
+  timeout   – Sekunden bis zum Abbruch (0 = unbegrenzt, Standard: SKILL_TIMEOUT)
+  executor  – "thread" (Standard) oder "process"
+  serial    – True: mehrere SKILL-Aufrufe einer Antwort nie parallel
+              ausführen (zustandsbehaftete Skills, siehe Kernel)
+
+Threads lassen sich nicht von außen beenden: Ein Skill mit einem Parameter
+`cancel_event` bekommt ein threading.Event, das bei Timeout/Abbruch gesetzt
+wird, und kann sich darüber selbst beenden. Läuft ein Thread-Skill danach
+trotzdem weiter, belegt er seinen Worker – neue Aufrufe gehen dann an einen
+frischen Pool, der alte endet mit seinen letzten Aufrufen.
+"""
+
+import os
+import sys
+import time
+import uuid
+import pickle
+import inspect
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_TIMEOUT = 120
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def default_timeout() -> float:
+    """SKILL_TIMEOUT aus .env – 0 schaltet das Zeitlimit ab."""
+    try:
+        return float(os.getenv("SKILL_TIMEOUT", str(DEFAULT_TIMEOUT)))
+    except ValueError:
+        return DEFAULT_TIMEOUT
+
+
+def _child_main():
+    """
+    Einstieg im Kind-Prozess (python skill_executor.py): liest
+    (sys_path, filepath, skill_name, kwargs) per pickle von stdin, führt den
+    Skill aus und schreibt ("ok"|"error", wert) per pickle nach stdout.
+    Ausgaben des Skills landen auf stderr, damit stdout sauber bleibt.
+    """
+    import importlib.util
+    result_fd = os.dup(1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    try:
+        sys_path, filepath, skill_name, kwargs = pickle.load(sys.stdin.buffer)
+        sys.path[:0] = [p for p in sys_path if p not in sys.path]
+        spec   = importlib.util.spec_from_file_location("_skill_mod", filepath)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        result = getattr(module, skill_name)(**kwargs)
+        try:
+            payload = pickle.dumps(("ok", result))
+        except Exception:
+            payload = pickle.dumps(("ok", str(result)))
+    except BaseException as e:
+        payload = pickle.dumps(("error", f"{type(e).__name__}: {e}"))
+    with os.fdopen(result_fd, "wb") as out:
+        out.write(payload)
+
+
+class _Call:
+    """Ein laufender oder wartender Skill-Aufruf."""
+
+    def __init__(self, skill_name: str, timeout: float, executor: str):
+        self.id           = uuid.uuid4().hex[:12]
+        self.skill        = skill_name
+        self.timeout      = timeout
+        self.executor     = executor
+        self.started      = time.time()
+        self.cancel_event = threading.Event()
+        self.done         = threading.Event()
+        self.result       = None
+        self.error        = None
+        self.future       = None
+        self.pool         = None
+        self.progress     = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id":       self.id,
+            "skill":    self.skill,
+            "executor": self.executor,
+            "timeout":  self.timeout,
+            "laufzeit": round(time.time() - self.started, 2),
+        }
+
+
+class SkillExecutor:
+    """Begrenzter Pool für Skill-Aufrufe mit Timeout und Abbruch."""
+
+    def __init__(self, max_workers: int = None, process_workers: int = None):
+        self.max_workers     = max_workers or _env_int("SKILL_WORKERS", 8)
+        self.process_workers = process_workers or _env_int("SKILL_PROCESS_WORKERS", 2)
+        self._pool       = None
+        self._pool_lock  = threading.Lock()
+        self._proc_slots = threading.BoundedSemaphore(self.process_workers)
+        self._calls      = {}            # id -> _Call
+        self._calls_lock = threading.Lock()
+        self._local      = threading.local()
+        self._hung       = set()         # ids hängender Thread-Aufrufe nach Timeout/Abbruch
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="skill")
+        return self._pool
+
+    # ── Öffentliche API ───────────────────────────────────────
+    def run(self, skill_name: str, func, kwargs: dict, meta: dict = None,
+            filepath: str = None, cancel_event: threading.Event = None,
+            progress=None):
+        """
+        Führt `func(**kwargs)` im Pool aus und wartet höchstens `timeout`
+        Sekunden. Gibt das Ergebnis oder einen Fehler-/Timeout-Text zurück.
+        Exceptions des Skills werden an den Aufrufer weitergereicht.
+
+        cancel_event – optionales Event des Aufrufers (z.B. Job); wird es
+                       gesetzt, bricht der Aufruf wie bei cancel() ab.
+        progress     – Callback progress(text=None, anteil=None) für Skills
+                       mit einem Parameter `progress` (nur Thread-Ausführung).
+        """
+        meta     = meta or {}
+        timeout  = meta.get("timeout", default_timeout())
+        executor = meta.get("executor", "thread")
+        if executor == "process" and (getattr(sys, "frozen", False)
+                                      or not (filepath and self._picklable(kwargs))):
+            executor = "thread"
+
+        # Verschachtelter Aufruf aus einem Skill heraus: direkt ausführen,
+        # sonst könnte ein voller Pool sich selbst blockieren.
+        if getattr(self._local, "in_worker", False) and executor == "thread":
+            return func(**self._inject(func, kwargs, cancel_event or threading.Event(),
+                                       progress))
+
+        call = _Call(skill_name, timeout, executor)
+        call.progress = progress
+        if cancel_event is not None:
+            call.cancel_event = cancel_event
+        with self._calls_lock:
+            self._calls[call.id] = call
+
+        try:
+            call.pool = self._get_pool()
+            if executor == "process":
+                call.future = call.pool.submit(self._run_process, call, filepath, kwargs)
+            else:
+                call.future = call.pool.submit(self._run_thread, call, func, kwargs)
+
+            finished = self._wait(call, timeout)
+            if not finished:
+                self._abort(call)
+                self._release_worker(call)
+                return (f"⏱ Zeitüberschreitung: Skill '{skill_name}' nach "
+                        f"{timeout:g}s abgebrochen")
+            if call.cancel_event.is_set() and call.error is None and call.result is None:
+                self._abort(call)
+                self._release_worker(call)
+                return f"⛔ Skill '{skill_name}' wurde abgebrochen"
+            if call.error is not None:
+                raise call.error
+            return call.result
+        finally:
+            with self._calls_lock:
+                self._calls.pop(call.id, None)
+
+    def cancel(self, call_id: str) -> bool:
+        """Bricht einen laufenden Aufruf ab. False wenn die ID unbekannt ist."""
+        with self._calls_lock:
+            call = self._calls.get(call_id)
+        if call is None:
+            return False
+        self._abort(call)
+        call.done.set()     # wartenden Aufrufer sofort freigeben
+        return True
+
+    def running(self) -> list:
+        """Liste der aktuell laufenden/wartenden Aufrufe."""
+        with self._calls_lock:
+            return [c.to_dict() for c in self._calls.values()]
+
+    def shutdown(self):
+        with self._calls_lock:
+            calls = list(self._calls.values())
+        for call in calls:
+            self.cancel(call.id)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ── Intern ────────────────────────────────────────────────
+    @staticmethod
+    def _picklable(kwargs: dict) -> bool:
+        try:
+            pickle.dumps(kwargs)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _inject(func, kwargs: dict, cancel_event, progress=None) -> dict:
+        """Reicht cancel_event/progress an Skills weiter, die sie annehmen."""
+        try:
+            params = inspect.signature(func).parameters
+        except (TypeError, ValueError):
+            return kwargs
+        extra = {}
+        if "cancel_event" in params and "cancel_event" not in kwargs:
+            extra["cancel_event"] = cancel_event
+        if progress is not None and "progress" in params and "progress" not in kwargs:
+            extra["progress"] = progress
+        return {**kwargs, **extra} if extra else kwargs
+
+    @staticmethod
+    def _wait(call: _Call, timeout) -> bool:
+        """
+        Wartet auf das Ende des Aufrufs. True wenn fertig oder abgebrochen,
+        False bei Zeitüberschreitung.
+        """
+        deadline = time.time() + timeout if timeout and timeout > 0 else None
+        while True:
+            if call.cancel_event.is_set():
+                return True
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            slice_ = 0.2 if remaining is None else min(0.2, remaining)
+            if call.done.wait(slice_):
+                return True
+
+    def _abort(self, call: _Call):
+        call.cancel_event.set()
+        if call.future is not None:
+            call.future.cancel()    # greift nur, solange der Aufruf noch wartet
+
+    def _release_worker(self, call: _Call):
+        """
+        Ein Thread-Skill läuft nach Timeout/Abbruch weiter (Prozesse werden
+        beendet): Der alte Pool arbeitet seine übrigen Aufrufe ab und endet,
+        neue Aufrufe bekommen einen frischen Pool mit vollen Workern.
+        """
+        if call.executor != "thread" or call.future is None or not call.future.running():
+            return
+        with self._pool_lock:
+            with self._calls_lock:
+                self._hung.add(call.id)
+                hung = len(self._hung)
+            if self._pool is not call.pool:
+                return                      # Pool wurde schon ersetzt
+            self._pool = None
+        call.pool.shutdown(wait=False)
+        print(f"[SkillExecutor] ⚠ Skill '{call.skill}' läuft nach Abbruch weiter – "
+              f"neuer Thread-Pool ({hung} hängende Aufrufe)")
+
+    def _run_thread(self, call: _Call, func, kwargs: dict):
+        if call.cancel_event.is_set():
+            return
+        self._local.in_worker = True
+        try:
+            call.result = func(**self._inject(func, kwargs, call.cancel_event,
+                                              call.progress))
+        except BaseException as e:
+            call.error = e
+        finally:
+            self._local.in_worker = False
+            call.done.set()
+            with self._calls_lock:
+                self._hung.discard(call.id)
+
+    def _run_process(self, call: _Call, filepath: str, kwargs: dict):
+        if call.cancel_event.is_set():
+            return
+        with self._proc_slots:
+            proc = None
+            try:
+                proc = subprocess.Popen(
+                    [sys.executable, os.path.abspath(__file__)],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                    cwd=os.getcwd(),
+                )
+                payload = pickle.dumps((sys.path, filepath, call.skill, kwargs))
+                while True:
+                    try:
+                        out, _ = proc.communicate(payload, timeout=0.2)
+                        break
+                    except subprocess.TimeoutExpired:
+                        payload = None
+                        if call.cancel_event.is_set():
+                            return
+                try:
+                    status, value = pickle.loads(out)
+                except Exception:
+                    status, value = "error", f"Prozess beendet (Exit-Code {proc.returncode})"
+                if status == "ok":
+                    call.result = value
+                else:
+                    call.error = RuntimeError(value)
+            except BaseException as e:
+                call.error = e
+            finally:
+                if proc is not None and proc.poll() is None:
+                    proc.kill()
+                    proc.wait(timeout=2)
+                call.done.set()
+
+
+if __name__ == "__main__":
+    _child_main()
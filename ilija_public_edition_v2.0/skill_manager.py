@@ -4,10 +4,18 @@ Vereinfachte Version ohne dynamische Code-Generierung oder gefährliche Operatio
 """
 
 import os
+import re
+import ast
+import math
+import hashlib
+import threading
 import importlib.util
 import inspect
 import json
+from collections import Counter
 from pathlib import Path
+from skill_executor import SkillExecutor
+from skill_cache    import SkillResultCache, cache_policy, invalidate, is_failure
 
 SKILLS_DIR = os.path.abspath("skills")
 
@@ -23,29 +31,213 @@ BLOCKED_SKILL_NAMES = {
     "datei_loeschen_system", "system_shutdown",
 }
 
+# Skill-Module erst beim ersten Aufruf importieren (SKILLS_LAZY_IMPORT=false → sofort)
+def _lazy_import_enabled() -> bool:
+    return os.getenv("SKILLS_LAZY_IMPORT", "true").strip().lower() not in ("0", "false", "no", "off")
+
+# Skills die unabhängig von der Relevanz-Auswahl immer im Prompt stehen
+CORE_SKILLS = (
+    "uhrzeit_datum", "gedaechtnis_speichern", "gedaechtnis_suchen",
+    "notiz_speichern", "skill_ausfuehren",
+)
+
+# ── Relevanz-Index (BM25 über Skill-Name + Docstring) ─────────
+_TOKEN_RE   = re.compile(r"[a-z0-9]+")
+_UMLAUTE    = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_STOPWORDS  = {
+    "der", "die", "das", "den", "dem", "des", "ein", "eine", "einen", "und",
+    "oder", "mit", "fuer", "von", "auf", "aus", "ist", "sind", "wird", "werden",
+    "mal", "bitte", "mir", "mich", "ich", "du", "was", "wie", "wer", "zum", "zur",
+    "str", "int", "bool", "none", "true", "false", "the", "and",
+}
+_STEM_LEN   = 6   # grober Präfix-Stamm: "Würfel" ≈ "wuerfeln", "Termine" ≈ "Termin"
+_BM25_K1    = 1.2
+_BM25_B     = 0.75
+
+
+def _tokenize(text: str) -> list:
+    """Kleinschreibung, Umlaute auflösen, Stoppwörter raus, Präfix-Stamm."""
+    text = (text or "").lower().translate(_UMLAUTE)
+    return [t[:_STEM_LEN] for t in _TOKEN_RE.findall(text)
+            if len(t) > 2 and t not in _STOPWORDS]
+
+
+# ── Statische Skill-Erkennung (AST, ohne Modul auszuführen) ───
+class _SourceExpr:
+    """Annotation/Default aus dem Quelltext – repr() liefert den Originaltext."""
+
+    def __init__(self, text: str):
+        self.text     = text
+        self.__name__ = text
+
+    def __repr__(self):
+        return self.text
+
+    __str__ = __repr__
+
+
+def _source_expr(node):
+    return _SourceExpr(ast.unparse(node)) if node is not None else inspect.Parameter.empty
+
+
+def _source_default(node):
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return _SourceExpr(ast.unparse(node))
+
+
+def _ast_signature(node: ast.FunctionDef) -> inspect.Signature:
+    """Baut die inspect.Signature einer Funktion aus ihrem AST-Knoten."""
+    P      = inspect.Parameter
+    a      = node.args
+    params = []
+
+    positional = [(arg, P.POSITIONAL_ONLY) for arg in a.posonlyargs] + \
+                 [(arg, P.POSITIONAL_OR_KEYWORD) for arg in a.args]
+    defaults   = [None] * (len(positional) - len(a.defaults)) + list(a.defaults)
+    for (arg, kind), default in zip(positional, defaults):
+        params.append(P(arg.arg, kind, annotation=_source_expr(arg.annotation),
+                        default=P.empty if default is None else _source_default(default)))
+    if a.vararg:
+        params.append(P(a.vararg.arg, P.VAR_POSITIONAL,
+                        annotation=_source_expr(a.vararg.annotation)))
+    for arg, default in zip(a.kwonlyargs, a.kw_defaults):
+        params.append(P(arg.arg, P.KEYWORD_ONLY, annotation=_source_expr(arg.annotation),
+                        default=P.empty if default is None else _source_default(default)))
+    if a.kwarg:
+        params.append(P(a.kwarg.arg, P.VAR_KEYWORD,
+                        annotation=_source_expr(a.kwarg.annotation)))
+
+    return inspect.Signature(params, return_annotation=_source_expr(node.returns))
+
+
+def _missing_imports(tree: ast.Module) -> list:
+    """Top-Level-Pakete der Modul-Imports, die sich nicht finden lassen (ohne sie zu importieren)."""
+    missing = []
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Import):
+            names = [alias.name for alias in stmt.names]
+        elif isinstance(stmt, ast.ImportFrom) and stmt.level == 0 and stmt.module:
+            names = [stmt.module]
+        else:
+            continue                        # auch try/except-Importe: optional
+        for name in names:
+            top = name.split(".")[0]
+            if top in sys.modules:
+                continue
+            try:
+                found = importlib.util.find_spec(top) is not None
+            except (ImportError, ValueError):
+                found = False
+            if not found:
+                missing.append(top)
+    return missing
+
+
+def _scan_file(filepath: str):
+    """
+    Liest AVAILABLE_SKILLS, SKILL_META, Signaturen und Docstrings aus dem
+    Quelltext. Gibt [(name, doc, signature, meta), ...] zurück – oder None, wenn
+    sich das nicht statisch bestimmen lässt oder ein Top-Level-Import fehlt
+    (dann muss das Modul importiert werden, ein Importfehler fällt sofort auf).
+    """
+    with open(filepath, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=filepath)
+    if _missing_imports(tree):
+        return None
+
+    functions = {n.name: n for n in tree.body if isinstance(n, ast.FunctionDef)}
+    skill_list = None
+    meta       = {}
+    for stmt in tree.body:
+        if (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1
+                and isinstance(stmt.targets[0], ast.Name)
+                and stmt.targets[0].id == "SKILL_META"):
+            try:
+                meta = ast.literal_eval(stmt.value)
+            except (ValueError, TypeError, SyntaxError):
+                return None   # Metadaten nicht als Literal lesbar
+            if not isinstance(meta, dict):
+                return None
+            continue
+        uses_list = any(isinstance(n, ast.Name) and n.id == "AVAILABLE_SKILLS"
+                        for n in ast.walk(stmt))
+        if not uses_list:
+            continue
+        simple = (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1
+                  and isinstance(stmt.targets[0], ast.Name)
+                  and isinstance(stmt.value, (ast.List, ast.Tuple)))
+        if not simple or skill_list is not None:
+            return None   # berechnet, erweitert oder mehrfach zugewiesen
+        skill_list = stmt.value.elts
+
+    if skill_list is None:
+        return None
+    entries = []
+    for elt in skill_list:
+        if not isinstance(elt, ast.Name) or elt.id not in functions:
+            return None   # importierte oder dynamische Funktion
+        node = functions[elt.id]
+        entries.append((node.name, ast.get_docstring(node) or "", _ast_signature(node),
+                        dict(meta.get(node.name, {}))))
+    return entries
+
+
+class _LazySkill:
+    """
+    Platzhalter für einen Skill, dessen Modul noch nicht importiert wurde.
+    Name, Docstring und Signatur stammen aus dem AST; der erste Aufruf
+    importiert das Modul und ersetzt alle Platzhalter dieser Datei.
+    """
+
+    def __init__(self, manager, name: str, doc: str, signature: inspect.Signature):
+        self._manager      = manager
+        self.__name__      = name
+        self.__doc__       = doc
+        self.__signature__ = signature
+
+    def __call__(self, *args, **kwargs):
+        return self._manager._resolve(self.__name__)(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy skill {self.__name__}>"
+
 
 class SkillManager:
     def __init__(self):
         self.skills      = {}   # name -> callable
         self.skill_docs  = {}   # name -> docstring
+        self.skill_meta  = {}   # name -> SKILL_META-Eintrag (timeout, executor, ...)
         self.loaded_from = {}   # name -> filepath
+        self.version     = 0    # wird bei jedem (Neu-)Laden erhöht
+        self._description_cache = None
+        self._line_cache  = {}  # name -> gerenderte Katalog-Zeile
+        self._index       = None
+        self._files       = {}  # filepath -> {"stamp", "hash", "skills": {name: (func, doc, meta)}}
+        self._import_lock = threading.RLock()
+        self._watcher     = None
+        self._watch_stop  = threading.Event()
+        self.executor     = SkillExecutor()
+        self.cache        = SkillResultCache()
         self.load_all()
 
     def load_all(self):
         """Lädt alle Skills aus dem skills/-Ordner."""
-        self.skills     = {}
-        self.skill_docs = {}
-        loaded_count    = 0
-        errors          = []
+        with self._import_lock:
+            self._files  = {}
+            loaded_count = 0
+            errors       = []
 
-        for filepath in sorted(Path(SKILLS_DIR).glob("*.py")):
-            if filepath.name.startswith("_"):
-                continue
-            try:
-                count = self._load_file(str(filepath))
-                loaded_count += count
-            except Exception as e:
-                errors.append(f"{filepath.name}: {e}")
+            for filepath in self._skill_files():
+                try:
+                    self._files[filepath] = self._read_file(filepath)
+                except Exception as e:
+                    errors.append(f"{Path(filepath).name}: {e}")
+
+            self._rebuild()
+            self._invalidate()
+            loaded_count = len(self.skills)
 
         print(f"[SkillManager] {loaded_count} Skills geladen aus {SKILLS_DIR}/")
         if errors:
@@ -54,8 +246,89 @@ class SkillManager:
 
         return loaded_count
 
-    def _load_file(self, filepath: str) -> int:
-        """Lädt Skills aus einer einzelnen Python-Datei."""
+    @staticmethod
+    def _skill_files() -> list:
+        return [str(p) for p in sorted(Path(SKILLS_DIR).glob("*.py"))
+                if not p.name.startswith("_")]
+
+    @staticmethod
+    def _stamp(filepath: str) -> tuple:
+        st = os.stat(filepath)
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _hash(filepath: str) -> str:
+        with open(filepath, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def _read_file(self, filepath: str) -> dict:
+        """Liest eine Skill-Datei ein und merkt sich Zeitstempel und Hash."""
+        stamp = self._stamp(filepath)
+        return {"stamp": stamp, "hash": self._hash(filepath),
+                "skills": self._load_file(filepath)}
+
+    def _rebuild(self):
+        """Setzt die öffentlichen Dicts in Datei-Reihenfolge neu zusammen."""
+        skills, docs, metas, origin = {}, {}, {}, {}
+        for filepath in sorted(self._files):
+            for name, (func, doc, meta) in self._files[filepath]["skills"].items():
+                skills[name] = func
+                docs[name]   = doc
+                metas[name]  = meta
+                origin[name] = filepath
+        # Neue Dicts zuweisen statt ändern – laufende Iterationen bleiben gültig
+        self.skills, self.skill_docs, self.loaded_from = skills, docs, origin
+        self.skill_meta = metas
+
+    def _load_file(self, filepath: str) -> dict:
+        """
+        Liest die Skills einer Python-Datei. Standardmäßig nur per AST
+        (Platzhalter, Import beim ersten Aufruf); lässt sich AVAILABLE_SKILLS
+        nicht statisch lesen, wird die Datei sofort importiert.
+        """
+        entries = _scan_file(filepath) if _lazy_import_enabled() else None
+        if entries is None:
+            return self._import_file(filepath)
+
+        found = {}
+        for name, doc, signature, meta in entries:
+            if name in BLOCKED_SKILL_NAMES:
+                print(f"[SkillManager] ⛔ Blockiert: {name}")
+                continue
+            found[name] = (_LazySkill(self, name, doc, signature), doc, meta)
+        return found
+
+    def _resolve(self, name: str):
+        """
+        Importiert das Modul eines Platzhalters und liefert die echte Funktion.
+        Schlägt der Import fehl, verschwinden die Skills der Datei aus dem
+        Katalog, bis sie sich ändert.
+        """
+        with self._import_lock:
+            func = self.skills.get(name)
+            if isinstance(func, _LazySkill):
+                filepath = self.loaded_from[name]
+                entry    = self._files[filepath]["skills"]
+                try:
+                    imported = self._import_file(filepath)
+                except Exception as e:
+                    print(f"[SkillManager] ⚠ {Path(filepath).name}: {e} – Skills abgemeldet")
+                    self._files[filepath]["skills"] = {}
+                    self._rebuild()
+                    self._invalidate()
+                    raise RuntimeError(f"Skill '{name}' konnte nicht geladen werden: {e}") from e
+                for real_name, (real_func, doc, meta) in imported.items():
+                    if real_name in entry:
+                        entry[real_name] = (real_func, doc, entry[real_name][2])
+                        if self.loaded_from.get(real_name) == filepath:
+                            self.skills[real_name] = real_func
+                func = self.skills.get(name)
+            if func is None or isinstance(func, _LazySkill):
+                raise RuntimeError(f"Skill '{name}' nach Import nicht gefunden")
+            return func
+
+    def _import_file(self, filepath: str) -> dict:
+        """Führt eine Skill-Datei aus und liefert {name: (func, doc, meta)}."""
         spec   = importlib.util.spec_from_file_location("_skill_mod", filepath)
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
@@ -70,7 +343,8 @@ class SkillManager:
                 if not name.startswith("_")
             ]
 
-        count = 0
+        meta  = getattr(module, "SKILL_META", None) or {}
+        found = {}
         for func in skill_list:
             name = func.__name__
 
@@ -79,37 +353,210 @@ class SkillManager:
                 print(f"[SkillManager] ⛔ Blockiert: {name}")
                 continue
 
-            self.skills[name]      = func
-            self.skill_docs[name]  = inspect.getdoc(func) or ""
-            self.loaded_from[name] = filepath
-            count += 1
+            found[name] = (func, inspect.getdoc(func) or "", dict(meta.get(name, {})))
+
+        return found
 
-        return count
+    def _invalidate(self):
+        """Verwirft zwischengespeicherte Beschreibungen nach einer Änderung."""
+        self.version += 1
+        self._description_cache = None
+        self._line_cache = {}
+        self._index      = None
 
     def reload(self) -> str:
-        """Skills neu laden."""
+        """
+        Skills inkrementell neu laden: nur geänderte (mtime/Größe, dann Hash),
+        neue und gelöschte Dateien werden verarbeitet.
+        """
         old_count = len(self.skills)
-        new_count = self.load_all()
-        return f"Skills neu geladen: {new_count} (vorher: {old_count})"
+        changes   = self.refresh()
+        if changes is None:
+            return f"Skills neu geladen: {len(self.skills)} (vorher: {old_count}), keine Änderungen"
+        return (f"Skills neu geladen: {len(self.skills)} (vorher: {old_count}) – "
+                f"{len(changes['changed'])} geändert, {len(changes['added'])} neu, "
+                f"{len(changes['removed'])} entfernt")
 
-    def get_skills_description(self) -> str:
-        """Beschreibung aller verfügbaren Skills für den System-Prompt."""
+    def refresh(self):
+        """
+        Gleicht den skills/-Ordner mit dem geladenen Stand ab.
+        Gibt {"added", "changed", "removed": [dateinamen]} zurück oder None,
+        wenn sich nichts geändert hat.
+        """
+        with self._import_lock:
+            changes = {"added": [], "changed": [], "removed": []}
+            current = self._skill_files()
+            stale   = set()   # Skills, deren gecachte Ergebnisse verfallen
+
+            for filepath in set(self._files) - set(current):
+                stale.update(self._files[filepath]["skills"])
+                del self._files[filepath]
+                changes["removed"].append(Path(filepath).name)
+
+            for filepath in current:
+                known         = self._files.get(filepath)
+                stamp, digest = (0, 0), ""
+                try:
+                    stamp = self._stamp(filepath)
+                    if known and known["stamp"] == stamp:
+                        continue
+                    digest = self._hash(filepath)
+                    if known and known["hash"] == digest:
+                        known["stamp"] = stamp      # nur touch, Inhalt gleich
+                        continue
+                    skills = self._load_file(filepath)
+                except FileNotFoundError:
+                    continue                        # zwischen glob und stat gelöscht
+                except Exception as e:
+                    print(f"[SkillManager] ⚠ {Path(filepath).name}: {e}")
+                    skills = {}
+                if known:
+                    stale.update(known["skills"])
+                self._files[filepath] = {"stamp": stamp, "hash": digest, "skills": skills}
+                changes["changed" if known else "added"].append(Path(filepath).name)
+
+            if not any(changes.values()):
+                return None
+            self._rebuild()
+            self._invalidate()
+            if stale:
+                self.cache.clear(stale)
+
+        for kind, names in changes.items():
+            if names:
+                print(f"[SkillManager] ↻ {kind}: {', '.join(sorted(names))}")
+        return changes
+
+    # ── Datei-Watcher (optional) ──────────────────────────────
+    def start_watcher(self, interval: float = 2.0):
+        """Prüft skills/ im Hintergrund alle `interval` Sekunden auf Änderungen."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._watch_stop.clear()
+
+        def _loop():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"[SkillManager] ⚠ Watcher: {e}")
+
+        self._watcher = threading.Thread(target=_loop, name="skill-watcher", daemon=True)
+        self._watcher.start()
+        print(f"[SkillManager] 👁 Watcher aktiv ({interval}s)")
+
+    def stop_watcher(self):
+        self._watch_stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _build_index(self) -> dict:
+        """BM25-Index über Name und Docstring aller Skills (lazy, pro Version)."""
+        docs = {}
+        for name in self.skills:
+            tokens = _tokenize(name.replace("_", " ")) * 2   # Name zählt doppelt
+            tokens += _tokenize(self.skill_docs.get(name, ""))
+            docs[name] = Counter(tokens)
+        n      = len(docs) or 1
+        avg_dl = sum(sum(c.values()) for c in docs.values()) / n or 1.0
+        df     = Counter(t for c in docs.values() for t in c)
+        idf    = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+        self._index = {"docs": docs, "idf": idf, "avg_dl": avg_dl}
+        return self._index
+
+    def select_relevant_skills(self, query: str, top_k: int = 8) -> list:
+        """
+        Wählt die für `query` relevantesten Skills plus CORE_SKILLS aus.
+        Gibt die Namen in Lade-Reihenfolge zurück. Bei leerer Anfrage, top_k <= 0
+        oder wenigen Skills wird die komplette Liste geliefert.
+        """
+        all_names = list(self.skills)
+        core      = [n for n in CORE_SKILLS if n in self.skills]
+        terms     = _tokenize(query)
+        if top_k <= 0 or not terms or len(all_names) <= top_k + len(core):
+            return all_names
+
+        index  = self._index or self._build_index()
+        scores = {}
+        for name, tf in index["docs"].items():
+            dl    = sum(tf.values())
+            score = 0.0
+            for t in terms:
+                f = tf.get(t)
+                if f:
+                    norm   = f + _BM25_K1 * (1 - _BM25_B + _BM25_B * dl / index["avg_dl"])
+                    score += index["idf"][t] * f * (_BM25_K1 + 1) / norm
+            if score > 0:
+                scores[name] = score
+
+        best   = sorted(scores, key=lambda n: (-scores[n], n))[:top_k]
+        chosen = set(core) | set(best)
+        return [n for n in all_names if n in chosen]
+
+    def _skill_line(self, name: str) -> str:
+        line = self._line_cache.get(name)
+        if line is None:
+            doc  = self.skill_docs.get(name, "Keine Beschreibung")
+            sig  = str(inspect.signature(self.skills[name]))
+            line = self._line_cache[name] = f"- {name}{sig}: {doc}"
+        return line
+
+    def get_skills_description(self, names: list = None) -> str:
+        """
+        Beschreibung der verfügbaren Skills für den System-Prompt.
+        Ohne `names` alle Skills; die Zeilen werden pro Lade-Vorgang nur einmal
+        erzeugt und bis zum nächsten reload() gecacht.
+        """
+        if names is not None:
+            lines = [self._skill_line(n) for n in names if n in self.skills]
+            return "\n".join(lines) if lines else "Keine Skills verfügbar."
+        if self._description_cache is not None:
+            return self._description_cache
         if not self.skills:
-            return "Keine Skills verfügbar."
-        lines = []
-        for name, func in self.skills.items():
-            doc = self.skill_docs.get(name, "Keine Beschreibung")
-            sig = str(inspect.signature(func))
-            lines.append(f"- {name}{sig}: {doc}")
-        return "\n".join(lines)
+            description = "Keine Skills verfügbar."
+        else:
+            description = "\n".join(self._skill_line(n) for n in self.skills)
+        self._description_cache = description
+        return description
 
     def execute(self, skill_name: str, **kwargs):
-        """Führt einen Skill aus."""
+        """
+        Führt einen Skill im begrenzten Executor aus (Timeout laut SKILL_META
+        bzw. SKILL_TIMEOUT). Bei Zeitüberschreitung kommt ein ⏱-Text zurück.
+        """
+        return self.run_skill(skill_name, kwargs)
+
+    def run_skill(self, skill_name: str, kwargs: dict,
+                  cancel_event=None, progress=None, timeout: float = None):
+        """
+        Wie execute(), mit optionalem Abbruch-Event und Fortschritts-Callback
+        (für Hintergrund-Jobs, siehe job_manager.py). `timeout` ersetzt das
+        Standard-Zeitlimit, sofern der Skill kein eigenes in SKILL_META hat.
+        """
         if skill_name not in self.skills:
             return f"❌ Unbekannter Skill: {skill_name}"
+        meta   = self.skill_meta.get(skill_name)
+        if timeout is not None and "timeout" not in (meta or {}):
+            meta = {**(meta or {}), "timeout": timeout}
+        policy = cache_policy(meta)
+        if policy:
+            hit, cached = self.cache.get(skill_name, policy, kwargs)
+            if hit:
+                return cached
         try:
             func   = self.skills[skill_name]
-            result = func(**kwargs)
+            result = self.executor.run(
+                skill_name, func, kwargs,
+                meta         = meta,
+                filepath     = self.loaded_from.get(skill_name),
+                cancel_event = cancel_event,
+                progress     = progress,
+            )
+            if policy:
+                self.cache.put(skill_name, policy, kwargs, result)
+            if (meta or {}).get("invalidates") and not is_failure(result):
+                invalidate(meta["invalidates"])
             return result
         except Exception as e:
             return f"❌ Fehler in Skill '{skill_name}': {e}"
@@ -752,6 +752,15 @@ def dms_passwort_entfernen(passwort: str) -> str:
     return "✅ Passwortschutz entfernt."
 
 
+# OCR + KI pro Dokument: eigener Prozess, damit ein hängender Lauf beendet werden kann.
+# Einsortieren und Löschen ändern das Archiv → gecachte Übersicht verwerfen.
+SKILL_META = {
+    "dms_einsortieren":      {"timeout": 900, "executor": "process",
+                              "invalidates": ["dms_archiv_uebersicht"]},
+    "dms_loeschen":          {"invalidates": ["dms_archiv_uebersicht"]},
+    "dms_archiv_uebersicht": {"cache": {"ttl": 30, "max_entries": 1}},
+}
+
 AVAILABLE_SKILLS = [
     dms_import_scan,
     dms_einsortieren,
@@ -1512,6 +1512,13 @@ if __name__ == "__main__":
     telefon_stoppen()
 
 
+# Ein Telefon, ein SIP-Zustand: nie parallel zu anderen Telefon-Aufrufen
+SKILL_META = {
+    "telefon_starten":  {"serial": True},
+    "telefon_stoppen":  {"serial": True},
+    "skill_ausfuehren": {"serial": True},
+}
+
 AVAILABLE_SKILLS = [
     telefon_starten,
     telefon_stoppen,
@@ -794,6 +794,17 @@ def erp_backup_erstellen(ausgabe_pfad: str = "") -> str:
 # SKILL-REGISTRIERUNG
 # ══════════════════════════════════════════════════════════════════════════
 
+# KPI-Bericht ist teuer (mehrere DB-Abfragen) und ändert sich selten;
+# schreibende Skills und ein neuer Datenbankpfad verwerfen ihn sofort
+SKILL_META = {
+    "erp_kpi_bericht":                  {"cache": {"ttl": 300, "max_entries": 1}},
+    "erp_pfad_setzen":                  {"invalidates": ["erp_kpi_bericht"]},
+    "erp_rechnung_status_setzen":       {"invalidates": ["erp_kpi_bericht"]},
+    "erp_zahlung_buchen":               {"invalidates": ["erp_kpi_bericht"]},
+    "erp_mahnung_erstellen_und_senden": {"invalidates": ["erp_kpi_bericht"]},
+    "erp_mahnlauf_komplett":            {"invalidates": ["erp_kpi_bericht"]},
+}
+
 AVAILABLE_SKILLS = [
     erp_pfad_setzen,
     erp_version_info,
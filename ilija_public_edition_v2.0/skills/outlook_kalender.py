@@ -456,6 +456,14 @@ def outlook_login_einrichten() -> str:
     driver.get("https://outlook.live.com/calendar/")
     return "Browser offen für Login."
 
+# Selenium + feste Wartezeiten → großzügige Zeitlimits (siehe skill_executor.py)
+SKILL_META = {
+    "outlook_kalender_lesen":     {"timeout": 180},
+    "outlook_freie_slots_finden": {"timeout": 180},
+    "outlook_termin_eintragen":   {"timeout": 180},
+    "outlook_termin_loeschen":    {"timeout": 180},
+}
+
 AVAILABLE_SKILLS = [
     outlook_login_einrichten,
     outlook_kalender_lesen,
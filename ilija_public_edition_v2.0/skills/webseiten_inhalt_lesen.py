@@ -267,6 +267,14 @@ def wikipedia_suche(suchbegriff: str, sprache: str = "de") -> str:
         return f"❌ Fehler: {e}"
 
 
+# Lesende Abfragen: Ergebnisse zwischenspeichern (siehe skill_cache.py)
+SKILL_META = {
+    "news_abrufen":    {"cache": {"ttl": 600, "key": ["thema"], "max_entries": 32,
+                                  "no_cache_prefixes": ["🔍 Keine Ergebnisse"]}},
+    "wikipedia_suche": {"cache": {"ttl": 86400, "key": ["suchbegriff", "sprache"],
+                                  "max_entries": 256, "persist": True}},
+}
+
 AVAILABLE_SKILLS = [
     webseite_lesen,
     internet_suche,
@@ -20,9 +20,15 @@ def wetter_offenburg_abfragen() -> str:
             wetter_text = response.text.strip()
             return f"Das aktuelle Wetter: {wetter_text}"
         else:
-            return "Der Wetterdienst ist momentan nicht erreichbar."
+            return "❌ Der Wetterdienst ist momentan nicht erreichbar."
 
     except Exception as e:
-        return f"Fehler beim Abrufen des Wetters: {e}"
+        return f"❌ Fehler beim Abrufen des Wetters: {e}"
+
+# Wetterdaten ändern sich langsam – Workflows fragen oft minütlich.
+# Fehler beginnen mit ❌ und werden deshalb nicht gecacht.
+SKILL_META = {
+    "wetter_offenburg_abfragen": {"cache": {"ttl": 600, "max_entries": 1}},
+}
 
 AVAILABLE_SKILLS = [wetter_offenburg_abfragen]
\ No newline at end of file
@@ -1278,6 +1278,14 @@ def whatsapp_nachricht_senden(kontakt: str, text: str) -> str:
         return f"❌ Fehler: {e}"
 
 
+# Alle teilen sich einen Selenium-Browser → nacheinander ausführen
+SKILL_META = {
+    "whatsapp_autonomer_dialog":  {"serial": True},
+    "whatsapp_nachrichten_lesen": {"serial": True},
+    "whatsapp_nachricht_lesen":   {"serial": True},
+    "whatsapp_nachricht_senden":  {"serial": True},
+}
+
 AVAILABLE_SKILLS = [
     whatsapp_autonomer_dialog,
     whatsapp_listener_stoppen,
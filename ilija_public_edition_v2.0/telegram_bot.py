@@ -16,6 +16,7 @@ from telegram.ext import (
     filters, ContextTypes
 )
 from kernel import Kernel
+from telegram_dispatcher import get_dispatcher
 
 # Voice-Mode State (pro Chat)
 voice_mode_chats: set = set()
@@ -156,7 +157,10 @@ async def cmd_dms_sort(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     with kernel_lock:
         k = get_kernel()
     from skills.dms import dms_einsortieren
+    from skill_cache import invalidate, is_failure
     result = dms_einsortieren(provider=k.provider)
+    if not is_failure(result):
+        invalidate(["dms_archiv_uebersicht"])
     if len(result) > 4000:
         for i in range(0, len(result), 4000):
             await update.message.reply_text(result[i:i+4000])
@@ -534,11 +538,39 @@ async def handle_photo(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
 
 # ── Bot starten ───────────────────────────────────────────────
+async def _run_with_dispatcher(app_bot):
+    """
+    Bot ohne eigenes Polling: der TelegramDispatcher holt die Updates (auch
+    für Workflows im selben Prozess) und reicht jedes an die update_queue weiter.
+    Holt schon ein anderer Prozess ab, kommen sie aus data/telegram/updates.db.
+    """
+    loop       = asyncio.get_running_loop()
+    dispatcher = get_dispatcher(TOKEN)
+
+    def _deliver(update: dict):
+        asyncio.run_coroutine_threadsafe(
+            app_bot.update_queue.put(Update.de_json(update, app_bot.bot)), loop)
+
+    async with app_bot:
+        await app_bot.start()
+        dispatcher.subscribe("bot", _deliver)
+        await loop.run_in_executor(None, dispatcher.start)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            dispatcher.unsubscribe("bot")
+            await app_bot.stop()
+
+
 def main():
     if not TOKEN:
         print("❌ TELEGRAM_BOT_TOKEN nicht gesetzt!")
         return
-    app_bot = Application.builder().token(TOKEN).build()
+    dispatcher = get_dispatcher(TOKEN)
+    builder    = Application.builder().token(TOKEN)
+    if dispatcher.mode != "off":
+        builder = builder.updater(None)     # Updates kommen vom Dispatcher
+    app_bot = builder.build()
 
     # Standard-Befehle
     app_bot.add_handler(CommandHandler("start",        cmd_start))
@@ -564,8 +596,12 @@ def main():
     app_bot.add_handler(MessageHandler(filters.Document.ALL,            handle_document))
     app_bot.add_handler(MessageHandler(filters.PHOTO,                   handle_photo))
 
-    print("[Ilija] Bot läuft...")
-    app_bot.run_polling()
+    if dispatcher.mode == "off":
+        print("[Ilija] Bot läuft...")
+        app_bot.run_polling()
+    else:
+        print("[Ilija] Bot läuft (Updates über den Telegram-Dispatcher)...")
+        asyncio.run(_run_with_dispatcher(app_bot))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,329 @@
+"""
+telegram_dispatcher.py – Zentrale Verteilung von Telegram-Updates
+==================================================================
+Telegram liefert Updates eines Bots nur an einen Abnehmer: wer getUpdates
+aufruft, nimmt sie allen anderen weg. Statt dass jeder Telegram-Node und
+telegram_bot.py selbst pollen, holt ein Dispatcher pro Bot-Token die Updates
+und verteilt sie:
+
+- Postfächer (mailbox) – jeder lesende Telegram-Node hat ein eigenes und
+  bekommt jedes Update; take() entnimmt wie früher getUpdates mit limit
+- Abonnenten (subscribe) – Callbacks je Update, z.B. der Bot oder der
+  Sofort-Start von Workflows
+
+Modus über TELEGRAM_UPDATES:
+  poll     – Hintergrund-Thread mit Long-Polling (Standard)
+  webhook  – Updates kommen über POST /api/telegram/update (feed)
+  off      – kein Hintergrund-Thread; poll_once() bei jedem Lesen wie bisher
+
+Pro Datenverzeichnis darf nur ein Prozess abholen: der Dispatcher sperrt
+last_update_id.json.lock. Hält ein anderer Prozess die Sperre (z.B.
+telegram_bot.py und web_server.py getrennt gestartet), läuft er im Modus
+"follow": kein getUpdates, kein Offset – Postfächer liest er aus der
+gemeinsamen updates.db, seine Abonnenten bedient ein Thread, der alle
+FOLLOW_INTERVAL Sekunden das Postfach FOLLOW_MAILBOX leert.
+
+Der zuletzt abgeholte update_id steht wie bisher in
+data/telegram/last_update_id.json. Noch nicht entnommene Updates und je
+Postfach der zuletzt entnommene update_id liegen in data/telegram/updates.db –
+Telegram liefert abgeholte Updates nicht erneut, ein Neustart verliert so nichts.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+
+OFFSET_FILE     = os.path.join("data", "telegram", "last_update_id.json")
+POLL_TIMEOUT    = 25     # Sekunden Long-Polling je getUpdates
+RETRY_DELAY     = 5      # Sekunden Pause nach einem Fehler
+MAILBOX_SIZE    = 200    # Updates je Postfach, ältere fallen heraus
+UPDATES_DB      = "updates.db"   # neben OFFSET_FILE
+FOLLOW_INTERVAL = 1.0    # Sekunden; Abfrage von updates.db im Modus "follow"
+FOLLOW_MAILBOX  = "_abonnenten"
+
+MODES = ("poll", "webhook", "off")
+
+_locks      = {}     # Pfad der Sperrdatei → offene Datei (hält die Sperre bis Prozessende)
+_locks_lock = threading.Lock()
+
+
+def _lock_file(path: str):
+    """Exklusive, nicht blockierende Dateisperre; None, wenn ein anderer Prozess sie hält."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    f = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _acquire(path: str) -> bool:
+    """Sperre für diesen Prozess holen (einmal je Pfad, danach gehalten)."""
+    path = os.path.abspath(path)
+    with _locks_lock:
+        if path not in _locks:
+            f = _lock_file(path)
+            if f is None:
+                return False
+            _locks[path] = f
+        return True
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS updates (
+    update_id INTEGER PRIMARY KEY,
+    data      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mailboxes (
+    name  TEXT PRIMARY KEY,
+    acked INTEGER NOT NULL
+);
+"""
+
+
+def updates_mode() -> str:
+    mode = os.getenv("TELEGRAM_UPDATES", "poll").strip().lower()
+    return mode if mode in MODES else "poll"
+
+
+class TelegramDispatcher:
+    """Holt Updates eines Bot-Tokens (Long-Polling oder Webhook) und verteilt sie."""
+
+    def __init__(self, token: str, offset_file: str = None, mode: str = None):
+        self.token        = token
+        self.offset_file  = offset_file or OFFSET_FILE
+        self.db_path      = os.path.join(os.path.dirname(self.offset_file), UPDATES_DB)
+        self.mode         = mode or updates_mode()
+        self.owner        = _acquire(self.offset_file + ".lock")
+        self.offset       = self._load_offset()
+        self._conn        = None
+        self._subscribers = {}     # name → callback(update)
+        self._lock        = threading.Lock()
+        self._poll_lock   = threading.Lock()
+        self._thread      = None
+        self._stop        = threading.Event()
+        if not self.owner:
+            print("[Telegram] Ein anderer Prozess holt bereits die Updates ab – "
+                  "Modus \"follow\" (nur data/telegram/updates.db).")
+            self.mode = "follow"
+
+    # ── Offset ────────────────────────────────────────────────
+    def _load_offset(self) -> int:
+        try:
+            with open(self.offset_file, "r", encoding="utf-8") as f:
+                return int(json.load(f).get("last_update_id", 0))
+        except (OSError, ValueError, TypeError):
+            return 0
+
+    def _save_offset(self):
+        if not self.owner:
+            return                          # der abholende Prozess führt den Offset
+        os.makedirs(os.path.dirname(self.offset_file), exist_ok=True)
+        with open(self.offset_file, "w", encoding="utf-8") as f:
+            json.dump({"last_update_id": self.offset}, f)
+
+    # ── Speicher ──────────────────────────────────────────────
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _prune(self, db):
+        """Entfernt Updates, die alle Postfächer entnommen haben, und alles über MAILBOX_SIZE."""
+        db.execute("DELETE FROM updates WHERE update_id <= "
+                   "COALESCE((SELECT MIN(acked) FROM mailboxes), ?)", (self.offset,))
+        db.execute("DELETE FROM updates WHERE update_id NOT IN "
+                   "(SELECT update_id FROM updates ORDER BY update_id DESC LIMIT ?)",
+                   (MAILBOX_SIZE,))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ── Abnehmer ──────────────────────────────────────────────
+    def _register(self, db, name: str):
+        db.execute("INSERT OR IGNORE INTO mailboxes (name, acked) VALUES (?, "
+                   "MAX(?, COALESCE((SELECT MAX(update_id) FROM updates), 0)))",
+                   (name, self.offset))
+
+    def mailbox(self, name: str):
+        """
+        Postfach anlegen (falls nötig); ab jetzt landet jedes Update darin.
+        Postfächer bleiben über Neustarts erhalten.
+        """
+        with self._lock:
+            db = self._db()
+            self._register(db, name)
+            db.commit()
+
+    def take(self, name: str, limit: int) -> list:
+        """
+        Bis zu `limit` Updates aus dem Postfach entnehmen (älteste zuerst);
+        erst damit gelten sie für dieses Postfach als zugestellt.
+        """
+        with self._lock:
+            db = self._db()
+            self._register(db, name)
+            acked = db.execute("SELECT acked FROM mailboxes WHERE name = ?",
+                               (name,)).fetchone()[0]
+            rows  = db.execute("SELECT update_id, data FROM updates WHERE update_id > ?"
+                               " ORDER BY update_id DESC LIMIT ?",
+                               (acked, MAILBOX_SIZE)).fetchall()
+            rows  = rows[::-1][:max(0, limit)]
+            if rows:
+                db.execute("UPDATE mailboxes SET acked = ? WHERE name = ?",
+                           (rows[-1][0], name))
+            db.commit()
+        return [json.loads(data) for _, data in rows]
+
+    def subscribe(self, name: str, callback):
+        with self._lock:
+            self._subscribers[name] = callback
+
+    def unsubscribe(self, name: str):
+        with self._lock:
+            self._subscribers.pop(name, None)
+
+    # ── Verteilen ─────────────────────────────────────────────
+    def feed(self, updates: list) -> int:
+        """
+        Verteilt neue Updates (bereits gesehene update_ids werden übersprungen):
+        erst in alle Postfächer, dann an die Abonnenten. Gibt die Anzahl zurück.
+        Der Offset wird erst gespeichert, wenn die Updates in der Datenbank sind.
+        """
+        with self._lock:
+            fresh = [u for u in updates if u.get("update_id", 0) > self.offset]
+            if not fresh:
+                return 0
+            db = self._db()
+            db.executemany("INSERT OR IGNORE INTO updates (update_id, data) VALUES (?, ?)",
+                           [(u["update_id"], json.dumps(u, ensure_ascii=False)) for u in fresh])
+            self.offset = max(u["update_id"] for u in fresh)
+            self._prune(db)
+            db.commit()
+            self._save_offset()
+        self._notify(fresh)
+        return len(fresh)
+
+    def _notify(self, updates: list):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for update in updates:
+            for name, callback in subscribers:
+                try:
+                    callback(update)
+                except Exception as e:
+                    print(f"[Telegram] Abonnent '{name}': {e}")
+
+    def _call(self, method: str, params: dict, timeout: float):
+        from http_cache import get_http_client
+        resp = get_http_client().request(
+            "POST", f"https://api.telegram.org/bot{self.token}/{method}",
+            json=params, timeout=timeout)
+        data = resp.json()
+        if not data.get("ok"):
+            raise RuntimeError(data.get("description", f"HTTP {resp.status_code}"))
+        return data.get("result")
+
+    def poll_once(self, timeout: int = 0, limit: int = 100) -> int:
+        """
+        Ein getUpdates-Aufruf (timeout > 0 = Long-Polling); verteilt das Ergebnis.
+        Ohne Sperre (Modus "follow") nie – das gäbe 409 Conflict mit dem Abholer.
+        """
+        if not self.owner:
+            return 0
+        with self._poll_lock:
+            updates = self._call("getUpdates",
+                                 {"offset": self.offset + 1, "timeout": timeout,
+                                  "limit": limit},
+                                 timeout=timeout + 10)
+            return self.feed(updates or [])
+
+    # ── Hintergrund-Thread ────────────────────────────────────
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Startet im Modus "poll" den Long-Polling-Thread (vorher wird einmal
+        sofort abgefragt, damit bereits wartende Updates gleich verteilt sind),
+        im Modus "follow" den Thread für die Abonnenten.
+        """
+        if self.mode not in ("poll", "follow"):
+            return
+        with self._lock:
+            if self._thread is not None and not self._stop.is_set():
+                return                      # läuft bereits bzw. startet gerade
+            self._stop   = threading.Event()
+            target       = self._loop if self.mode == "poll" else self._follow
+            self._thread = threading.Thread(target=target, args=(self._stop,),
+                                            name="telegram-dispatcher", daemon=True)
+        if self.mode == "poll":
+            try:
+                self.poll_once(0)
+            except Exception as e:
+                print(f"[Telegram] Erster Abruf fehlgeschlagen: {e}")
+        else:
+            self.mailbox(FOLLOW_MAILBOX)    # ab jetzt bleibt jedes Update für die Abonnenten
+        self._thread.start()
+
+    def _loop(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                self.poll_once(POLL_TIMEOUT)
+            except Exception as e:
+                print(f"[Telegram] getUpdates: {e}")
+                stop.wait(RETRY_DELAY)
+
+    def _follow(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                updates = self.take(FOLLOW_MAILBOX, MAILBOX_SIZE)
+            except Exception as e:
+                print(f"[Telegram] updates.db: {e}")
+                updates = []
+            self._notify(updates)
+            if not updates:
+                stop.wait(FOLLOW_INTERVAL)
+
+    def stop(self):
+        self._stop.set()
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_dispatcher(token: str) -> TelegramDispatcher:
+    """Der Dispatcher zum Bot-Token (einer pro Token und Prozess)."""
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(token)
+        if dispatcher is None:
+            dispatcher = _dispatchers[token] = TelegramDispatcher(token)
+        return dispatcher
+
+
+def default_token() -> str:
+    """Bot-Token aus data/telegram/telegram_config.json, sonst TELEGRAM_BOT_TOKEN."""
+    try:
+        with open(os.path.join("data", "telegram", "telegram_config.json"),
+                  "r", encoding="utf-8") as f:
+            token = json.load(f).get("token", "").strip()
+    except (OSError, ValueError, AttributeError):
+        token = ""
+    return token or os.getenv("TELEGRAM_BOT_TOKEN", "").strip()
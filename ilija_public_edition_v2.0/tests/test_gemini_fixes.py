@@ -183,22 +183,20 @@ class TestWhatsAppMemoryLimit:
 class TestSchedulerFireAndForget:
     """Scheduler-Loop darf nicht durch lange Workflows blockiert werden."""
 
-    def test_schedule_should_fire_unveraendert(self):
-        """_schedule_should_fire() Logik bleibt nach dem Refactoring korrekt."""
+    def test_next_fire_time_unveraendert(self):
+        """_next_fire_time() Logik bleibt nach dem Refactoring korrekt."""
         from datetime import datetime, timedelta
-        from workflow_routes import _schedule_should_fire
+        from workflow_routes import _next_fire_time
 
-        # Abgelaufenes Intervall → feuern
-        last = datetime.now() - timedelta(minutes=6)
-        cfg  = {"interval_type": "interval", "minuten": 5,
-                "_last_run": last.isoformat()}
-        assert _schedule_should_fire(cfg, datetime.now()) is True
+        # Abgelaufenes Intervall → sofort feuern
+        now  = datetime.now()
+        last = now - timedelta(minutes=6)
+        cfg  = {"interval_type": "interval", "minuten": 5}
+        assert _next_fire_time(cfg, now, last) <= now
 
-        # Noch nicht abgelaufen → nicht feuern
-        last2 = datetime.now() - timedelta(seconds=30)
-        cfg2  = {"interval_type": "interval", "minuten": 5,
-                 "_last_run": last2.isoformat()}
-        assert _schedule_should_fire(cfg2, datetime.now()) is False
+        # Noch nicht abgelaufen → erst nach Ablauf
+        last2 = now - timedelta(seconds=30)
+        assert _next_fire_time(cfg, now, last2) == last2 + timedelta(minutes=5)
 
     def test_thread_wird_als_daemon_gestartet(self):
         """Fire-and-Forget Threads müssen als Daemon laufen (kein Prozess-Hang beim Beenden)."""
@@ -214,7 +212,7 @@ class TestSchedulerFireAndForget:
         import workflow_routes as wr
         # Der Scheduler verwendet _sched_threading.Thread mit daemon=True
         # Dies ist im Quellcode verifiziert — hier prüfen wir nur die Funktion
-        assert hasattr(wr, "_schedule_should_fire")
+        assert hasattr(wr, "_next_fire_time")
         assert hasattr(wr, "_schedules_lock")
 
 
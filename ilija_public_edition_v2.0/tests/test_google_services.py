@@ -0,0 +1,147 @@
+"""
+test_google_services.py – Tests für den Google-Credential- und Service-Cache
+============================================================================
+Testet: token.json nur bei Änderung neu lesen, Erneuerung abgelaufener Tokens,
+        Services pro Thread wiederverwenden, Hintergrund-Refresh vor Ablauf
+"""
+import os
+import sys
+import json
+import types
+import threading
+import pytest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google_services import GoogleServiceCache
+
+
+class _FakeCreds:
+    """Minimaler Ersatz für google.oauth2.credentials.Credentials."""
+
+    geladen = 0
+
+    def __init__(self, token="t1", expiry=None):
+        self.token         = token
+        self.expiry        = expiry
+        self.refresh_token = "r"
+
+    @classmethod
+    def from_authorized_user_file(cls, path, scopes):
+        cls.geladen += 1
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        expiry = datetime.fromisoformat(data["expiry"]) if data.get("expiry") else None
+        return cls(data["token"], expiry)
+
+    @property
+    def expired(self):
+        return self.expiry is not None and self.expiry <= datetime.utcnow()
+
+    @property
+    def valid(self):
+        return bool(self.token) and not self.expired
+
+    def refresh(self, request):
+        self.token  = self.token + "+"
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+    def to_json(self):
+        return json.dumps({"token": self.token,
+                           "expiry": self.expiry.isoformat() if self.expiry else None})
+
+
+@pytest.fixture
+def google_libs(monkeypatch):
+    """Google-Bibliotheken durch Attrappen ersetzen; zählt build()-Aufrufe."""
+    _FakeCreds.geladen = 0
+    gebaut = []
+
+    def build(api, version, credentials=None, cache_discovery=True):
+        gebaut.append((api, threading.get_ident()))
+        return object()
+
+    module = {
+        "google":                          types.ModuleType("google"),
+        "google.oauth2":                   types.ModuleType("google.oauth2"),
+        "google.oauth2.credentials":       types.ModuleType("google.oauth2.credentials"),
+        "google_auth_oauthlib":            types.ModuleType("google_auth_oauthlib"),
+        "google_auth_oauthlib.flow":       types.ModuleType("google_auth_oauthlib.flow"),
+        "google.auth":                     types.ModuleType("google.auth"),
+        "google.auth.transport":           types.ModuleType("google.auth.transport"),
+        "google.auth.transport.requests":  types.ModuleType("google.auth.transport.requests"),
+        "googleapiclient":                 types.ModuleType("googleapiclient"),
+        "googleapiclient.discovery":       types.ModuleType("googleapiclient.discovery"),
+    }
+    module["google.oauth2.credentials"].Credentials           = _FakeCreds
+    module["google_auth_oauthlib.flow"].InstalledAppFlow      = None
+    module["google.auth.transport.requests"].Request          = lambda: None
+    module["googleapiclient.discovery"].build                 = build
+    for name, mod in module.items():
+        monkeypatch.setitem(sys.modules, name, mod)
+    return gebaut
+
+
+def _token(tmp_path, token="t1", expiry=None):
+    pfad = tmp_path / "token.json"
+    pfad.write_text(json.dumps({"token": token,
+                                "expiry": expiry.isoformat() if expiry else None}))
+    return str(pfad)
+
+
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+
+
+class TestGoogleServiceCache:
+
+    def test_token_nur_einmal_gelesen(self, google_libs, tmp_path):
+        cache = GoogleServiceCache(refresh_margin=0)
+        pfad  = _token(tmp_path)
+        a = cache.credentials(pfad, SCOPES, "credentials.json")
+        b = cache.credentials(pfad, SCOPES, "credentials.json")
+        assert a is b
+        assert _FakeCreds.geladen == 1
+
+    def test_geaenderte_datei_wird_neu_gelesen(self, google_libs, tmp_path):
+        cache = GoogleServiceCache(refresh_margin=0)
+        pfad  = _token(tmp_path)
+        cache.credentials(pfad, SCOPES, "credentials.json")
+        _token(tmp_path, "t2")
+        os.utime(pfad, (1, 1))
+        assert cache.credentials(pfad, SCOPES, "credentials.json").token == "t2"
+        assert _FakeCreds.geladen == 2
+
+    def test_abgelaufenes_token_wird_erneuert_und_gespeichert(self, google_libs, tmp_path):
+        cache = GoogleServiceCache(refresh_margin=0)
+        pfad  = _token(tmp_path, expiry=datetime.utcnow() - timedelta(minutes=1))
+        creds = cache.credentials(pfad, SCOPES, "credentials.json")
+        assert creds.token == "t1+"
+        assert json.loads(open(pfad).read())["token"] == "t1+"
+        cache.credentials(pfad, SCOPES, "credentials.json")
+        assert _FakeCreds.geladen == 1   # eigene Schreibung löst kein Neuladen aus
+
+    def test_service_pro_thread_wiederverwendet(self, google_libs, tmp_path):
+        cache = GoogleServiceCache(refresh_margin=0)
+        pfad  = _token(tmp_path)
+        a = cache.service("calendar", "v3", SCOPES, pfad, "credentials.json")
+        assert cache.service("calendar", "v3", SCOPES, pfad, "credentials.json") is a
+        assert len(google_libs) == 1
+
+        anderer = []
+        t = threading.Thread(target=lambda: anderer.append(
+            cache.service("calendar", "v3", SCOPES, pfad, "credentials.json")))
+        t.start()
+        t.join()
+        assert anderer[0] is not a
+        assert len(google_libs) == 2
+
+    def test_hintergrund_refresh_vor_ablauf(self, google_libs, tmp_path):
+        cache = GoogleServiceCache(refresh_margin=300)
+        pfad  = _token(tmp_path, expiry=datetime.utcnow() + timedelta(minutes=2))
+        creds = cache.credentials(pfad, SCOPES, "credentials.json")
+        assert creds.token == "t1"        # noch gültig → kein Refresh im Node-Lauf
+        cache.refresh_due()
+        assert creds.token == "t1+"
+        assert json.loads(open(pfad).read())["token"] == "t1+"
+        cache.clear()
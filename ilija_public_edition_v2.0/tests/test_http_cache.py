@@ -0,0 +1,181 @@
+"""
+test_http_cache.py – Tests für den gemeinsamen HTTP-Client der Workflow-Nodes
+=============================================================================
+Testet: Revalidierung per ETag (304 aus dem Cache, gleicher Text wie bei
+        200), Größengrenze mit Verdrängung, gesehene RSS-GUIDs, http- und rss-Node im Modus
+        "nur neue Einträge" gegen einen lokalen Testserver
+"""
+import os
+import sys
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("requests")
+
+import http_cache
+from http_cache import HttpClient
+from helpers import MockKernel, make_node
+
+
+def _feed(*guids):
+    items = "".join(f"<item><title>Artikel {g}</title><link>https://x/{g}</link>"
+                    f"<guid>{g}</guid></item>" for g in guids)
+    return f"<rss><channel><title>Testfeed</title>{items}</channel></rss>".encode()
+
+
+@pytest.fixture
+def server():
+    """Lokaler Server: /feed liefert state["body"] mit ETag, zählt volle Antworten."""
+    state = {"body": _feed("a", "b"), "voll": 0, "anfragen": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["anfragen"] += 1
+            etag = f'"{hash(state["body"])}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            state["voll"] += 1
+            body  = state["body"] if self.path == "/feed" else b"x" * 600
+            ctype = "application/xml; charset=utf-8"
+            if self.path == "/text":
+                body, ctype = "Grüße".encode("latin-1"), "text/plain"
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}", state
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    c = HttpClient(path=str(tmp_path / "http.db"), max_bytes=1000)
+    monkeypatch.setattr(http_cache, "_client", c)
+    yield c
+    c.close()
+
+
+# ── HttpClient ────────────────────────────────────────────────────────────────
+
+class TestHttpClient:
+
+    def test_revalidierung_mit_etag(self, client, server):
+        url, state = server
+        erste  = client.get(url + "/feed")
+        zweite = client.get(url + "/feed")
+        assert not erste.from_cache and zweite.from_cache
+        assert zweite.content == erste.content
+        assert state["voll"] == 1 and state["anfragen"] == 2
+
+        state["body"] = _feed("a", "b", "c")
+        dritte = client.get(url + "/feed")
+        assert not dritte.from_cache and b"<guid>c</guid>" in dritte.content
+
+    def test_304_liefert_denselben_text(self, client, server):
+        url, _ = server
+        erste  = client.get(url + "/text")      # ohne charset → requests rät ISO-8859-1
+        zweite = client.get(url + "/text")
+        assert zweite.from_cache
+        assert zweite.text == erste.text == "Grüße"
+
+    def test_groessengrenze_verdraengt_aelteste(self, client, server):
+        url, state = server
+        client.get(url + "/gross1")
+        client.get(url + "/gross2")            # 2 × 600 Byte > 1000 → gross1 fliegt
+        client.get(url + "/gross2")
+        assert state["voll"] == 2
+        client.get(url + "/gross1")
+        assert state["voll"] == 3
+
+    def test_cache_aus(self, tmp_path, server):
+        url, state = server
+        c = HttpClient(path=str(tmp_path / "aus.db"), max_bytes=0)
+        c.get(url + "/feed")
+        c.get(url + "/feed")
+        assert state["voll"] == 2
+        assert not os.path.exists(tmp_path / "aus.db")
+        c.close()
+
+    def test_gesehene_guids(self, client):
+        assert client.unseen("feed", ["a", "b"]) == {"a", "b"}
+        assert client.unseen("feed", ["a", "b"]) == {"a", "b"}      # nur lesen
+        client.mark_seen("feed", ["a", "b"])
+        assert client.unseen("feed", ["a", "b", "c"]) == {"c"}
+        assert client.unseen("anderer", ["a"]) == {"a"}
+        assert client.has_seen("feed") and not client.has_seen("anderer")
+
+
+# ── Nodes ─────────────────────────────────────────────────────────────────────
+
+class TestNodes:
+
+    def test_rss_nur_neue(self, client, server):
+        from workflow_routes import run_workflow
+        url, state = server
+        wf = {"nodes": [make_node("r", "rss", {"url": url + "/feed", "nur_neue": "true"})],
+              "connections": []}
+        erster = run_workflow(wf, kernel=MockKernel())["output"]
+        assert "2 neue Einträge" in erster and "Artikel a" in erster
+
+        assert run_workflow(wf, kernel=MockKernel())["output"].startswith("📭 Keine neuen")
+        assert state["voll"] == 1
+
+        state["body"] = _feed("c", "a", "b")
+        dritter = run_workflow(wf, kernel=MockKernel())["output"]
+        assert "1 neue Einträge" in dritter and "Artikel c" in dritter
+        assert "Artikel a" not in dritter
+
+    def test_erster_lauf_merkt_ganzen_feed(self, client, server):
+        from workflow_routes import run_workflow
+        url, state = server
+        state["body"] = _feed("a", "b", "c", "d", "e")
+        wf = {"nodes": [make_node("r", "rss", {"url": url + "/feed", "nur_neue": "true",
+                                               "anzahl": 2})],
+              "connections": []}
+        erster = run_workflow(wf, kernel=MockKernel())["output"]
+        assert "Artikel a" in erster and "Artikel b" in erster and "Artikel c" not in erster
+        assert run_workflow(wf, kernel=MockKernel())["output"].startswith("📭 Keine neuen")
+
+    def test_rss_mehr_neue_als_anzahl(self, client, server):
+        from workflow_routes import run_workflow
+        url, state = server
+        wf = {"nodes": [make_node("r", "rss", {"url": url + "/feed", "nur_neue": "true",
+                                               "anzahl": 2})],
+              "connections": []}
+        run_workflow(wf, kernel=MockKernel())                # merkt a, b
+        state["body"] = _feed("c", "d", "e", "a", "b")
+        laeufe = [run_workflow(wf, kernel=MockKernel())["output"] for _ in range(4)]
+        assert "Artikel c" in laeufe[0] and "Artikel d" in laeufe[0]
+        assert "1 neue Einträge" in laeufe[1] and "Artikel e" in laeufe[1]
+        assert laeufe[2].startswith("📭 Keine neuen")
+
+    def test_rss_alle(self, client, server):
+        from workflow_routes import run_workflow
+        url, _ = server
+        wf = {"nodes": [make_node("r", "rss", {"url": url + "/feed", "anzahl": 1})],
+              "connections": []}
+        for _ in range(2):
+            out = run_workflow(wf, kernel=MockKernel())["output"]
+            assert out.startswith("📡 Testfeed — 1 Einträge")
+
+    def test_http_get_ueber_cache(self, client, server):
+        from workflow_routes import run_workflow
+        url, state = server
+        wf = {"nodes": [make_node("h", "http", {"url": url + "/feed"})], "connections": []}
+        assert "Artikel a" in run_workflow(wf, kernel=MockKernel())["output"]
+        assert "Artikel a" in run_workflow(wf, kernel=MockKernel())["output"]
+        assert state["voll"] == 1
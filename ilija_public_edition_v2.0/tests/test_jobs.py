@@ -0,0 +1,309 @@
+"""
+test_jobs.py – Tests für Hintergrund-Jobs (JobManager + /api/jobs)
+==================================================================
+Testet: Sofortige Job-ID, Fortschritt/Ausgaben, Ereignisse, Ergebnis, Fehler,
+        Abbruch, Aufbewahrungsfrist, Polling- und SSE-Routen, async
+        /api/skill/execute, Workflow-Läufe als Job mit Node-Ereignissen und Abbruch
+"""
+import os
+import sys
+import json
+import time
+import textwrap
+import threading
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("flask")
+
+import job_manager
+import skill_manager
+from job_manager import JobManager
+from skill_manager import SkillManager
+from helpers import make_node, make_connection
+
+
+def _warte(job, timeout=3):
+    ende = time.time() + timeout
+    while not job.is_finished and time.time() < ende:
+        time.sleep(0.01)
+    return job
+
+
+@pytest.fixture
+def jm():
+    m = JobManager(max_workers=2, retention=3600, max_finished=50)
+    yield m
+    m.shutdown()
+
+
+# ── JobManager ────────────────────────────────────────────────────────────────
+
+class TestJobManager:
+
+    def test_submit_kehrt_sofort_zurueck(self, jm):
+        freigabe = threading.Event()
+        t0  = time.time()
+        job = jm.submit("lang", lambda j: freigabe.wait(2) and "fertig")
+        assert time.time() - t0 < 0.5
+        assert job.status in ("queued", "running")
+        freigabe.set()
+        assert _warte(job).status == "done"
+        assert job.result == "fertig"
+        assert job.progress == 1.0
+
+    def test_fortschritt_und_ausgaben(self, jm):
+        def arbeit(job):
+            job.report("Schritt 1", 0.5)
+            job.report("Schritt 2")
+            return 42
+
+        job = _warte(jm.submit("schritte", arbeit))
+        d = job.to_dict()
+        assert d["output"] == ["Schritt 1", "Schritt 2"]
+        assert job.to_dict(since=1)["output"] == ["Schritt 2"]
+        assert d["result"] == 42
+
+    def test_ereignisse(self, jm):
+        def arbeit(job):
+            job.emit("node_started", {"nid": "a"})
+            job.emit("node_finished", {"nid": "a", "status": "success"})
+
+        job = _warte(jm.submit("ereignisse", arbeit))
+        assert [e["event"] for e in job.events_since(0)] == ["node_started", "node_finished"]
+        assert job.events_since(1) == [{"event": "node_finished", "nid": "a", "status": "success"}]
+        assert job.to_dict()["event_count"] == 2
+
+    def test_fehler(self, jm):
+        def kaputt(job):
+            raise RuntimeError("kaputt")
+        job = _warte(jm.submit("kaputt", kaputt))
+        assert job.status == "error"
+        assert job.error == "kaputt"
+
+    def test_abbruch_laufender_job(self, jm):
+        def lang(job):
+            job.cancel_event.wait(5)
+            return "abgebrochen"
+
+        job = jm.submit("lang", lang)
+        while job.status != "running":
+            time.sleep(0.01)
+        assert jm.cancel(job.id)
+        assert _warte(job).status == "cancelled"
+        assert jm.cancel(job.id) is False
+
+    def test_abbruch_wartender_job(self):
+        jm = JobManager(max_workers=1)
+        try:
+            sperre = threading.Event()
+            jm.submit("blockiert", lambda j: sperre.wait(2))
+            wartend = jm.submit("wartet", lambda j: "nie")
+            assert jm.cancel(wartend.id)
+            assert wartend.status == "cancelled"
+            sperre.set()
+        finally:
+            jm.shutdown()
+
+    def test_aufbewahrung(self):
+        jm = JobManager(max_workers=1, retention=0, max_finished=50)
+        try:
+            job = _warte(jm.submit("kurz", lambda j: 1))
+            time.sleep(0.01)
+            jm.list_jobs()
+            assert jm.get(job.id) is None
+        finally:
+            jm.shutdown()
+
+    def test_hoechstzahl_fertiger_jobs(self):
+        jm = JobManager(max_workers=1, retention=3600, max_finished=2)
+        try:
+            jobs = [_warte(jm.submit(f"j{i}", lambda j: 1)) for i in range(4)]
+            jm.list_jobs()
+            assert [jm.get(j.id) is not None for j in jobs] == [False, False, True, True]
+        finally:
+            jm.shutdown()
+
+
+# ── Skill-Jobs ────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def skills_dir(tmp_path, monkeypatch):
+    d = tmp_path / "skills"
+    d.mkdir()
+    (d / "lang.py").write_text(textwrap.dedent('''
+        def lang_laufen(schritte: int = 3, progress=None, cancel_event=None):
+            """Simuliert einen langen Skill mit Fortschritt."""
+            schritte = int(schritte)
+            for i in range(schritte):
+                if cancel_event is not None and cancel_event.wait(0.05):
+                    return "gestoppt"
+                if progress:
+                    progress(f"Schritt {i + 1}/{schritte}", (i + 1) / schritte)
+            return f"{schritte} Schritte erledigt"
+
+        AVAILABLE_SKILLS = [lang_laufen]
+    '''), encoding="utf-8")
+    monkeypatch.setattr(skill_manager, "SKILLS_DIR", str(d))
+    return d
+
+
+class TestSkillJobs:
+
+    def test_skill_meldet_fortschritt(self, jm, skills_dir):
+        job = _warte(jm.submit_skill(SkillManager(), "lang_laufen", {"schritte": 3}))
+        assert job.status == "done"
+        assert job.result == "3 Schritte erledigt"
+        assert job.output == ["Schritt 1/3", "Schritt 2/3", "Schritt 3/3"]
+
+    def test_skill_abbruch(self, jm, skills_dir):
+        job = jm.submit_skill(SkillManager(), "lang_laufen", {"schritte": 200})
+        while not job.output:
+            time.sleep(0.01)
+        jm.cancel(job.id)
+        assert _warte(job).status == "cancelled"
+
+
+# ── Routen ────────────────────────────────────────────────────────────────────
+
+class _Kernel:
+    def __init__(self):
+        self.manager = SkillManager()
+
+
+@pytest.fixture
+def client(skills_dir, monkeypatch):
+    from flask import Flask
+    from job_routes import register_job_routes
+    jm = JobManager(max_workers=2)
+    monkeypatch.setattr(job_manager, "_job_manager", jm)
+    app    = Flask(__name__)
+    kernel = _Kernel()
+    lock   = threading.RLock()
+    register_job_routes(app, lambda: kernel, lock)
+    with patch("workflow_routes._start_scheduler"):
+        from workflow_routes import register_workflow_routes
+        register_workflow_routes(app, lambda: kernel, lock)
+    app.config["TESTING"] = True
+    yield app.test_client()
+    jm.shutdown()
+
+
+class TestJobRouten:
+
+    def test_submit_und_polling(self, client):
+        r = client.post("/api/jobs", json={"skill": "lang_laufen", "params": {"schritte": 2}})
+        assert r.status_code == 202
+        job_id = r.get_json()["job_id"]
+        ende = time.time() + 3
+        while time.time() < ende:
+            d = client.get(f"/api/jobs/{job_id}").get_json()
+            if d["status"] == "done":
+                break
+            time.sleep(0.02)
+        assert d["result"] == "2 Schritte erledigt"
+        assert client.get(f"/api/jobs/{job_id}?since=1").get_json()["output"] == ["Schritt 2/2"]
+        assert any(j["id"] == job_id for j in client.get("/api/jobs").get_json()["jobs"])
+
+    def test_unbekannter_skill(self, client):
+        r = client.post("/api/jobs", json={"skill": "gibtsnicht"})
+        assert r.status_code == 404
+
+    def test_unbekannter_job(self, client):
+        assert client.get("/api/jobs/gibtsnicht").status_code == 404
+        assert client.post("/api/jobs/gibtsnicht/cancel").status_code == 404
+
+    def test_sse_stream(self, client):
+        job_id = client.post("/api/jobs", json={"skill": "lang_laufen"}).get_json()["job_id"]
+        body   = client.get(f"/api/jobs/{job_id}/stream").get_data(as_text=True)
+        events = [b for b in body.split("\n\n") if b.startswith("event:")]
+        assert events[-1].startswith("event: done")
+        final  = json.loads(events[-1].split("data: ", 1)[1])
+        assert final["status"] == "done"
+        ausgaben = [o for e in events for o in json.loads(e.split("data: ", 1)[1])["output"]]
+        assert ausgaben == ["Schritt 1/3", "Schritt 2/3", "Schritt 3/3"]
+
+    def test_skill_execute_async(self, client):
+        r = client.post("/api/skill/execute",
+                        json={"skill": "lang_laufen", "params": {"schritte": 1}, "async": True})
+        assert r.status_code == 202
+        assert r.get_json()["stream_url"].endswith("/stream")
+
+
+# ── Workflow-Läufe als Job ────────────────────────────────────────────────────
+
+def _sse(body: str) -> list:
+    """SSE-Text → [(ereignis, daten), ...]"""
+    events = []
+    for block in body.split("\n\n"):
+        if block.startswith("event:"):
+            kind, data = block.split("\n", 1)
+            events.append((kind[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def warte_node(monkeypatch):
+    """Node-Typ "warten" blockiert, bis freigabe gesetzt ist."""
+    import workflow_routes
+    freigabe = threading.Event()
+    gestartet = threading.Event()
+
+    class WarteNode(workflow_routes.NodeHandler):
+        def run(self, ctx, config):
+            gestartet.set()
+            freigabe.wait(3)
+            return "gewartet"
+
+    monkeypatch.setitem(workflow_routes.NODE_HANDLERS, "warten", WarteNode())
+    monkeypatch.setattr(workflow_routes, "_plan_cache", workflow_routes.OrderedDict())
+    yield freigabe, gestartet
+    freigabe.set()
+
+
+def _workflow(*typen):
+    nodes = [make_node(f"n{i}", t, {"value": f"wert{i}"}) for i, t in enumerate(typen)]
+    conns = [make_connection(f"n{i}", f"n{i + 1}") for i in range(len(typen) - 1)]
+    return {"nodes": nodes, "connections": conns}
+
+
+class TestWorkflowJobs:
+
+    def test_async_lauf_streamt_node_ereignisse(self, client):
+        r = client.post("/api/workflow/execute", json={**_workflow("set", "set"), "async": True})
+        assert r.status_code == 202
+        info   = r.get_json()
+        events = _sse(client.get(info["stream_url"]).get_data(as_text=True))
+        nodes  = [(k, d["nid"]) for k, d in events if k.startswith("node_")]
+        assert nodes == [("node_started", "n0"), ("node_finished", "n0"),
+                         ("node_started", "n1"), ("node_finished", "n1")]
+        fertig = [d for k, d in events if k == "node_finished"]
+        assert fertig[1]["output"] == "wert1"
+        assert fertig[1]["duration"] >= 0
+        kind, final = events[-1]
+        assert kind == "done" and final["status"] == "done"
+        assert final["result"]["output"] == "wert1"
+
+    def test_abbruch_zwischen_nodes(self, client, warte_node):
+        freigabe, gestartet = warte_node
+        info = client.post("/api/workflow/execute",
+                           json={**_workflow("warten", "set"), "async": True}).get_json()
+        assert gestartet.wait(3)
+        assert client.post(info["cancel_url"]).status_code == 200
+        freigabe.set()
+        final = _sse(client.get(info["stream_url"]).get_data(as_text=True))[-1][1]
+        assert final["status"] == "cancelled"
+        assert final["result"]["cancelled"] is True
+        assert final["result"]["results"]["n0"] == "gewartet"
+        assert "n1" not in final["result"]["results"]
+
+    def test_ungueltiger_workflow_sofort_400(self, client):
+        r = client.post("/api/workflow/execute", json={"nodes": [], "async": True})
+        assert r.status_code == 400
+
+    def test_synchroner_lauf_unveraendert(self, client):
+        r = client.post("/api/workflow/execute", json=_workflow("set"))
+        assert r.status_code == 200
+        assert r.get_json()["output"] == "wert0"
@@ -0,0 +1,181 @@
+"""
+test_memory_store.py – Tests für das Gesprächsgedächtnis (MemoryStore)
+======================================================================
+Testet: Runden anhängen und Fenster lesen, Aufbewahrung je Schlüssel,
+        Zusammenfassungen, Übernahme der alten JSON-Dateien, parallele
+        Schreiber ohne Verluste, gebündelte Hintergrund-Zusammenfassung
+        (SummaryQueue) ohne Verlust bei Fehlertexten, memory_window- und
+        memory_summary-Node im Workflow
+"""
+import os
+import sys
+import json
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import memory_store
+from memory_store import MemoryStore, SummaryQueue
+from helpers import MockKernel, make_node, make_connection
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = MemoryStore(path=str(tmp_path / "memory.db"), keep=6,
+                    legacy_dir=str(tmp_path / "memory"))
+    yield s
+    s.close()
+
+
+class TestMemoryStore:
+
+    def test_fenster_aelteste_zuerst(self, store):
+        store.append("k", "Frage 1", "Antwort 1")
+        store.append("k", "Frage 2", "Antwort 2")
+        store.append("anders", "x", "y")
+        fenster = store.window("k", 1)
+        assert [(m["role"], m["content"]) for m in fenster] == [
+            ("user", "Frage 2"), ("assistant", "Antwort 2")]
+        assert len(store.window("k", 10)) == 4
+        assert store.stats("k")["count"] == 2
+
+    def test_aufbewahrung_je_schluessel(self, store):
+        for i in range(5):
+            store.append("k", f"F{i}", f"A{i}")
+        store.append("anders", "x", "y")
+        inhalte = [m["content"] for m in store.window("k", 10)]
+        assert inhalte == ["F2", "A2", "F3", "A3", "F4", "A4"]
+        assert store.stats("anders")["count"] == 1
+
+    def test_lange_nachrichten_gekuerzt(self, store):
+        store.append("k", "x" * 5000, "y")
+        assert len(store.window("k", 1)[0]["content"]) == memory_store.CONTENT_LIMIT
+
+    def test_zusammenfassung(self, store):
+        assert store.summary("k") == ""
+        store.set_summary("k", "Nutzer plant Urlaub.")
+        store.set_summary("k", "Nutzer plant Urlaub in Rom.")
+        assert store.summary("k") == "Nutzer plant Urlaub in Rom."
+
+    def test_uebernahme_alter_dateien(self, tmp_path):
+        alt = tmp_path / "memory"
+        alt.mkdir()
+        (alt / "chat_1.json").write_text(json.dumps({"key": "chat:1", "window": [
+            {"role": "user", "content": "Hallo", "time": "t"},
+            {"role": "assistant", "content": "Hi", "time": "t"}]}))
+        (alt / "chat_1_summary.json").write_text(json.dumps(
+            {"key": "chat:1", "summary": "Begrüßung", "updated": "t"}))
+        s = MemoryStore(path=str(tmp_path / "m.db"), legacy_dir=str(alt))
+        assert [m["content"] for m in s.window("chat:1")] == ["Hallo", "Hi"]
+        assert s.summary("chat:1") == "Begrüßung"
+        s.close()
+        s = MemoryStore(path=str(tmp_path / "m.db"), legacy_dir=str(alt))
+        assert len(s.window("chat:1")) == 2          # nur einmal übernommen
+        s.close()
+
+    def test_parallele_schreiber(self, tmp_path):
+        s = MemoryStore(path=str(tmp_path / "p.db"), keep=1000,
+                        legacy_dir=str(tmp_path / "memory"))
+
+        def schreiber(n):
+            for i in range(20):
+                s.append("gemeinsam", f"{n}-{i}", "ok")
+
+        threads = [threading.Thread(target=schreiber, args=(n,)) for n in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert s.stats("gemeinsam")["count"] == 100
+        s.close()
+
+
+class TestSummaryQueue:
+
+    def test_alle_n_runden_ein_aufruf(self, store):
+        prompts = []
+        chat    = lambda p: prompts.append(p) or f"Stand {len(prompts)}"
+        q       = SummaryQueue(store, every=3)
+        q.submit("k", "Frage 1", "Antwort 1", chat)
+        q.submit("k", "Frage 2", "Antwort 2", chat)
+        q.flush()
+        assert prompts == [] and store.summary("k") == ""
+        q.submit("k", "Frage 3", "Antwort 3", chat)
+        q.flush()
+        assert len(prompts) == 1
+        assert all(f"Nutzer: Frage {i}" in prompts[0] for i in (1, 2, 3))
+        assert store.summary("k") == "Stand 1" and store.pending("k") == []
+
+        q.submit("k", "Frage 4", "Antwort 4", chat, every=1)
+        q.flush()
+        assert "Bisherige Zusammenfassung:\nStand 1" in prompts[1]
+        assert "Frage 3" not in prompts[1]
+
+    def test_fehler_behaelt_runden(self, store):
+        def kaputt(prompt):
+            raise RuntimeError("Provider weg")
+
+        q = SummaryQueue(store, every=1)
+        q.submit("k", "Frage 1", "Antwort 1", kaputt)
+        q.flush()
+        assert len(store.pending("k")) == 1
+        prompts = []
+        q.submit("k", "Frage 2", "Antwort 2", lambda p: prompts.append(p) or "ok")
+        q.flush()
+        assert "Frage 1" in prompts[0] and "Frage 2" in prompts[0]
+        assert store.summary("k") == "ok"
+
+
+    def test_fehlertext_ueberschreibt_nichts(self, store):
+        store.set_summary("k", "Stand 1")
+        q = SummaryQueue(store, every=5)
+        q.submit("k", "Frage 1", "Antwort 1", None)
+        for antwort in ("❌ Fehler: Provider weg", "", None):
+            assert q.summarize("k", lambda p, a=antwort: a) is False
+        assert store.summary("k") == "Stand 1"
+        assert len(store.pending("k")) == 1
+        assert q.summarize("k", lambda p: "Stand 2") is True
+        assert store.summary("k") == "Stand 2" and store.pending("k") == []
+
+
+class TestMemoryNodes:
+
+    def test_memory_window_im_workflow(self, store, monkeypatch):
+        from workflow_routes import run_workflow
+        monkeypatch.setattr(memory_store, "_store", store)
+        wf = {"nodes": [make_node("m", "memory_window", {"memory_key": "wf", "window_size": 2}),
+                        make_node("c", "chat", {"message": "Wie geht's?"})],
+              "connections": [make_connection("m", "c")]}
+        erster = run_workflow(wf, kernel=MockKernel("Gut!"))
+        assert erster["results"]["m"] == "── Gedächtnis noch leer ──"
+        zweiter = run_workflow(wf, kernel=MockKernel("Gut!"))
+        assert "Ilija: Gut!" in zweiter["results"]["m"]
+        assert store.stats("wf")["count"] == 2
+
+    def test_memory_summary_wartet_nicht(self, store, monkeypatch):
+        from workflow_routes import run_workflow
+        q = SummaryQueue(store)
+        monkeypatch.setattr(memory_store, "_store", store)
+        monkeypatch.setattr(memory_store, "_summaries", q)
+        freigabe = threading.Event()
+
+        class LangsamerKernel(MockKernel):
+            def chat(self, nachricht, *args, **kwargs):
+                if nachricht.startswith("Erstelle eine prägnante Zusammenfassung"):
+                    assert freigabe.wait(3)
+                    return "Nutzer fragt nach dem Befinden."
+                return "Gut!"
+
+        wf = {"nodes": [make_node("m", "memory_summary", {"memory_key": "s"}),
+                        make_node("c", "chat", {"message": "Wie geht's?"})],
+              "connections": [make_connection("m", "c")]}
+        res = run_workflow(wf, kernel=LangsamerKernel())
+        assert res["output"] == "Gut!"
+        assert store.summary("s") == ""            # Lauf ist fertig, Zusammenfassung noch nicht
+        freigabe.set()
+        q.flush()
+        assert store.summary("s") == "Nutzer fragt nach dem Befinden."
+        zweiter = run_workflow(wf, kernel=MockKernel("Gut!"))
+        assert "Nutzer fragt nach dem Befinden." in zweiter["results"]["m"]
+        q.flush()
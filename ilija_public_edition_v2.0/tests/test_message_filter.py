@@ -0,0 +1,165 @@
+"""
+test_message_filter.py – Tests für die lokale Vorstufe des Chat-Filters
+========================================================================
+Testet: Regeln nur für sichere System-Signale, sichere und unsichere
+        Modell-Entscheidungen, Verwerfen nur durch das LLM, LLM mit Cache nach
+        Inhalt, Fallback ohne LLM und bei Fehlertext (ungecacht), Zähler je
+        Stufe, chatfilter-Node im Workflow
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import message_filter
+from message_filter import (MessageFilter, NgramModel, BEISPIELE, rule_decision,
+                            parse_llm_answer)
+from helpers import MockKernel, make_node, make_connection
+
+
+class ZaehlenderChat:
+    """chat()-Ersatz, der Aufrufe zählt und eine feste Antwort liefert."""
+
+    def __init__(self, antwort="JA"):
+        self.antwort = antwort
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        return self.antwort
+
+
+UNSICHER = "Alles erledigt, danke dir!"
+
+
+class TestRegeln:
+
+    @pytest.mark.parametrize("text", ["", "   ", "[]", "null",
+                                      "📭 Keine neuen Telegram-Nachrichten.",
+                                      "❌ Lesefehler: timeout", "⚠️ Kein Skill ausgewählt"])
+    def test_system_signale(self, text):
+        assert rule_decision(text) is False
+
+    def test_ausgaben_der_lese_nodes_entscheidet_keine_regel(self):
+        assert rule_decision("[16.10. 09:12] Anna: Hilfst du mir morgen?") is None
+        assert rule_decision("📬 2 E-Mail(s):\n\n── E-Mail ──") is None
+        assert rule_decision(UNSICHER) is None
+
+    @pytest.mark.parametrize("antwort,erwartet", [
+        ("JA", True), (" ja.", True), ("NEIN", False), ("Nein", False),
+        ("❌ Fehler: Provider weg", None), ("⏱ Timeout", None), ("", None),
+        (None, None), ("Vielleicht", None)])
+    def test_llm_antwort(self, antwort, erwartet):
+        assert parse_llm_answer(antwort) is erwartet
+
+
+class TestModell:
+
+    def test_trainingsbeispiele_werden_erkannt(self):
+        model = NgramModel(BEISPIELE)
+        assert all(model.decide(text) in (label, None) for text, label in BEISPIELE)
+
+    def test_eindeutige_faelle(self):
+        model = NgramModel(BEISPIELE)
+        assert model.decide("Hast du morgen Zeit für einen Kaffee?") is True
+        assert model.decide("Keine neuen Termine gefunden.") is False
+        assert model.decide(UNSICHER) is None
+        assert model.decide("OK") is None                  # zu kurz
+
+
+class TestMessageFilter:
+
+    def test_llm_nur_im_zweifel(self):
+        f    = MessageFilter()
+        chat = ZaehlenderChat("NEIN")
+        assert f.classify("📭 Keine E-Mails gefunden.", chat) == (False, "regel")
+        assert f.classify("Kannst du mir morgen beim Umzug helfen?", chat) == (True, "modell")
+        assert f.classify(UNSICHER, chat) == (False, "llm")
+        assert f.classify(UNSICHER + "  ", chat) == (False, "cache")
+        assert len(chat.prompts) == 1 and UNSICHER in chat.prompts[0]
+        stats = f.stats()
+        assert stats["tiers"] == {"regel": 1, "cache": 1, "modell": 1, "llm": 1, "fallback": 0}
+        assert stats["llm_gespart"] == 3 and stats["cache_eintraege"] == 1
+
+    def test_modell_verwirft_nie_ohne_llm(self):
+        f    = MessageFilter()
+        chat = ZaehlenderChat("JA")
+        for text in ("Keine neuen Termine gefunden.",
+                     "Fehler im Rechnungsbetrag, bitte korrigieren.",
+                     "Der Server ist seit gestern down, kannst du helfen?"):
+            assert f.classify(text, chat) in ((True, "modell"), (True, "llm"))
+        assert f.stats()["tiers"]["llm"] >= 1
+
+    def test_mail_ausgabe_geht_ans_llm(self):
+        f    = MessageFilter()
+        chat = ZaehlenderChat("NEIN")
+        mail = "📬 1 E-Mail(s):\n\nVon: newsletter@shop.de\nBetreff: Ihre Bestellung ist unterwegs"
+        assert f.classify(mail, chat) == (False, "llm")
+        assert len(chat.prompts) == 1
+
+    def test_fehlertext_des_llm_wird_nicht_gecacht(self):
+        f = MessageFilter()
+        assert f.classify(UNSICHER, ZaehlenderChat("❌ Fehler: Provider weg")) == (True, "fallback")
+        assert f.classify(UNSICHER, ZaehlenderChat("Weiß nicht")) == (True, "fallback")
+        assert f.stats()["cache_eintraege"] == 0
+        assert f.classify(UNSICHER, ZaehlenderChat("NEIN")) == (False, "llm")
+
+    def test_fallback_ohne_llm_wird_nicht_gecacht(self):
+        def kaputt(prompt):
+            raise RuntimeError("Provider weg")
+
+        f = MessageFilter()
+        assert f.classify(UNSICHER, kaputt) == (True, "fallback")
+        assert f.classify(UNSICHER, ZaehlenderChat("NEIN")) == (False, "llm")
+
+    def test_cache_grenze_und_leeren(self):
+        f    = MessageFilter(cache_size=1)
+        chat = ZaehlenderChat()
+        f.classify(UNSICHER, chat)
+        f.classify("Siehe Anhang.", chat)
+        assert f.classify(UNSICHER, chat)[1] == "llm"      # verdrängt
+        f.clear()
+        assert f.stats() == {"tiers": dict.fromkeys(message_filter.TIERS, 0),
+                             "llm_gespart": 0, "cache_eintraege": 0}
+
+
+class TestChatfilterNode:
+
+    def test_intelligent_ohne_llm_aufruf(self, monkeypatch):
+        from workflow_routes import run_workflow
+        f = MessageFilter()
+        monkeypatch.setattr(message_filter, "_filter", f)
+
+        class Kernel(MockKernel):
+            prompts = []
+
+            def chat(self, nachricht, *args, **kwargs):
+                self.prompts.append(nachricht)
+                return "Antwort"
+
+        wf = {"nodes": [make_node("s", "set", {"value": "📭 Keine neuen Kommentare."}),
+                        make_node("f", "chatfilter", {"modus": "intelligent"}),
+                        make_node("c", "chat", {"message": "{{input}}"})],
+              "connections": [make_connection("s", "f"), make_connection("f", "c")]}
+        res = run_workflow(wf, kernel=Kernel())
+        assert "c" not in res["results"]
+        assert Kernel.prompts == []
+        assert f.stats()["tiers"]["regel"] == 1
+
+    def test_fehlertext_des_kernels_laesst_nachricht_durch(self, monkeypatch):
+        from workflow_routes import run_workflow
+        f = MessageFilter()
+        monkeypatch.setattr(message_filter, "_filter", f)
+
+        class Kernel(MockKernel):
+            def chat(self, nachricht, *args, **kwargs):
+                return "❌ Fehler: Provider weg" if "Nachrichtenfilter" in nachricht else "Antwort"
+
+        wf = {"nodes": [make_node("s", "set", {"value": UNSICHER}),
+                        make_node("f", "chatfilter", {"modus": "intelligent"}),
+                        make_node("c", "chat", {"message": "{{input}}"})],
+              "connections": [make_connection("s", "f"), make_connection("f", "c")]}
+        res = run_workflow(wf, kernel=Kernel())
+        assert "c" in res["results"]
+        assert f.stats()["tiers"]["fallback"] == 1 and f.stats()["cache_eintraege"] == 0
@@ -0,0 +1,118 @@
+"""
+test_providers.py – Tests für den gemeinsamen Provider-Transport
+================================================================
+Testet: Client-Wiederverwendung je Provider/API-Key, Pool-Konfiguration,
+        Gemini nutzt die gepoolte Session statt requests.post
+"""
+import os
+import sys
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("dotenv")
+
+import providers
+
+
+@pytest.fixture(autouse=True)
+def _frische_transports():
+    providers.reset_transports()
+    yield
+    providers.reset_transports()
+
+
+# ── shared_transport ──────────────────────────────────────────────────────────
+
+class TestSharedTransport:
+
+    def test_gleicher_key_gleicher_client(self):
+        factory = MagicMock(side_effect=lambda cfg: object())
+        a = providers.shared_transport("x", "key1", factory)
+        b = providers.shared_transport("x", "key1", factory)
+        assert a is b
+        assert factory.call_count == 1
+
+    def test_anderer_key_anderer_client(self):
+        factory = MagicMock(side_effect=lambda cfg: object())
+        a = providers.shared_transport("x", "key1", factory)
+        b = providers.shared_transport("x", "key2", factory)
+        c = providers.shared_transport("y", "key1", factory)
+        assert len({id(a), id(b), id(c)}) == 3
+
+    def test_parallel_nur_ein_client(self):
+        factory = MagicMock(side_effect=lambda cfg: object())
+        ergebnisse = []
+
+        def _hole():
+            ergebnisse.append(providers.shared_transport("x", "k", factory))
+
+        threads = [threading.Thread(target=_hole) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(r) for r in ergebnisse}) == 1
+        assert factory.call_count == 1
+
+    def test_settings_aus_env(self, monkeypatch):
+        monkeypatch.setenv("PROVIDER_POOL_SIZE", "3")
+        monkeypatch.setenv("PROVIDER_READ_TIMEOUT", "42")
+        cfg = providers.transport_settings()
+        assert cfg["pool_size"] == 3
+        assert cfg["read_timeout"] == 42.0
+
+    def test_ungueltige_werte_nutzen_standard(self, monkeypatch):
+        monkeypatch.setenv("PROVIDER_POOL_SIZE", "zehn")
+        monkeypatch.setenv("PROVIDER_CONNECT_TIMEOUT", "")
+        monkeypatch.setenv("PROVIDER_READ_TIMEOUT", "5m")
+        assert providers.transport_settings() == {
+            "pool_size": 10, "connect_timeout": 10.0, "read_timeout": 300.0}
+
+    def test_reset_schliesst_clients(self):
+        client = MagicMock()
+        providers.shared_transport("x", "k", lambda cfg: client)
+        providers.reset_transports()
+        client.close.assert_called_once()
+
+
+# ── Gemini ────────────────────────────────────────────────────────────────────
+
+class TestGeminiSession:
+
+    def test_kernel_instanzen_teilen_session(self, monkeypatch):
+        pytest.importorskip("requests")
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+        a = providers.GeminiProvider()
+        b = providers.GeminiProvider()
+        assert a.session is b.session
+
+    def test_pool_groesse_wird_uebernommen(self, monkeypatch):
+        pytest.importorskip("requests")
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+        monkeypatch.setenv("PROVIDER_POOL_SIZE", "4")
+        p = providers.GeminiProvider()
+        assert p.session.get_adapter("https://x")._pool_maxsize == 4
+
+    def test_chat_nutzt_session(self, monkeypatch):
+        pytest.importorskip("requests")
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+        p = providers.GeminiProvider()
+        resp = MagicMock(status_code=200)
+        resp.json.return_value = {
+            "candidates": [{"content": {"parts": [{"text": "Hallo"}]}}]}
+        p.session.post = MagicMock(return_value=resp)
+        assert p.chat([{"role": "user", "content": "Hi"}]) == "Hallo"
+        p.session.post.assert_called_once()
+        assert p.session.post.call_args.kwargs["timeout"][1] == 30
+
+    def test_nur_streaming_mit_langem_timeout(self, monkeypatch):
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+        monkeypatch.setenv("PROVIDER_READ_TIMEOUT", "300")
+        monkeypatch.setattr(providers, "_http_session", lambda settings: MagicMock())
+        monkeypatch.setattr(providers, "_transports", {})
+        p = providers.GeminiProvider()
+        assert p._timeout() == (10.0, 30)
+        assert p._timeout(stream=True) == (10.0, 300.0)
@@ -0,0 +1,178 @@
+"""
+test_run_store.py – Tests für die Lauf-Historie (RunStore + /api/workflow/runs)
+===============================================================================
+Testet: Läufe und Node-Ergebnisse speichern, Höchstzahl, Fortsetzen ab dem
+        ersten fehlgeschlagenen Node mit Wiederverwendung gespeicherter
+        Ausgaben, korrigierte Definition beim Fortsetzen, Routen
+"""
+import os
+import sys
+import threading
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("flask")
+
+import workflow_routes
+from run_store import RunStore
+from workflow_routes import NodeHandler
+from helpers import MockKernel, make_node, make_connection
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = RunStore(path=str(tmp_path / "runs.db"), keep=3)
+    yield s
+    s.close()
+
+
+# ── RunStore ──────────────────────────────────────────────────────────────────
+
+class TestRunStore:
+
+    def test_lauf_und_nodes(self, store):
+        run_id = store.start_run({"id": "wf", "name": "Test", "nodes": []}, {"input": "x"})
+        store.record_node(run_id, "b", "set", 1, "a-out", "b-out", "error", 2.0, 0.5)
+        store.record_node(run_id, "a", "trigger", 0, "", "a-out", "success", 1.0, 0.1)
+        store.finish_run(run_id, "error")
+        run = store.get_run(run_id)
+        assert run["status"] == "error" and run["finished"]
+        assert run["inputs"] == {"input": "x"}
+        assert [n["nid"] for n in run["nodes"]] == ["a", "b"]
+        assert run["nodes"][1]["input"] == "a-out"
+        assert run["nodes"][1]["duration"] == 0.5
+        assert store.get_run("gibtsnicht") is None
+
+    def test_hoechstzahl(self, store):
+        ids = [store.start_run({"id": "wf"}) for _ in range(5)]
+        for run_id in ids:
+            store.finish_run(run_id, "done")
+        behalten = [r["id"] for r in store.list_runs()]
+        assert len(behalten) == 3
+        assert store.get_run(ids[0]) is None
+
+    def test_filter_nach_workflow(self, store):
+        store.start_run({"id": "a"})
+        store.start_run({"id": "b"})
+        assert [r["workflow_id"] for r in store.list_runs("a")] == ["a"]
+
+
+# ── Fortsetzen ────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def zaehl_nodes(monkeypatch, tmp_path):
+    """Node-Typ "teuer" zählt Aufrufe; "wackelig" schlägt fehl, solange kaputt gesetzt ist."""
+    aufrufe = []
+    zustand = {"kaputt": True}
+
+    class TeuerNode(NodeHandler):
+        def run(self, ctx, config):
+            aufrufe.append(ctx.nid)
+            return f"{ctx.nid}({ctx.context})"
+
+    class WackeligNode(NodeHandler):
+        def run(self, ctx, config):
+            aufrufe.append(ctx.nid)
+            if zustand["kaputt"]:
+                raise RuntimeError("API nicht erreichbar")
+            return f"ok: {ctx.context}"
+
+    monkeypatch.setitem(workflow_routes.NODE_HANDLERS, "teuer", TeuerNode())
+    monkeypatch.setitem(workflow_routes.NODE_HANDLERS, "wackelig", WackeligNode())
+    monkeypatch.setattr(workflow_routes, "_plan_cache", workflow_routes.OrderedDict())
+    s = RunStore(path=str(tmp_path / "runs.db"))
+    monkeypatch.setattr(workflow_routes, "_run_store", s)
+    yield aufrufe, zustand
+    s.close()
+
+
+def _kette():
+    nodes = [make_node("a", "teuer"), make_node("b", "teuer"),
+             make_node("c", "wackelig"), make_node("d", "teuer")]
+    conns = [make_connection("a", "b"), make_connection("b", "c"), make_connection("c", "d")]
+    return {"id": "kette", "nodes": nodes, "connections": conns}
+
+
+class TestFortsetzen:
+
+    def test_lauf_wird_aufgezeichnet(self, zaehl_nodes):
+        from workflow_routes import run_workflow
+        res = run_workflow(_kette(), kernel=MockKernel())
+        run = workflow_routes._run_store.get_run(res["run_id"])
+        assert run["status"] == "error"
+        assert [(n["nid"], n["status"]) for n in run["nodes"]] == [
+            ("a", "success"), ("b", "success"), ("c", "error"), ("d", "success")]
+        assert run["nodes"][1]["input"] == "a()"
+
+    def test_fortsetzen_ab_fehler(self, zaehl_nodes):
+        from workflow_routes import run_workflow, resume_workflow
+        aufrufe, zustand = zaehl_nodes
+        erster = run_workflow(_kette(), kernel=MockKernel())
+        aufrufe.clear()
+        zustand["kaputt"] = False
+        with patch.object(workflow_routes, "_engine_kernel", (MockKernel, threading.Lock())):
+            res = resume_workflow(erster["run_id"])
+        assert aufrufe == ["c", "d"]
+        assert res["results"]["c"] == "ok: b(a())"
+        assert res["output"] == "d(ok: b(a()))"
+        run = workflow_routes._run_store.get_run(res["run_id"])
+        assert run["resumed_from"] == erster["run_id"]
+        assert [n["reused"] for n in run["nodes"]] == [True, True, False, False]
+        assert run["status"] == "done"
+
+    def test_korrigierte_definition(self, zaehl_nodes):
+        from workflow_routes import run_workflow, resume_workflow
+        aufrufe, _ = zaehl_nodes
+        erster = run_workflow(_kette(), kernel=MockKernel())
+        aufrufe.clear()
+        neu = _kette()
+        neu["nodes"][2] = make_node("c", "set", {"value": "repariert"})
+        with patch.object(workflow_routes, "_engine_kernel", (MockKernel, threading.Lock())):
+            res = resume_workflow(erster["run_id"], {"nodes": neu["nodes"],
+                                                     "connections": neu["connections"]})
+        assert aufrufe == ["d"]
+        assert res["output"] == "d(repariert)"
+
+    def test_unbekannter_lauf(self, zaehl_nodes):
+        from workflow_routes import resume_workflow
+        with pytest.raises(KeyError):
+            resume_workflow("gibtsnicht")
+
+
+# ── Routen ────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from flask import Flask
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    with patch("workflow_routes._start_scheduler"):
+        workflow_routes.register_workflow_routes(app, lambda: MockKernel(), threading.Lock())
+    yield app.test_client()
+    workflow_routes._run_store.close()
+
+
+class TestRouten:
+
+    def test_ausfuehren_listen_fortsetzen(self, client, tmp_path):
+        nodes = [make_node("t", "trigger", {"startMessage": "Hallo"}),
+                 make_node("s", "set", {"value": "{{input}}!"})]
+        res = client.post("/api/workflow/execute", json={
+            "nodes": nodes, "connections": [make_connection("t", "s")]}).get_json()
+        assert os.path.exists(tmp_path / "data" / "workflow_runs.db")
+
+        runs = client.get("/api/workflow/runs").get_json()["runs"]
+        assert [r["id"] for r in runs] == [res["run_id"]]
+        detail = client.get(f"/api/workflow/runs/{res['run_id']}").get_json()
+        assert [n["output"] for n in detail["nodes"]] == ["Hallo", "Hallo!"]
+
+        fortgesetzt = client.post(f"/api/workflow/runs/{res['run_id']}/resume").get_json()
+        assert fortgesetzt["results"] == res["results"]
+        assert fortgesetzt["run_id"] != res["run_id"]
+
+    def test_unbekannter_lauf(self, client):
+        assert client.get("/api/workflow/runs/gibtsnicht").status_code == 404
+        assert client.post("/api/workflow/runs/gibtsnicht/resume").status_code == 404
@@ -1,16 +1,26 @@
 """
 test_scheduler.py – Tests für die Scheduler-Logik in workflow_routes.py
 ========================================================================
-Testet: _schedule_should_fire — alle Intervalltypen, Edge Cases, Minimum-Intervall
+Testet: Fälligkeit über _next_fire_time — alle Intervalltypen, Edge Cases, Minimum-Intervall;
+        Cron-Ausdrücke, nächster Ausführungszeitpunkt, Nachholen, Timer-Heap
 """
 import os
 import sys
+import json
+import time
+import threading
 import pytest
 from datetime import datetime, timedelta
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from workflow_routes import _schedule_should_fire
+import workflow_routes
+from workflow_routes import _next_fire_time, _parse_iso, CronExpression, WorkflowScheduler
+
+
+def _faellig(config: dict, now: datetime) -> bool:
+    """Wie der Scheduler: fällig, wenn der nächste Termin ab _last_run nicht nach now liegt."""
+    return _next_fire_time(config, now, _parse_iso(config.get("_last_run"))) <= now
 
 
 # ── Interval-Modus ────────────────────────────────────────────────────────────
@@ -20,11 +30,11 @@ class TestScheduleIntervalModus:
     def test_erster_lauf_ohne_last_run_feuert(self):
         """Ohne _last_run soll der Schedule sofort feuern."""
         config = {"interval_type": "interval", "minuten": 5, "sekunden": 0}
-        assert _schedule_should_fire(config, datetime.now()) is True
+        assert _faellig(config, datetime.now()) is True
 
     def test_leerer_last_run_feuert(self):
         config = {"interval_type": "interval", "minuten": 1, "_last_run": ""}
-        assert _schedule_should_fire(config, datetime.now()) is True
+        assert _faellig(config, datetime.now()) is True
 
     def test_intervall_noch_nicht_abgelaufen(self):
         last = datetime.now() - timedelta(seconds=10)
@@ -33,7 +43,7 @@ class TestScheduleIntervalModus:
             "minuten": 1, "sekunden": 0,
             "_last_run": last.isoformat(),
         }
-        assert _schedule_should_fire(config, datetime.now()) is False
+        assert _faellig(config, datetime.now()) is False
 
     def test_intervall_abgelaufen(self):
         last = datetime.now() - timedelta(minutes=5, seconds=1)
@@ -42,7 +52,7 @@ class TestScheduleIntervalModus:
             "minuten": 5, "sekunden": 0,
             "_last_run": last.isoformat(),
         }
-        assert _schedule_should_fire(config, datetime.now()) is True
+        assert _faellig(config, datetime.now()) is True
 
     def test_minimum_intervall_5_sekunden(self):
         """Intervalle unter 5 Sekunden werden auf 5s hochgesetzt."""
@@ -53,7 +63,7 @@ class TestScheduleIntervalModus:
             "_last_run": last.isoformat(),
         }
         # 3 Sekunden vergangen, Minimum 5s → soll NICHT feuern
-        assert _schedule_should_fire(config, datetime.now()) is False
+        assert _faellig(config, datetime.now()) is False
 
     def test_minimum_5_sekunden_nach_ablauf(self):
         last = datetime.now() - timedelta(seconds=6)
@@ -63,7 +73,7 @@ class TestScheduleIntervalModus:
             "_last_run": last.isoformat(),
         }
         # 6 Sekunden vergangen → soll feuern
-        assert _schedule_should_fire(config, datetime.now()) is True
+        assert _faellig(config, datetime.now()) is True
 
     def test_nur_sekunden_konfiguriert(self):
         last = datetime.now() - timedelta(seconds=31)
@@ -72,7 +82,7 @@ class TestScheduleIntervalModus:
             "minuten": 0, "sekunden": 30,
             "_last_run": last.isoformat(),
         }
-        assert _schedule_should_fire(config, datetime.now()) is True
+        assert _faellig(config, datetime.now()) is True
 
     def test_kombination_minuten_und_sekunden(self):
         last = datetime.now() - timedelta(minutes=1, seconds=31)
@@ -81,7 +91,7 @@ class TestScheduleIntervalModus:
             "minuten": 1, "sekunden": 30,
             "_last_run": last.isoformat(),
         }
-        assert _schedule_should_fire(config, datetime.now()) is True
+        assert _faellig(config, datetime.now()) is True
 
     def test_ungueltige_last_run_feuert(self):
         config = {
@@ -89,27 +99,29 @@ class TestScheduleIntervalModus:
             "minuten": 5,
             "_last_run": "keine-gueltige-zeit",
         }
-        assert _schedule_should_fire(config, datetime.now()) is True
+        assert _faellig(config, datetime.now()) is True
 
 
 # ── Täglich-Modus ─────────────────────────────────────────────────────────────
 
 class TestScheduleTaeglich:
 
-    def test_genau_zur_richtigen_zeit_feuert(self):
-        now = datetime(2026, 4, 19, 8, 0, 0)
+    def test_erster_termin_heute(self):
+        now = datetime(2026, 4, 19, 7, 59, 30)
         config = {"interval_type": "taglich", "zeit": "08:00"}
-        assert _schedule_should_fire(config, now) is True
+        assert _faellig(config, now) is False
+        assert _next_fire_time(config, now) == datetime(2026, 4, 19, 8, 0)
 
-    def test_falsche_minute_feuert_nicht(self):
+    def test_termin_verpasst_ohne_lauf_wartet_auf_morgen(self):
         now = datetime(2026, 4, 19, 8, 1, 0)
         config = {"interval_type": "taglich", "zeit": "08:00"}
-        assert _schedule_should_fire(config, now) is False
+        assert _faellig(config, now) is False
+        assert _next_fire_time(config, now) == datetime(2026, 4, 20, 8, 0)
 
     def test_falsche_stunde_feuert_nicht(self):
         now = datetime(2026, 4, 19, 9, 0, 0)
         config = {"interval_type": "taglich", "zeit": "08:00"}
-        assert _schedule_should_fire(config, now) is False
+        assert _faellig(config, now) is False
 
     def test_heute_bereits_gefeuert_feuert_nicht(self):
         now  = datetime(2026, 4, 19, 8, 0, 0)
@@ -118,7 +130,7 @@ class TestScheduleTaeglich:
             "interval_type": "taglich", "zeit": "08:00",
             "_last_run": last.isoformat(),
         }
-        assert _schedule_should_fire(config, now) is False
+        assert _faellig(config, now) is False
 
     def test_gestern_gefeuert_feuert_heute(self):
         now  = datetime(2026, 4, 19, 8, 0, 0)
@@ -127,12 +139,13 @@ class TestScheduleTaeglich:
             "interval_type": "taglich", "zeit": "08:00",
             "_last_run": last.isoformat(),
         }
-        assert _schedule_should_fire(config, now) is True
+        assert _faellig(config, now) is True
 
-    def test_ungueltige_zeit_feuert_nicht(self):
+    def test_ungueltige_zeit(self):
         now = datetime(2026, 4, 19, 8, 0, 0)
         config = {"interval_type": "taglich", "zeit": "ungueltig"}
-        assert _schedule_should_fire(config, now) is False
+        with pytest.raises(ValueError):
+            _faellig(config, now)
 
 
 # ── Wöchentlich-Modus ─────────────────────────────────────────────────────────
@@ -140,39 +153,222 @@ class TestScheduleTaeglich:
 class TestScheduleWoechentlich:
 
     def test_richtiger_wochentag_und_uhrzeit(self):
-        # Montag (weekday=0), 19. April 2026 ist ein Sonntag (weekday=6)
-        # Nehmen wir einen Sonntag: datetime(2026, 4, 19) → weekday=6
-        now = datetime(2026, 4, 19, 10, 0, 0)  # Sonntag
+        now = datetime(2026, 4, 19, 10, 0, 0)  # Sonntag (weekday=6)
         assert now.weekday() == 6
-        config = {"interval_type": "woechentlich", "wochentag": 6, "zeit": "10:00"}
-        assert _schedule_should_fire(config, now) is True
+        config = {"interval_type": "woechentlich", "wochentag": 6, "zeit": "10:00",
+                  "_last_run": datetime(2026, 4, 12, 10, 0).isoformat()}
+        assert _faellig(config, now) is True
 
     def test_falscher_wochentag_feuert_nicht(self):
         now = datetime(2026, 4, 19, 10, 0, 0)  # Sonntag = 6
         config = {"interval_type": "woechentlich", "wochentag": 0, "zeit": "10:00"}  # Montag
-        assert _schedule_should_fire(config, now) is False
+        assert _faellig(config, now) is False
+        assert _next_fire_time(config, now) == datetime(2026, 4, 20, 10, 0)
 
     def test_bereits_diese_woche_gefeuert(self):
         now  = datetime(2026, 4, 19, 10, 0, 0)  # Sonntag
-        last = datetime(2026, 4, 19,  9, 0, 0)  # heute, vor 1 Stunde
+        last = datetime(2026, 4, 19, 10, 0, 0)  # heute schon zum Termin gelaufen
         config = {
             "interval_type": "woechentlich", "wochentag": 6, "zeit": "10:00",
             "_last_run": last.isoformat(),
         }
-        # Weniger als 604700s (7 Tage) vergangen → nicht feuern
-        assert _schedule_should_fire(config, now) is False
+        # Nächster Termin erst in einer Woche
+        assert _faellig(config, now) is False
 
 
 # ── Unbekannter Typ ───────────────────────────────────────────────────────────
 
 class TestScheduleUnbekannt:
 
-    def test_unbekannter_typ_feuert_nicht(self):
+    def test_unbekannter_typ(self):
         config = {"interval_type": "monatlich", "tag": 1}
-        assert _schedule_should_fire(config, datetime.now()) is False
+        with pytest.raises(ValueError):
+            _faellig(config, datetime.now())
 
     def test_kein_typ_feuert_nicht(self):
         # Standard-Typ ist "interval" laut Code
         config = {}
         # Ohne _last_run → feuert (erster Lauf)
-        assert _schedule_should_fire(config, datetime.now()) is True
+        assert _faellig(config, datetime.now()) is True
+
+
+# ── Cron-Ausdrücke ────────────────────────────────────────────────────────────
+
+FREITAG = datetime(2026, 10, 16, 9, 30)   # Freitag, 09:30
+
+
+class TestCronExpression:
+
+    def test_alle_15_minuten(self):
+        assert CronExpression("*/15 * * * *").next_after(FREITAG) == datetime(2026, 10, 16, 9, 45)
+
+    def test_werktags_um_acht(self):
+        # Freitag 09:30 → nächster Werktag ist Montag
+        assert CronExpression("0 8 * * 1-5").next_after(FREITAG) == datetime(2026, 10, 19, 8, 0)
+
+    def test_sonntag_als_sieben(self):
+        assert CronExpression("0 12 * * 7").next_after(FREITAG) == datetime(2026, 10, 18, 12, 0)
+
+    def test_liste_und_monatstag(self):
+        assert CronExpression("30 6 1,15 * *").next_after(FREITAG) == datetime(2026, 11, 1, 6, 30)
+
+    def test_tag_oder_wochentag(self):
+        # Beide eingeschränkt → 1. des Monats ODER Montag
+        assert CronExpression("0 0 1 * 1").next_after(FREITAG) == datetime(2026, 10, 19, 0, 0)
+
+    def test_echt_nach_zeitpunkt(self):
+        assert CronExpression("30 9 * * *").next_after(FREITAG) == datetime(2026, 10, 17, 9, 30)
+
+    @pytest.mark.parametrize("ausdruck", ["* * * *", "60 * * * *", "*/0 * * * *", "a * * * *",
+                                          "0 0 31 2 *"])
+    def test_ungueltig(self, ausdruck):
+        with pytest.raises(ValueError):
+            CronExpression(ausdruck).next_after(FREITAG)
+
+
+# ── Nächster Ausführungszeitpunkt ─────────────────────────────────────────────
+
+class TestNaechsterTermin:
+
+    def test_intervall_ohne_lauf_sofort(self):
+        assert _next_fire_time({"interval_type": "interval", "minuten": 5}, FREITAG) == FREITAG
+
+    def test_intervall_nach_lauf(self):
+        last = FREITAG - timedelta(minutes=2)
+        cfg  = {"interval_type": "interval", "minuten": 5}
+        assert _next_fire_time(cfg, FREITAG, last) == last + timedelta(minutes=5)
+
+    def test_taeglich_heute_oder_morgen(self):
+        cfg = {"interval_type": "taglich", "zeit": "10:00"}
+        assert _next_fire_time(cfg, FREITAG) == datetime(2026, 10, 16, 10, 0)
+        cfg = {"interval_type": "taglich", "zeit": "08:00"}
+        assert _next_fire_time(cfg, FREITAG) == datetime(2026, 10, 17, 8, 0)
+
+    def test_woechentlich(self):
+        cfg = {"interval_type": "woechentlich", "wochentag": 0, "zeit": "07:15"}
+        assert _next_fire_time(cfg, FREITAG) == datetime(2026, 10, 19, 7, 15)
+
+    def test_cron(self):
+        cfg = {"interval_type": "cron", "cron": "0 * * * *"}
+        assert _next_fire_time(cfg, FREITAG) == datetime(2026, 10, 16, 10, 0)
+
+    def test_ungueltige_konfiguration(self):
+        for cfg in ({"interval_type": "taglich", "zeit": "25:00"},
+                    {"interval_type": "monatlich"},
+                    {"interval_type": "cron", "cron": "kaputt"}):
+            with pytest.raises(ValueError):
+                _next_fire_time(cfg, FREITAG)
+
+
+class TestNachholen:
+
+    def test_verpasster_termin_sofort_einmal(self):
+        cfg  = {"interval_type": "taglich", "zeit": "08:00", "nachholen": "einmal"}
+        last = datetime(2026, 10, 13, 8, 0)   # drei Termine verpasst
+        assert _next_fire_time(cfg, FREITAG, last) == FREITAG
+
+    def test_standard_nur_im_nachholfenster(self, monkeypatch):
+        cfg  = {"interval_type": "taglich", "zeit": "08:00"}
+        last = datetime(2026, 10, 13, 8, 0)   # letzter verpasster Termin heute 08:00
+        assert _next_fire_time(cfg, FREITAG, last) == datetime(2026, 10, 17, 8, 0)
+        monkeypatch.setenv("SCHEDULER_CATCHUP_MINUTES", "120")
+        assert _next_fire_time(cfg, FREITAG, last) == FREITAG
+        monkeypatch.setenv("SCHEDULER_CATCHUP_MINUTES", "viele")
+        assert _next_fire_time(cfg, FREITAG, last) == datetime(2026, 10, 17, 8, 0)
+
+    def test_intervall_holt_standardmaessig_nach(self):
+        cfg  = {"interval_type": "interval", "minuten": 10}
+        last = FREITAG - timedelta(days=2)
+        assert _next_fire_time(cfg, FREITAG, last) == FREITAG
+
+    def test_verpasste_termine_verfallen(self):
+        cfg  = {"interval_type": "taglich", "zeit": "08:00", "nachholen": "keine"}
+        last = datetime(2026, 10, 13, 8, 0)
+        assert _next_fire_time(cfg, FREITAG, last) == datetime(2026, 10, 17, 8, 0)
+
+    def test_intervall_bleibt_im_raster(self):
+        cfg  = {"interval_type": "interval", "minuten": 10, "nachholen": "keine"}
+        last = FREITAG - timedelta(minutes=25)
+        assert _next_fire_time(cfg, FREITAG, last) == FREITAG + timedelta(minutes=5)
+
+
+# ── Timer-Heap ────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def sched_dirs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(workflow_routes.SCHEDULES_DIR)
+    os.makedirs(workflow_routes.WORKFLOWS_DIR)
+    with open(os.path.join(workflow_routes.WORKFLOWS_DIR, "wf1.json"), "w") as f:
+        json.dump({"id": "wf1", "name": "Eins", "nodes": [], "connections": []}, f)
+    return tmp_path
+
+
+def _schreibe_zeitplaene(zeitplaene):
+    with open(os.path.join(workflow_routes.SCHEDULES_DIR, "active.json"), "w") as f:
+        json.dump(zeitplaene, f)
+
+
+class TestWorkflowScheduler:
+
+    def _starten(self, monkeypatch):
+        gestartet = threading.Event()
+        aufrufe   = []
+        lesen     = []
+        orig_read = workflow_routes._read_schedules
+
+        def _run(definition, *a, **kw):
+            aufrufe.append(definition["id"])
+            gestartet.set()
+            return {"statuses": {}}
+
+        def _read():
+            lesen.append(1)
+            return orig_read()
+
+        monkeypatch.setattr(workflow_routes, "run_workflow", _run)
+        monkeypatch.setattr(workflow_routes, "_read_schedules", _read)
+        sched = WorkflowScheduler()
+        threading.Thread(target=sched.run, daemon=True).start()
+        return sched, gestartet, aufrufe, lesen
+
+    def test_verpasster_lauf_wird_nachgeholt(self, sched_dirs, monkeypatch):
+        last = (datetime.now() - timedelta(hours=2)).isoformat()
+        _schreibe_zeitplaene({"wf1": {"active": True, "config": {
+            "interval_type": "interval", "minuten": 60, "_last_run": last}}})
+        sched, gestartet, aufrufe, _ = self._starten(monkeypatch)
+        try:
+            assert gestartet.wait(2)
+            assert aufrufe == ["wf1"]
+            with open(os.path.join(workflow_routes.SCHEDULES_DIR, "active.json")) as f:
+                assert json.load(f)["wf1"]["config"]["_last_run"] > last
+            naechster = datetime.fromisoformat(sched.next_runs()["wf1"])
+            assert naechster > datetime.now() + timedelta(minutes=59)
+        finally:
+            sched.stop()
+
+    def test_im_leerlauf_kein_neues_einlesen(self, sched_dirs, monkeypatch):
+        _schreibe_zeitplaene({"wf1": {"active": True, "config": {
+            "interval_type": "taglich", "zeit": "03:00",
+            "_last_run": datetime.now().isoformat()}}})
+        sched, _, aufrufe, lesen = self._starten(monkeypatch)
+        try:
+            time.sleep(0.3)
+            assert len(lesen) == 1 and aufrufe == []
+            sched.reload()
+            time.sleep(0.1)
+            assert len(lesen) == 2
+        finally:
+            sched.stop()
+
+    def test_inaktive_und_ungueltige_zeitplaene(self, sched_dirs, monkeypatch):
+        _schreibe_zeitplaene({
+            "aus":    {"active": False, "config": {}},
+            "kaputt": {"active": True, "config": {"interval_type": "cron", "cron": "x"}},
+        })
+        sched, _, _, _ = self._starten(monkeypatch)
+        try:
+            time.sleep(0.1)
+            assert sched.next_runs() == {}
+        finally:
+            sched.stop()
@@ -210,9 +210,9 @@ class TestEingabevalidierung:
 
     def test_schedule_mit_negativem_intervall(self, sec_client):
         """Negative Intervalle sollen nicht crashen (werden auf Minimum gesetzt)."""
-        from workflow_routes import _schedule_should_fire
-        from datetime import datetime
+        from workflow_routes import _next_fire_time
+        from datetime import datetime, timedelta
         config = {"interval_type": "interval", "minuten": -5, "sekunden": -10}
-        # Soll nicht werfen
-        result = _schedule_should_fire(config, datetime.now())
-        assert isinstance(result, bool)
+        # Soll nicht werfen; Minimum 5 Sekunden
+        last = datetime.now()
+        assert _next_fire_time(config, last, last) == last + timedelta(seconds=5)
@@ -0,0 +1,233 @@
+"""
+test_skill_cache.py – Tests für den Skill-Ergebnis-Cache
+========================================================
+Testet: TTL, LRU-Grenze, Schlüssel-Parameter, Fehler nicht cachen,
+        Persistenz, Zähler, Anbindung an SkillManager.execute(),
+        Invalidierung durch schreibende Skills
+"""
+import os
+import sys
+import textwrap
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import skill_cache
+import skill_manager
+from skill_cache import SkillResultCache, cache_policy
+from skill_manager import SkillManager
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SkillResultCache(path=str(tmp_path / "skill_cache.json"))
+
+
+class _Uhr:
+    def __init__(self):
+        self.jetzt = 1000.0
+
+    def __call__(self):
+        return self.jetzt
+
+
+@pytest.fixture
+def uhr(monkeypatch):
+    u = _Uhr()
+    monkeypatch.setattr(skill_cache.time, "time", u)
+    return u
+
+
+# ── Cache-Regeln ──────────────────────────────────────────────────────────────
+
+class TestCachePolicy:
+
+    def test_ohne_ttl_kein_cache(self):
+        assert cache_policy({}) is None
+        assert cache_policy({"cache": {}}) is None
+        assert cache_policy(None) is None
+
+    def test_mit_ttl(self):
+        assert cache_policy({"cache": {"ttl": 60}}) == {"ttl": 60}
+
+
+# ── SkillResultCache ──────────────────────────────────────────────────────────
+
+class TestSkillResultCache:
+
+    def test_treffer_und_zaehler(self, cache):
+        policy = {"ttl": 60}
+        assert cache.get("s", policy, {"a": 1}) == (False, None)
+        cache.put("s", policy, {"a": 1}, "ergebnis")
+        assert cache.get("s", policy, {"a": 1}) == (True, "ergebnis")
+        assert cache.get("s", policy, {"a": 2}) == (False, None)
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 2
+        assert stats["skills"]["s"] == {"hits": 1, "misses": 2, "entries": 1}
+
+    def test_ttl_laeuft_ab(self, cache, uhr):
+        policy = {"ttl": 10}
+        cache.put("s", policy, {}, "alt")
+        uhr.jetzt += 9
+        assert cache.get("s", policy, {})[0] is True
+        uhr.jetzt += 2
+        assert cache.get("s", policy, {})[0] is False
+
+    def test_lru_grenze(self, cache):
+        policy = {"ttl": 60, "max_entries": 2}
+        for i in range(3):
+            cache.put("s", policy, {"i": i}, i)
+        cache.get("s", policy, {"i": 1})
+        cache.put("s", policy, {"i": 3}, 3)
+        assert cache.get("s", policy, {"i": 0})[0] is False
+        assert cache.get("s", policy, {"i": 1})[0] is True
+        assert cache.get("s", policy, {"i": 2})[0] is False
+
+    def test_nur_schluessel_parameter_zaehlen(self, cache):
+        policy = {"ttl": 60, "key": ["ort"]}
+        cache.put("s", policy, {"ort": "Offenburg", "debug": True}, "sonnig")
+        assert cache.get("s", policy, {"ort": "Offenburg", "debug": False}) == (True, "sonnig")
+
+    def test_fehler_werden_nicht_gecacht(self, cache):
+        policy = {"ttl": 60}
+        for fehler in ("❌ kaputt", "⏱ Zeitüberschreitung", "⛔ abgebrochen", None):
+            cache.put("s", policy, {"f": str(fehler)}, fehler)
+            assert cache.get("s", policy, {"f": str(fehler)})[0] is False
+
+    def test_no_cache_prefixes(self, cache):
+        policy = {"ttl": 60, "no_cache_prefixes": ["🔍 Keine Ergebnisse"]}
+        cache.put("s", policy, {"q": "a"}, "🔍 Keine Ergebnisse für 'a'")
+        cache.put("s", policy, {"q": "b"}, "📰 Treffer")
+        assert cache.get("s", policy, {"q": "a"})[0] is False
+        assert cache.get("s", policy, {"q": "b"})[0] is True
+
+    def test_persistenz(self, tmp_path):
+        pfad   = str(tmp_path / "c.json")
+        policy = {"ttl": 60, "persist": True}
+        SkillResultCache(path=pfad).put("wiki", policy, {"q": "Ilija"}, "Artikel")
+        SkillResultCache(path=pfad).put("fluechtig", {"ttl": 60}, {}, "x")
+        neu = SkillResultCache(path=pfad)
+        assert neu.get("wiki", policy, {"q": "Ilija"}) == (True, "Artikel")
+
+    def test_ohne_persist_keine_datei(self, cache):
+        cache.put("s", {"ttl": 60}, {}, "x")
+        assert not os.path.exists(cache.path)
+
+    def test_invalidate_trifft_alle_caches(self, cache, tmp_path):
+        zweiter = SkillResultCache(path=str(tmp_path / "zwei.json"))
+        for c in (cache, zweiter):
+            c.put("a", {"ttl": 60}, {}, 1)
+            c.put("b", {"ttl": 60}, {}, 2)
+        skill_cache.invalidate(["a"])
+        for c in (cache, zweiter):
+            assert c.get("a", {"ttl": 60}, {})[0] is False
+            assert c.get("b", {"ttl": 60}, {})[0] is True
+
+    def test_clear_einzelner_skill(self, cache):
+        cache.put("a", {"ttl": 60}, {}, 1)
+        cache.put("b", {"ttl": 60}, {}, 2)
+        cache.clear(["a"])
+        assert cache.get("a", {"ttl": 60}, {})[0] is False
+        assert cache.get("b", {"ttl": 60}, {})[0] is True
+
+
+# ── SkillManager ──────────────────────────────────────────────────────────────
+
+def _schreibe_skill(verz, name, code):
+    (verz / f"{name}.py").write_text(textwrap.dedent(code), encoding="utf-8")
+
+
+@pytest.fixture
+def skills_dir(tmp_path, monkeypatch):
+    d = tmp_path / "skills"
+    d.mkdir()
+    zaehler = tmp_path / "aufrufe.txt"
+    _schreibe_skill(d, "wetter", f'''
+        def wetter(ort: str = "Offenburg"):
+            """Wetter abfragen."""
+            with open({str(zaehler)!r}, "a") as f:
+                f.write("x")
+            return f"Sonnig in {{ort}}"
+
+        SKILL_META = {{"wetter": {{"cache": {{"ttl": 600, "key": ["ort"]}}}}}}
+
+        AVAILABLE_SKILLS = [wetter]
+    ''')
+    monkeypatch.setattr(skill_manager, "SKILLS_DIR", str(d))
+    return d, zaehler
+
+
+class TestSkillManagerCache:
+
+    def _manager(self, tmp_path):
+        m = SkillManager()
+        m.cache.path = str(tmp_path / "skill_cache.json")
+        return m
+
+    def test_zweiter_aufruf_aus_cache(self, skills_dir, tmp_path):
+        _, zaehler = skills_dir
+        m = self._manager(tmp_path)
+        assert m.execute("wetter", ort="Kehl") == "Sonnig in Kehl"
+        assert m.execute("wetter", ort="Kehl") == "Sonnig in Kehl"
+        assert zaehler.read_text() == "x"
+        assert m.cache.stats()["skills"]["wetter"]["hits"] == 1
+
+    def test_geaenderte_datei_leert_cache(self, skills_dir, tmp_path):
+        d, zaehler = skills_dir
+        m = self._manager(tmp_path)
+        m.execute("wetter")
+        code = (d / "wetter.py").read_text(encoding="utf-8")
+        (d / "wetter.py").write_text(code.replace("Sonnig", "Regen"), encoding="utf-8")
+        m.reload()
+        assert m.execute("wetter") == "Regen in Offenburg"
+
+    def test_invalidates_nach_erfolg(self, skills_dir, tmp_path):
+        d, zaehler = skills_dir
+        _schreibe_skill(d, "ablegen", '''
+            def ablegen(ok: bool = True):
+                """Dokument ablegen."""
+                return "✅ abgelegt" if ok else "❌ fehlgeschlagen"
+
+            SKILL_META = {"ablegen": {"invalidates": ["wetter"]}}
+
+            AVAILABLE_SKILLS = [ablegen]
+        ''')
+        m = self._manager(tmp_path)
+        m.execute("wetter")
+        m.execute("ablegen", ok=False)
+        m.execute("wetter")
+        assert zaehler.read_text() == "x"
+        m.execute("ablegen")
+        m.execute("wetter")
+        assert zaehler.read_text() == "xx"
+
+
+class TestMitgelieferteSkills:
+
+    def test_wetter_fehler_wird_nicht_gecacht(self, cache, monkeypatch):
+        from skills import wetter_offenburg_abfragen as wetter
+
+        def kein_netz(*args, **kwargs):
+            raise ConnectionError("offline")
+
+        monkeypatch.setattr(wetter.requests, "get", kein_netz)
+        policy   = cache_policy(wetter.SKILL_META["wetter_offenburg_abfragen"])
+        ergebnis = wetter.wetter_offenburg_abfragen()
+        cache.put("wetter_offenburg_abfragen", policy, {}, ergebnis)
+        assert ergebnis.startswith("❌")
+        assert cache.get("wetter_offenburg_abfragen", policy, {})[0] is False
+
+    def test_erp_buchungen_leeren_kpi_bericht(self):
+        from skill_manager import _scan_file
+        pfad = os.path.join(os.path.dirname(skill_manager.__file__), "skills", "openphoenix_erp.py")
+        meta = {name: m for name, _, _, m in _scan_file(pfad) or []}
+        if not meta:
+            pytest.skip("openphoenix_erp nicht statisch lesbar (fehlende Pakete)")
+        for schreibend in ("erp_zahlung_buchen", "erp_rechnung_status_setzen",
+                           "erp_mahnlauf_komplett", "erp_mahnung_erstellen_und_senden"):
+            assert meta[schreibend]["invalidates"] == ["erp_kpi_bericht"]
+
+    def test_dms_einsortieren_leert_uebersicht(self):
+        from skills import dms
+        assert "dms_archiv_uebersicht" in dms.SKILL_META["dms_einsortieren"]["invalidates"]
+        assert "dms_archiv_uebersicht" in dms.SKILL_META["dms_loeschen"]["invalidates"]
@@ -0,0 +1,261 @@
+"""
+test_skill_executor.py – Tests für den Skill-Executor
+=====================================================
+Testet: Ausführung im Pool, Zeitlimit, Abbruch, hängende Skills,
+        verschachtelte Aufrufe,
+        Prozess-Ausführung, SKILL_META-Anbindung im SkillManager,
+        parallele SKILL-Aufrufe im Kernel
+"""
+import os
+import sys
+import time
+import textwrap
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import skill_manager
+from skill_manager import SkillManager
+from skill_executor import SkillExecutor
+
+
+@pytest.fixture
+def ex():
+    e = SkillExecutor(max_workers=2, process_workers=1)
+    yield e
+    e.shutdown()
+
+
+# ── Thread-Pool ───────────────────────────────────────────────────────────────
+
+class TestThreadAusfuehrung:
+
+    def test_ergebnis_wird_geliefert(self, ex):
+        assert ex.run("plus", lambda a, b: a + b, {"a": 1, "b": 2}) == 3
+
+    def test_laeuft_nicht_im_aufrufer_thread(self, ex):
+        name = ex.run("thread", lambda: threading.current_thread().name, {})
+        assert name.startswith("skill")
+
+    def test_exception_wird_weitergereicht(self, ex):
+        def kaputt():
+            raise ValueError("kaputt")
+        with pytest.raises(ValueError):
+            ex.run("kaputt", kaputt, {})
+
+    def test_zeitlimit_liefert_klaren_text(self, ex):
+        gestoppt = threading.Event()
+
+        def haengt(cancel_event):
+            cancel_event.wait(5)
+            gestoppt.set()
+
+        t0 = time.time()
+        result = ex.run("haengt", haengt, {}, meta={"timeout": 0.2})
+        assert time.time() - t0 < 2
+        assert result.startswith("⏱ Zeitüberschreitung: Skill 'haengt'")
+        assert gestoppt.wait(2), "cancel_event wurde nicht gesetzt"
+        assert ex.running() == []
+
+    def test_haengender_skill_blockiert_pool_nicht(self):
+        e         = SkillExecutor(max_workers=1)
+        loslassen = threading.Event()
+        try:
+            ergebnis = e.run("stur", lambda: loslassen.wait(5), {}, meta={"timeout": 0.2})
+            assert ergebnis.startswith("⏱")
+            assert e._hung
+            assert e.run("schnell", lambda: "ok", {}, meta={"timeout": 2}) == "ok"
+        finally:
+            loslassen.set()
+            e.shutdown()
+        ende = time.time() + 3
+        while e._hung and time.time() < ende:
+            time.sleep(0.01)
+        assert not e._hung
+
+    def test_timeout_aus_env(self, ex, monkeypatch):
+        monkeypatch.setenv("SKILL_TIMEOUT", "0.2")
+        result = ex.run("lang", lambda: time.sleep(1), {})
+        assert result.startswith("⏱")
+
+    def test_abbruch_von_aussen(self, ex):
+        gestartet = threading.Event()
+
+        def lang(cancel_event):
+            gestartet.set()
+            cancel_event.wait(5)
+
+        def abbrechen():
+            gestartet.wait(2)
+            call_id = ex.running()[0]["id"]
+            assert ex.cancel(call_id)
+
+        threading.Thread(target=abbrechen).start()
+        assert ex.run("lang", lang, {}, meta={"timeout": 5}) == "⛔ Skill 'lang' wurde abgebrochen"
+
+    def test_abbruch_unbekannte_id(self, ex):
+        assert ex.cancel("gibtsnicht") is False
+
+    def test_verschachtelter_aufruf_blockiert_nicht(self):
+        ex = SkillExecutor(max_workers=1)
+        try:
+            innen  = lambda: "innen"
+            aussen = lambda: "aussen+" + ex.run("innen", innen, {})
+            assert ex.run("aussen", aussen, {}, meta={"timeout": 2}) == "aussen+innen"
+        finally:
+            ex.shutdown()
+
+
+# ── Prozess-Ausführung ────────────────────────────────────────────────────────
+
+def _schreibe_skill(verz, name, code):
+    pfad = verz / f"{name}.py"
+    pfad.write_text(textwrap.dedent(code), encoding="utf-8")
+    return str(pfad)
+
+
+class TestProzessAusfuehrung:
+
+    def test_laeuft_in_eigenem_prozess(self, ex, tmp_path):
+        pfad = _schreibe_skill(tmp_path, "pid", '''
+            import os
+            def pid_skill(x: int = 0):
+                print("Ausgabe stört stdout nicht")
+                return {"pid": os.getpid(), "x": x}
+        ''')
+        result = ex.run("pid_skill", None, {"x": 5},
+                        meta={"executor": "process", "timeout": 30}, filepath=pfad)
+        assert result["x"] == 5
+        assert result["pid"] != os.getpid()
+
+    def test_zeitlimit_beendet_prozess(self, ex, tmp_path):
+        pfad = _schreibe_skill(tmp_path, "schlaf", '''
+            import time
+            def schlaf_skill():
+                time.sleep(30)
+        ''')
+        t0 = time.time()
+        result = ex.run("schlaf_skill", None, {},
+                        meta={"executor": "process", "timeout": 1}, filepath=pfad)
+        assert result.startswith("⏱")
+        assert time.time() - t0 < 5
+
+    def test_fehler_im_prozess(self, ex, tmp_path):
+        pfad = _schreibe_skill(tmp_path, "fehler", '''
+            def fehler_skill():
+                raise KeyError("weg")
+        ''')
+        with pytest.raises(RuntimeError, match="KeyError"):
+            ex.run("fehler_skill", None, {},
+                   meta={"executor": "process", "timeout": 30}, filepath=pfad)
+
+    def test_nicht_picklebare_parameter_laufen_im_thread(self, ex):
+        result = ex.run("lokal", lambda obj: obj(), {"obj": lambda: "thread"},
+                        meta={"executor": "process"}, filepath="egal.py")
+        assert result == "thread"
+
+
+# ── SkillManager-Anbindung ────────────────────────────────────────────────────
+
+class TestSkillMeta:
+
+    @pytest.fixture
+    def skills_dir(self, tmp_path, monkeypatch):
+        d = tmp_path / "skills"
+        d.mkdir()
+        _schreibe_skill(d, "meta", '''
+            import time
+
+            def meta_langsam():
+                """Braucht zu lange."""
+                time.sleep(2)
+                return "fertig"
+
+            def meta_schnell():
+                return "schnell"
+
+            SKILL_META = {"meta_langsam": {"timeout": 0.2}}
+
+            AVAILABLE_SKILLS = [meta_langsam, meta_schnell]
+        ''')
+        monkeypatch.setattr(skill_manager, "SKILLS_DIR", str(d))
+        return d
+
+    def test_meta_aus_ast(self, skills_dir):
+        m = SkillManager()
+        assert m.skill_meta["meta_langsam"] == {"timeout": 0.2}
+        assert m.skill_meta["meta_schnell"] == {}
+
+    def test_execute_nutzt_zeitlimit(self, skills_dir):
+        m = SkillManager()
+        assert m.execute("meta_langsam").startswith("⏱")
+        assert m.execute("meta_schnell") == "schnell"
+
+    def test_meta_auch_ohne_lazy_import(self, skills_dir, monkeypatch):
+        monkeypatch.setenv("SKILLS_LAZY_IMPORT", "false")
+        m = SkillManager()
+        assert m.skill_meta["meta_langsam"] == {"timeout": 0.2}
+
+
+# ── Kernel: mehrere SKILL-Aufrufe ─────────────────────────────────────────────
+
+class _LangsamerManager:
+    """Manager-Ersatz: jeder Skill schläft kurz und protokolliert Start/Ende."""
+
+    def __init__(self, meta=None):
+        self.skills     = {"a": None, "b": None, "c": None, "tel": None}
+        self.skill_meta = meta or {}
+        self.log        = []
+        self._lock      = threading.Lock()
+
+    def execute(self, name, **kwargs):
+        with self._lock:
+            self.log.append(("start", name))
+        time.sleep(0.2)
+        with self._lock:
+            self.log.append(("ende", name))
+        return f"<{name}{kwargs.get('x', '')}>"
+
+
+def _kernel(manager):
+    pytest.importorskip("dotenv")
+    from kernel import Kernel
+    from agent_state import AgentState
+    k = Kernel.__new__(Kernel)
+    k.state   = AgentState()
+    k.manager = manager
+    return k
+
+
+class TestParalleleSkillAufrufe:
+
+    def test_laufen_gleichzeitig_und_reihenfolge_bleibt(self):
+        k = _kernel(_LangsamerManager())
+        t0 = time.time()
+        antwort = k._handle_skill_calls(
+            'X SKILL:a(x="1") Y SKILL:b() Z SKILL:c()')
+        assert time.time() - t0 < 0.5
+        assert antwort == "X \n\n<a1>\n Y \n\n<b>\n Z \n\n<c>\n"
+
+    def test_serielle_skills_ueberlappen_nicht(self):
+        m = _LangsamerManager(meta={"tel": {"serial": True}})
+        k = _kernel(m)
+        k._handle_skill_calls('SKILL:tel(x="1") SKILL:tel(x="2") SKILL:a()')
+        tel = [e for e in m.log if e[1] == "tel"]
+        assert tel == [("start", "tel"), ("ende", "tel"),
+                       ("start", "tel"), ("ende", "tel")]
+
+    def test_fehler_bleibt_beim_aufruf(self):
+        m = _LangsamerManager()
+        k = _kernel(m)
+
+        def kaputt(name, params):
+            if name == "b":
+                raise RuntimeError("weg")
+            return f"<{name}>"
+
+        k._execute_skill_call = kaputt
+        antwort = k._handle_skill_calls("SKILL:a() SKILL:b()")
+        assert "<a>" in antwort
+        assert "❌ Fehler in Skill 'b': weg" in antwort
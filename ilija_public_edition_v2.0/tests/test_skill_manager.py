@@ -0,0 +1,413 @@
+"""
+test_skill_manager.py – Tests für SkillManager und Kernel-Prompt-Cache
+======================================================================
+Testet: Skill-Katalog-Cache, Invalidierung bei reload(),
+        System-Prompt-Memoisierung im Kernel, Claude Prompt-Caching,
+        Relevanz-Auswahl der Skills für den Prompt,
+        Lazy-Import (AST-Erkennung ohne Modulausführung),
+        inkrementelles Neuladen und Datei-Watcher
+"""
+import os
+import sys
+import textwrap
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import skill_manager
+from skill_manager import SkillManager
+
+
+def _schreibe_skill(verz, name, code):
+    (verz / f"{name}.py").write_text(textwrap.dedent(code), encoding="utf-8")
+
+
+@pytest.fixture
+def skills_dir(tmp_path, monkeypatch):
+    """Temporärer skills/-Ordner mit zwei einfachen Skills."""
+    d = tmp_path / "skills"
+    d.mkdir()
+    _schreibe_skill(d, "alpha", '''
+        def alpha_gruss(name: str = "Welt"):
+            """Begrüßt jemanden."""
+            return f"Hallo {name}"
+
+        AVAILABLE_SKILLS = [alpha_gruss]
+    ''')
+    _schreibe_skill(d, "beta", '''
+        def beta_zahl():
+            """Gibt 42 zurück."""
+            return 42
+    ''')
+    monkeypatch.setattr(skill_manager, "SKILLS_DIR", str(d))
+    return d
+
+
+# ── Skill-Katalog-Cache ───────────────────────────────────────────────────────
+
+class TestSkillKatalogCache:
+
+    def test_beschreibung_enthaelt_signatur_und_doc(self, skills_dir):
+        m = SkillManager()
+        desc = m.get_skills_description()
+        assert "alpha_gruss(name: str = 'Welt'): Begrüßt jemanden." in desc
+        assert "beta_zahl()" in desc
+
+    def test_beschreibung_wird_nur_einmal_erzeugt(self, skills_dir, monkeypatch):
+        m = SkillManager()
+        m.get_skills_description()
+        spy = MagicMock(side_effect=AssertionError("inspect.signature erneut aufgerufen"))
+        monkeypatch.setattr(skill_manager.inspect, "signature", spy)
+        m.get_skills_description()
+        spy.assert_not_called()
+
+    def test_reload_invalidiert_cache(self, skills_dir):
+        m = SkillManager()
+        v1 = m.version
+        assert "gamma_neu" not in m.get_skills_description()
+        _schreibe_skill(skills_dir, "gamma", '''
+            def gamma_neu():
+                """Neu hinzugekommen."""
+                return "neu"
+        ''')
+        m.reload()
+        assert m.version > v1
+        assert "gamma_neu" in m.get_skills_description()
+
+
+# ── Lazy-Import ───────────────────────────────────────────────────────────────
+
+class TestLazyImport:
+
+    def _schwerer_skill(self, verz):
+        marker = verz / "importiert.txt"
+        _schreibe_skill(verz, "schwer", f'''
+            open({str(marker)!r}, "a").write("x")
+
+            def schwer_rechnen(a: int, b: int = 2, *rest, modus: str = "schnell") -> int:
+                """Rechnet schwer."""
+                return a * b
+
+            def schwer_info():
+                """Info."""
+                return "info"
+
+            AVAILABLE_SKILLS = [schwer_rechnen, schwer_info]
+        ''')
+        return marker
+
+    def test_laden_fuehrt_modul_nicht_aus(self, skills_dir):
+        marker = self._schwerer_skill(skills_dir)
+        m = SkillManager()
+        assert not marker.exists()
+        assert m.skill_docs["schwer_rechnen"] == "Rechnet schwer."
+        assert ("- schwer_rechnen(a: int, b: int = 2, *rest, modus: str = 'schnell') -> int"
+                in m.get_skills_description())
+
+    def test_erster_aufruf_importiert_einmal(self, skills_dir):
+        marker = self._schwerer_skill(skills_dir)
+        m = SkillManager()
+        assert m.execute("schwer_rechnen", a=3) == 6
+        assert m.execute("schwer_info") == "info"
+        assert marker.read_text() == "x"
+        assert not isinstance(m.skills["schwer_info"], skill_manager._LazySkill)
+
+    def test_signatur_wie_beim_import(self, skills_dir):
+        import inspect
+        self._schwerer_skill(skills_dir)
+        m = SkillManager()
+        vorher = str(inspect.signature(m.skills["schwer_rechnen"]))
+        m.execute("schwer_info")
+        assert str(inspect.signature(m.skills["schwer_rechnen"])) == vorher
+
+    def test_dynamische_liste_wird_sofort_importiert(self, skills_dir):
+        _schreibe_skill(skills_dir, "dyn", '''
+            def dyn_eins():
+                return 1
+
+            AVAILABLE_SKILLS = [f for f in [dyn_eins]]
+        ''')
+        m = SkillManager()
+        assert not isinstance(m.skills["dyn_eins"], skill_manager._LazySkill)
+
+    def test_abschaltbar(self, skills_dir, monkeypatch):
+        monkeypatch.setenv("SKILLS_LAZY_IMPORT", "false")
+        marker = self._schwerer_skill(skills_dir)
+        SkillManager()
+        assert marker.exists()
+
+    def test_fehlendes_paket_wird_nicht_angeboten(self, skills_dir):
+        _schreibe_skill(skills_dir, "kaputt", '''
+            import gibt_es_nicht_modul
+
+            def kaputt_skill():
+                """Braucht ein fehlendes Paket."""
+
+            AVAILABLE_SKILLS = [kaputt_skill]
+        ''')
+        m = SkillManager()
+        assert "kaputt_skill" not in m.skills
+        assert "kaputt_skill" not in m.get_skills_description()
+        assert "alpha_gruss" in m.skills
+
+    def test_importfehler_beim_ersten_aufruf_meldet_ab(self, skills_dir):
+        _schreibe_skill(skills_dir, "halb", '''
+            from os import gibt_es_nicht
+
+            def halb_eins():
+                """Eins."""
+
+            def halb_zwei():
+                """Zwei."""
+
+            AVAILABLE_SKILLS = [halb_eins, halb_zwei]
+        ''')
+        m = SkillManager()
+        assert isinstance(m.skills["halb_eins"], skill_manager._LazySkill)
+        assert m.execute("halb_eins").startswith("❌ Fehler in Skill 'halb_eins'")
+        assert "halb_eins" not in m.skills and "halb_zwei" not in m.skills
+        assert "halb_zwei" not in m.get_skills_description()
+        assert m.refresh() is None                  # erst eine Änderung lädt neu
+
+
+# ── Inkrementelles Neuladen ───────────────────────────────────────────────────
+
+class TestInkrementellesNeuladen:
+
+    def test_ohne_aenderung_nichts_neu(self, skills_dir, monkeypatch):
+        m = SkillManager()
+        v = m.version
+        monkeypatch.setattr(skill_manager, "_scan_file",
+                            MagicMock(side_effect=AssertionError("neu eingelesen")))
+        assert "keine Änderungen" in m.reload()
+        assert m.version == v
+
+    def test_nur_geaenderte_datei_wird_eingelesen(self, skills_dir, monkeypatch):
+        m = SkillManager()
+        alpha_alt = m.skills["alpha_gruss"]
+        _schreibe_skill(skills_dir, "beta", '''
+            def beta_zahl():
+                """Gibt 43 zurück."""
+                return 43
+
+            def beta_neu():
+                return 0
+        ''')
+        echt = skill_manager._scan_file
+        gelesen = []
+        monkeypatch.setattr(skill_manager, "_scan_file",
+                            lambda p: gelesen.append(os.path.basename(p)) or echt(p))
+        msg = m.reload()
+        assert "1 geändert" in msg
+        assert gelesen == ["beta.py"]
+        assert m.execute("beta_zahl") == 43
+        assert "beta_neu" in m.skills
+        assert m.skills["alpha_gruss"] is alpha_alt
+        assert list(m.skills)[0] == "alpha_gruss"
+
+    def test_nur_touch_ohne_inhaltsaenderung(self, skills_dir):
+        m = SkillManager()
+        v = m.version
+        datei = skills_dir / "alpha.py"
+        st = datei.stat()
+        os.utime(datei, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+        assert m.refresh() is None
+        assert m.version == v
+
+    def test_neue_und_geloeschte_datei(self, skills_dir):
+        m = SkillManager()
+        _schreibe_skill(skills_dir, "gamma", '''
+            def gamma_neu():
+                return "neu"
+
+            AVAILABLE_SKILLS = [gamma_neu]
+        ''')
+        (skills_dir / "beta.py").unlink()
+        changes = m.refresh()
+        assert changes == {"added": ["gamma.py"], "changed": [], "removed": ["beta.py"]}
+        assert "gamma_neu" in m.skills and "beta_zahl" not in m.skills
+        assert "beta_zahl" not in m.get_skills_description()
+
+    def test_fehlerhafte_datei_entfernt_ihre_skills(self, skills_dir):
+        m = SkillManager()
+        (skills_dir / "alpha.py").write_text("def kaputt(:\n", encoding="utf-8")
+        m.refresh()
+        assert "alpha_gruss" not in m.skills
+        assert "beta_zahl" in m.skills
+
+    def test_watcher_uebernimmt_aenderungen(self, skills_dir):
+        import time
+        m = SkillManager()
+        m.start_watcher(interval=0.02)
+        try:
+            _schreibe_skill(skills_dir, "gamma", '''
+                def gamma_neu():
+                    return "neu"
+
+                AVAILABLE_SKILLS = [gamma_neu]
+            ''')
+            ende = time.time() + 2
+            while "gamma_neu" not in m.skills and time.time() < ende:
+                time.sleep(0.02)
+            assert "gamma_neu" in m.skills
+        finally:
+            m.stop_watcher()
+
+
+# ── Kernel System-Prompt ──────────────────────────────────────────────────────
+
+class TestKernelPromptCache:
+
+    def _kernel(self, manager):
+        pytest.importorskip("dotenv")
+        from kernel import Kernel
+        from agent_state import AgentState
+        k = Kernel.__new__(Kernel)
+        k.state   = AgentState()
+        k.manager = manager
+        k.state.active_provider = "Claude"
+        k._prompt_cache = None
+        return k
+
+    def test_prompt_wird_wiederverwendet(self, skills_dir):
+        k = self._kernel(SkillManager())
+        assert k.get_system_prompt() is k.get_system_prompt()
+
+    def test_reload_erzeugt_neuen_prompt(self, skills_dir):
+        k = self._kernel(SkillManager())
+        alt = k.get_system_prompt()
+        _schreibe_skill(skills_dir, "gamma", '''
+            def gamma_neu():
+                return "neu"
+        ''')
+        k.reload_skills()
+        neu = k.get_system_prompt()
+        assert "gamma_neu" in neu and "gamma_neu" not in alt
+
+    def test_providerwechsel_erzeugt_neuen_prompt(self, skills_dir):
+        k = self._kernel(SkillManager())
+        assert "Aktueller Provider: Claude" in k.get_system_prompt()
+        k.state.active_provider = "Gemini"
+        assert "Aktueller Provider: Gemini" in k.get_system_prompt()
+
+
+# ── Claude Prompt-Caching ─────────────────────────────────────────────────────
+
+class TestClaudePromptCaching:
+
+    def _provider(self):
+        pytest.importorskip("dotenv")
+        from providers import ClaudeProvider
+        p = ClaudeProvider.__new__(ClaudeProvider)
+        p.model = "claude-test"
+        return p
+
+    def test_system_prompt_mit_cache_control(self, monkeypatch):
+        monkeypatch.delenv("ANTHROPIC_PROMPT_CACHE", raising=False)
+        kwargs = self._provider()._request_kwargs([], system="Großer Prompt")
+        assert kwargs["system"] == [{"type": "text", "text": "Großer Prompt",
+                                     "cache_control": {"type": "ephemeral"}}]
+
+    def test_auswahl_hinter_dem_breakpoint(self, monkeypatch):
+        monkeypatch.delenv("ANTHROPIC_PROMPT_CACHE", raising=False)
+        from providers import SystemPrompt
+        kwargs = self._provider()._request_kwargs([], system=SystemPrompt("Regeln", "Auswahl"))
+        assert kwargs["system"] == [{"type": "text", "text": "Regeln",
+                                     "cache_control": {"type": "ephemeral"}},
+                                    {"type": "text", "text": "Auswahl"}]
+
+    def test_prompt_caching_abschaltbar(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_PROMPT_CACHE", "false")
+        kwargs = self._provider()._request_kwargs([], system="Prompt")
+        assert kwargs["system"] == "Prompt"
+
+    def test_ohne_system_kein_system_feld(self):
+        assert "system" not in self._provider()._request_kwargs([])
+
+
+# ── Relevanz-Auswahl ──────────────────────────────────────────────────────────
+
+@pytest.fixture
+def viele_skills(tmp_path, monkeypatch):
+    """skills/-Ordner mit genug Skills, damit die Auswahl greift."""
+    d = tmp_path / "skills"
+    d.mkdir()
+    _schreibe_skill(d, "mix", '''
+        def wuerfeln(max: int = 6):
+            """Würfelt eine Zufallszahl zwischen 1 und max."""
+        def uhrzeit_datum():
+            """Gibt aktuelle Uhrzeit und Datum zurück."""
+        def gedaechtnis_speichern(information: str):
+            """Speichert eine Information im Langzeitgedächtnis."""
+        def google_kalender_termine(tage: int = 7):
+            """Listet kommende Termine aus dem Google Kalender."""
+        def email_senden(an: str, betreff: str):
+            """Sendet eine E-Mail."""
+        def erp_rechnung_erstellen(kunde: str):
+            """Erstellt eine Rechnung im ERP-System."""
+        def dms_einsortieren():
+            """Sortiert Dokumente im Dokumentenmanagement ein."""
+        def tv_jetzt():
+            """Zeigt was gerade im Fernsehen läuft."""
+
+        AVAILABLE_SKILLS = [wuerfeln, uhrzeit_datum, gedaechtnis_speichern,
+                            google_kalender_termine, email_senden,
+                            erp_rechnung_erstellen, dms_einsortieren, tv_jetzt]
+    ''')
+    monkeypatch.setattr(skill_manager, "SKILLS_DIR", str(d))
+    return d
+
+
+class TestSkillAuswahl:
+
+    def test_passender_skill_und_kern_skills(self, viele_skills):
+        m = SkillManager()
+        namen = m.select_relevant_skills("Würfel mal", top_k=2)
+        assert "wuerfeln" in namen
+        assert {"uhrzeit_datum", "gedaechtnis_speichern"} <= set(namen)
+        assert "erp_rechnung_erstellen" not in namen
+
+    def test_docstring_wird_durchsucht(self, viele_skills):
+        m = SkillManager()
+        namen = m.select_relevant_skills("Welche Termine habe ich?", top_k=1)
+        assert "google_kalender_termine" in namen
+
+    def test_top_k_null_liefert_alle(self, viele_skills):
+        m = SkillManager()
+        assert m.select_relevant_skills("Würfel", top_k=0) == list(m.skills)
+
+    def test_leere_anfrage_liefert_alle(self, viele_skills):
+        m = SkillManager()
+        assert m.select_relevant_skills("", top_k=2) == list(m.skills)
+
+    def test_teilkatalog(self, viele_skills):
+        m = SkillManager()
+        desc = m.get_skills_description(["wuerfeln", "gibts_nicht"])
+        assert desc.startswith("- wuerfeln(max: int = 6)")
+        assert "tv_jetzt" not in desc
+
+    def test_kernel_prompt_nur_mit_relevanten_skills(self, viele_skills, monkeypatch):
+        monkeypatch.setenv("SKILL_PROMPT_TOP_K", "2")
+        k = TestKernelPromptCache()._kernel(SkillManager())
+        k.state.add_message("user", "Würfel mal")
+        prompt = k.get_system_prompt()
+        assert "- wuerfeln(" in prompt
+        assert "erp_rechnung_erstellen" not in prompt
+        assert k.get_system_prompt() is prompt
+
+    def test_stabiler_anfang_bei_wechselnder_auswahl(self, viele_skills, monkeypatch):
+        monkeypatch.setenv("SKILL_PROMPT_TOP_K", "1")
+        k = TestKernelPromptCache()._kernel(SkillManager())
+        wuerfel = k.get_system_prompt("Würfel mal")
+        rechnung = k.get_system_prompt("Rechnung erstellen")
+        assert wuerfel.static == rechnung.static
+        assert wuerfel.startswith(wuerfel.static) and "- uhrzeit_datum(" in wuerfel.static
+        assert "- wuerfeln(" in wuerfel.dynamic and "- wuerfeln(" not in wuerfel.static
+        assert "- erp_rechnung_erstellen(" in rechnung.dynamic
+
+    def test_kernel_fallback_auf_alle_skills(self, viele_skills, monkeypatch):
+        monkeypatch.setenv("SKILL_PROMPT_TOP_K", "0")
+        k = TestKernelPromptCache()._kernel(SkillManager())
+        k.state.add_message("user", "Würfel mal")
+        assert "erp_rechnung_erstellen" in k.get_system_prompt()
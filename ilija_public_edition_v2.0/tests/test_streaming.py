@@ -0,0 +1,127 @@
+"""
+test_streaming.py – Tests für Token-Streaming (Provider + Kernel)
+=================================================================
+Testet: Provider.chat_stream() Fallback, Kernel.chat_stream() Events,
+        SKILL-Erkennung über Chunk-Grenzen hinweg, Fehlerbehandlung
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("dotenv")
+
+from helpers import _MockSkillManager
+from agent_state import AgentState, AgentStatus
+
+
+class _FakeStreamProvider:
+    """Provider-Ersatz der eine feste Chunk-Folge liefert."""
+
+    def __init__(self, chunks, fehler=None):
+        self.chunks = chunks
+        self.fehler = fehler
+        self.aufrufe = []
+
+    def chat_stream(self, messages, system=None):
+        self.aufrufe.append(list(messages))
+        for c in self.chunks:
+            yield c
+        if self.fehler:
+            raise self.fehler
+
+
+def _make_kernel(provider):
+    from kernel import Kernel
+    k = Kernel.__new__(Kernel)
+    k.state    = AgentState()
+    k.manager  = _MockSkillManager()
+    k.provider = provider
+    k.state.active_provider = "Fake"
+    k.get_system_prompt = lambda: "System"
+    return k
+
+
+def _text(events):
+    return "".join(e["text"] for e in events if e["type"] == "token")
+
+
+# ── Provider-Fallback ─────────────────────────────────────────────────────────
+
+class TestProviderFallback:
+
+    def test_basis_provider_liefert_chat_als_einen_chunk(self):
+        from providers import Provider
+
+        class _P(Provider):
+            def chat(self, messages, system=None):
+                return "komplett"
+
+        assert list(_P("x").chat_stream([])) == ["komplett"]
+
+
+# ── Kernel.chat_stream ────────────────────────────────────────────────────────
+
+class TestKernelChatStream:
+
+    def test_tokens_werden_einzeln_geliefert(self):
+        k = _make_kernel(_FakeStreamProvider(["Hal", "lo ", "Welt"]))
+        events = list(k.chat_stream("Hi"))
+        tokens = [e for e in events if e["type"] == "token"]
+        assert len(tokens) >= 2
+        assert _text(events) == "Hallo Welt"
+        assert events[-1] == {"type": "done", "response": "Hallo Welt"}
+
+    def test_verlauf_wird_aktualisiert(self):
+        k = _make_kernel(_FakeStreamProvider(["Antwort"]))
+        list(k.chat_stream("Frage"))
+        assert k.state.chat_history[-2] == {"role": "user", "content": "Frage"}
+        assert k.state.chat_history[-1] == {"role": "assistant", "content": "Antwort"}
+        assert k.state.status == AgentStatus.IDLE
+
+    def test_skill_ueber_chunk_grenzen_wird_ausgefuehrt(self):
+        k = _make_kernel(_FakeStreamProvider(
+            ["Klar! SKI", "LL:wuerf", "eln(", ") fertig"]))
+        events = list(k.chat_stream("Würfel mal"))
+        skills = [e for e in events if e["type"] == "skill"]
+        assert len(skills) == 1
+        assert skills[0]["skill"] == "wuerfeln"
+        assert "🎲" in skills[0]["result"]
+        # Der rohe Aufruf darf nie als Text beim Nutzer ankommen
+        assert "SKILL:" not in _text(events)
+        assert "🎲" in events[-1]["response"]
+        assert events[-1]["response"].startswith("Klar! ")
+        assert events[-1]["response"].endswith(" fertig")
+
+    def test_mehrere_skills_in_einem_stream(self):
+        k = _make_kernel(_FakeStreamProvider(
+            ["SKILL:wuerfeln() und SKILL:muenze_werfen()"]))
+        events = list(k.chat_stream("Beides"))
+        assert [e["skill"] for e in events if e["type"] == "skill"] == \
+               ["wuerfeln", "muenze_werfen"]
+
+    def test_skill_wort_ohne_aufruf_bleibt_text(self):
+        k = _make_kernel(_FakeStreamProvider(["Das SKILL: ist ", "kein Aufruf"]))
+        events = list(k.chat_stream("x"))
+        assert _text(events) == "Das SKILL: ist kein Aufruf"
+        assert not [e for e in events if e["type"] == "skill"]
+
+    def test_unvollstaendiger_aufruf_am_ende_wird_ausgegeben(self):
+        k = _make_kernel(_FakeStreamProvider(["Ende SKILL:wuerfeln("]))
+        events = list(k.chat_stream("x"))
+        assert _text(events) == "Ende SKILL:wuerfeln("
+
+    def test_gleiches_ergebnis_wie_nicht_streaming(self):
+        antwort = 'Los: SKILL:notizen_lesen(datei="gibtsnicht.txt") ok'
+        k1 = _make_kernel(_FakeStreamProvider(list(antwort)))
+        stream_resp = list(k1.chat_stream("x"))[-1]["response"]
+        k2 = _make_kernel(None)
+        assert stream_resp == k2._handle_skill_calls(antwort)
+
+    def test_provider_fehler_liefert_error_event(self):
+        k = _make_kernel(_FakeStreamProvider(["Teil"], fehler=RuntimeError("kaputt")))
+        events = list(k.chat_stream("x"))
+        assert events[-1]["type"] == "error"
+        assert "kaputt" in events[-1]["error"]
+        assert k.state.status == AgentStatus.ERROR
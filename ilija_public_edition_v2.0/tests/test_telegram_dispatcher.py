@@ -0,0 +1,292 @@
+"""
+test_telegram_dispatcher.py – Tests für die zentrale Telegram-Update-Verteilung
+===============================================================================
+Testet: Verteilung an Postfächer und Abonnenten, Offset, getUpdates-Aufruf,
+        Postfächer über Neustarts, Sperre gegen zweiten Prozess, lesende Telegram-Nodes ohne gegenseitiges
+        Wegnehmen, Sofortstart gespeicherter Workflows mit Nachlauf,
+        Postfächer aller Lese-Nodes beim Start, Webhook-Route
+"""
+import os
+import sys
+import json
+import time
+import threading
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("flask")
+
+import telegram_dispatcher
+import workflow_routes
+from telegram_dispatcher import TelegramDispatcher
+from helpers import MockKernel, make_node, make_connection
+
+
+def _update(uid, text="Hallo"):
+    return {"update_id": uid,
+            "message": {"from": {"first_name": "Anna"}, "date": 0, "text": text}}
+
+
+@pytest.fixture
+def umgebung(tmp_path, monkeypatch):
+    """Arbeitsverzeichnis, frische Dispatcher-Registry, Modus webhook (kein Netz)."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TELEGRAM_UPDATES", "webhook")
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "tok")
+    monkeypatch.setattr(telegram_dispatcher, "_dispatchers", {})
+    monkeypatch.setattr(telegram_dispatcher, "_locks", {})
+    monkeypatch.setattr(workflow_routes, "_plan_cache", workflow_routes.OrderedDict())
+    return tmp_path
+
+
+# ── Dispatcher ────────────────────────────────────────────────────────────────
+
+class TestDispatcher:
+
+    def test_verteilung_an_alle_postfaecher(self, umgebung):
+        d = TelegramDispatcher("tok")
+        d.mailbox("a")
+        d.mailbox("b")
+        assert d.feed([_update(1), _update(2)]) == 2
+        assert [u["update_id"] for u in d.take("a", 1)] == [1]
+        assert [u["update_id"] for u in d.take("a", 5)] == [2]
+        assert [u["update_id"] for u in d.take("b", 5)] == [1, 2]
+
+    def test_offset_und_doppelte_updates(self, umgebung):
+        d = TelegramDispatcher("tok")
+        d.mailbox("a")
+        d.feed([_update(5)])
+        assert d.feed([_update(5), _update(4)]) == 0
+        assert json.loads(open(d.offset_file).read()) == {"last_update_id": 5}
+        assert TelegramDispatcher("tok").offset == 5
+
+    def test_neustart_verliert_nichts(self, umgebung):
+        d = TelegramDispatcher("tok")
+        d.mailbox("a")
+        d.mailbox("b")
+        d.feed([_update(1), _update(2)])
+        assert [u["update_id"] for u in d.take("a", 1)] == [1]
+        d.close()
+
+        neu = TelegramDispatcher("tok")            # Prozess neu gestartet
+        assert neu.offset == 2
+        assert [u["update_id"] for u in neu.take("a", 5)] == [2]
+        assert [u["update_id"] for u in neu.take("b", 5)] == [1, 2]
+        neu.feed([_update(3)])
+        assert [u["update_id"] for u in neu.take("b", 5)] == [3]
+
+    def test_entnommene_updates_werden_geloescht(self, umgebung):
+        d = TelegramDispatcher("tok")
+        d.mailbox("a")
+        d.feed([_update(1), _update(2)])
+        d.take("a", 5)
+        d.feed([_update(3)])
+        assert d._db().execute("SELECT update_id FROM updates").fetchall() == [(3,)]
+
+    def test_postfach_grenze(self, umgebung, monkeypatch):
+        monkeypatch.setattr(telegram_dispatcher, "MAILBOX_SIZE", 2)
+        d = TelegramDispatcher("tok")
+        d.mailbox("a")
+        d.feed([_update(i) for i in range(1, 5)])
+        assert [u["update_id"] for u in d.take("a", 5)] == [3, 4]
+
+    def test_zweiter_prozess_fragt_telegram_nie(self, umgebung, monkeypatch):
+        monkeypatch.setattr(telegram_dispatcher, "FOLLOW_INTERVAL", 0.01)
+        # Sperre über eine eigene Datei-Beschreibung = wie ein anderer Prozess
+        fremd = telegram_dispatcher._lock_file(telegram_dispatcher.OFFSET_FILE + ".lock")
+        try:
+            folger = TelegramDispatcher("tok", mode="poll")
+        finally:
+            fremd.close()
+        abholer = TelegramDispatcher("tok", mode="poll")
+        assert folger.owner is False and folger.mode == "follow"
+        assert abholer.owner is True
+
+        def verboten(*args, **kwargs):
+            raise AssertionError("getUpdates im zweiten Prozess")
+
+        folger._call = verboten
+        assert folger.poll_once(25) == 0
+        erhalten = []
+        folger.subscribe("bot", erhalten.append)
+        folger.mailbox("leser")
+        folger.start()
+        try:
+            abholer.feed([_update(1), _update(2)])
+            ende = time.time() + 3
+            while len(erhalten) < 2 and time.time() < ende:
+                time.sleep(0.01)
+        finally:
+            folger.stop()
+        assert [u["update_id"] for u in erhalten] == [1, 2]
+        assert [u["update_id"] for u in folger.take("leser", 5)] == [1, 2]
+        assert json.loads(open(abholer.offset_file).read()) == {"last_update_id": 2}
+
+    def test_abonnenten_einzeln_abgesichert(self, umgebung):
+        d = TelegramDispatcher("tok")
+        erhalten = []
+        d.subscribe("kaputt", lambda u: 1 / 0)
+        d.subscribe("bot", erhalten.append)
+        d.feed([_update(1)])
+        assert [u["update_id"] for u in erhalten] == [1]
+        d.unsubscribe("bot")
+        d.feed([_update(2)])
+        assert len(erhalten) == 1
+
+    def test_poll_once(self, umgebung):
+        d = TelegramDispatcher("tok")
+        d.offset = 7
+        aufrufe = []
+
+        def call(method, params, timeout):
+            aufrufe.append((method, params))
+            return [_update(8)]
+
+        d._call = call
+        assert d.poll_once(25) == 1
+        assert aufrufe == [("getUpdates", {"offset": 8, "timeout": 25, "limit": 100})]
+        assert d.offset == 8
+
+
+# ── Telegram-Node ─────────────────────────────────────────────────────────────
+
+class TestTelegramNode:
+
+    def test_zwei_leser_nehmen_sich_nichts_weg(self, umgebung):
+        from workflow_routes import run_workflow
+        d = telegram_dispatcher.get_dispatcher("tok")
+        wf = {"nodes": [make_node("leser1", "telegram", {"operation": "read", "token": "tok"}),
+                        make_node("leser2", "telegram", {"operation": "read", "token": "tok"})],
+              "connections": []}
+        run_workflow(wf, kernel=MockKernel())        # legt die Postfächer an
+        d.feed([_update(1, "Termin morgen?")])
+        res = run_workflow(wf, kernel=MockKernel())["results"]
+        assert "Anna: Termin morgen?" in res["leser1"]
+        assert "Anna: Termin morgen?" in res["leser2"]
+        res = run_workflow(wf, kernel=MockKernel())["results"]
+        assert res["leser1"].startswith("📭")
+
+    def test_postfach_je_workflow(self, umgebung):
+        from workflow_routes import run_workflow
+        d     = telegram_dispatcher.get_dispatcher("tok")
+        nodes = [make_node("tg", "telegram", {"operation": "read", "token": "tok"})]
+        kopie1, kopie2, editor = ({"id": "wf1", "nodes": nodes, "connections": []},
+                                  {"id": "wf2", "nodes": nodes, "connections": []},
+                                  {"nodes": nodes, "connections": []})
+        for wf in (kopie1, kopie2, editor):
+            run_workflow(wf, kernel=MockKernel())    # legt die Postfächer an
+        d.feed([_update(1, "Für alle")])
+        assert "Anna: Für alle" in run_workflow(editor, kernel=MockKernel())["output"]
+        assert "Anna: Für alle" in run_workflow(kopie1, kernel=MockKernel())["output"]
+        assert "Anna: Für alle" in run_workflow(kopie2, kernel=MockKernel())["output"]
+
+    def test_modus_off_fragt_bei_jedem_lesen(self, umgebung, monkeypatch):
+        from workflow_routes import run_workflow
+        monkeypatch.setenv("TELEGRAM_UPDATES", "off")
+        d = telegram_dispatcher.get_dispatcher("tok")
+        d._call = lambda method, params, timeout: [_update(params["offset"])]
+        wf = {"nodes": [make_node("r", "telegram", {"operation": "read", "token": "tok",
+                                                     "anzahl": 1})],
+              "connections": []}
+        assert "Anna: Hallo" in run_workflow(wf, kernel=MockKernel())["output"]
+        assert d.offset == 1
+
+
+# ── Sofortstart ───────────────────────────────────────────────────────────────
+
+def _speichere(verzeichnis, wid, ausloesen="sofort"):
+    os.makedirs(verzeichnis, exist_ok=True)
+    wf = {"name": wid,
+          "nodes": [make_node("tg", "telegram", {"operation": "read", "ausloesen": ausloesen}),
+                    make_node("s", "set", {"value": "{{input}}"})],
+          "connections": [make_connection("tg", "s")]}
+    with open(os.path.join(verzeichnis, f"{wid}.json"), "w", encoding="utf-8") as f:
+        json.dump(wf, f)
+
+
+class TestSofortstart:
+
+    def test_neue_nachricht_startet_workflow(self, umgebung):
+        verzeichnis = str(umgebung / "workflows")
+        _speichere(verzeichnis, "sofort")
+        _speichere(verzeichnis, "zeitplan", ausloesen="")
+        index    = workflow_routes.WebhookIndex(verzeichnis)
+        triggers = workflow_routes.TelegramTriggers(index)
+        assert [t[0]["id"] for t in index.telegram_triggers()] == ["sofort"]
+
+        laeufe = []
+        fertig = threading.Event()
+
+        def lauf(definition, name):
+            kernel = MockKernel()
+            laeufe.append(workflow_routes.run_workflow(definition, kernel=kernel)["output"])
+            fertig.set()
+
+        with patch.object(workflow_routes, "_run_scheduled", lauf):
+            triggers.sync()
+            telegram_dispatcher.get_dispatcher("tok").feed([_update(1, "Bitte zurückrufen")])
+            assert fertig.wait(3)
+        assert "Anna: Bitte zurückrufen" in laeufe[0]
+
+    def test_postfaecher_aller_leser_beim_start(self, umgebung):
+        from workflow_routes import run_workflow
+        verzeichnis = str(umgebung / "workflows")
+        _speichere(verzeichnis, "zeitplan", ausloesen="")
+        index = workflow_routes.WebhookIndex(verzeichnis)
+        workflow_routes.TelegramTriggers(index).sync()
+        telegram_dispatcher.get_dispatcher("tok").feed([_update(1, "Vor dem ersten Lauf")])
+
+        definition = index.telegram_readers()[0][0]
+        res = run_workflow(definition, kernel=MockKernel())
+        assert "Anna: Vor dem ersten Lauf" in res["output"]
+
+    def test_nachlauf_statt_paralleler_laeufe(self, umgebung):
+        triggers = workflow_routes.TelegramTriggers(workflow_routes.WebhookIndex(str(umgebung)))
+        freigabe = threading.Event()
+        laeufe   = []
+
+        def lauf(definition, name):
+            laeufe.append(name)
+            freigabe.wait(3)
+
+        with patch.object(workflow_routes, "_run_scheduled", lauf):
+            for _ in range(3):
+                triggers._fire({"id": "wf", "name": "wf"})
+            freigabe.set()
+            ende = time.time() + 3
+            while triggers._running and time.time() < ende:
+                time.sleep(0.01)
+        assert laeufe == ["wf", "wf"]
+
+
+# ── Webhook-Route ─────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(umgebung, monkeypatch):
+    from flask import Flask
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    with patch("workflow_routes._start_scheduler"):
+        workflow_routes.register_workflow_routes(app, lambda: MockKernel(), threading.Lock())
+    yield app.test_client()
+    workflow_routes._run_store.close()
+
+
+class TestWebhookRoute:
+
+    def test_update_wird_verteilt(self, client, monkeypatch):
+        monkeypatch.setenv("TELEGRAM_WEBHOOK_SECRET", "geheim")
+        d = telegram_dispatcher.get_dispatcher("tok")
+        d.mailbox("x")
+        r = client.post("/api/telegram/update", json=_update(3))
+        assert r.status_code == 403
+        r = client.post("/api/telegram/update", json=_update(3),
+                        headers={"X-Telegram-Bot-Api-Secret-Token": "geheim"})
+        assert r.status_code == 200
+        assert [u["update_id"] for u in d.take("x", 5)] == [3]
+
+    def test_nur_im_webhook_modus(self, client, monkeypatch):
+        monkeypatch.setenv("TELEGRAM_UPDATES", "poll")
+        assert client.post("/api/telegram/update", json=_update(1)).status_code == 404
@@ -2,11 +2,16 @@
 test_workflow_engine.py – Tests für die Workflow-Engine
 ========================================================
 Testet: Topologische Sortierung, Node-Ausführung, ChatFilter,
-        workflow_stopped Propagation, Memory Write-Back, Code-Node Sandbox
+        workflow_stopped Propagation, Memory Write-Back, Code-Node Sandbox,
+        parallele Ausführung unabhängiger Zweige, eigener Ausführungskontext pro Lauf,
+        Sub-Workflows und Webhooks ohne HTTP-Umweg (run_workflow), Webhook-Index,
+        kompilierte Pläne (Cache pro Fassung) und Node-Handler-Registry,
+        Loop-Node (alle Node-Typen im Körper, parallele Elemente)
 """
 import os
 import sys
 import json
+import time
 import pytest
 import threading
 from unittest.mock import MagicMock, patch
@@ -374,3 +379,508 @@ class TestTopologischeAusfuehrung:
         data = resp.get_json()
         assert data["statuses"]["a2"] == "success"
         assert data["statuses"]["b2"] == "success"
+
+
+# ── Parallele Ausführung ──────────────────────────────────────────────────────
+
+def _ausfuehren(client, nodes, conns=None, **extra):
+    payload = {**workflow_payload(nodes, conns), **extra}
+    resp    = client.post("/api/workflow/execute", json=payload,
+                          content_type="application/json")
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+class TestParalleleAusfuehrung:
+
+    def test_unabhaengige_zweige_laufen_gleichzeitig(self, wf_client):
+        client, _ = wf_client
+        nodes = [
+            make_node("w1",  "wait", {"sekunden": 1}),
+            make_node("w2",  "wait", {"sekunden": 1}),
+            make_node("end", "set",  {"value": "fertig"}),
+        ]
+        conns = [make_connection("w1", "end"), make_connection("w2", "end")]
+        t0    = time.time()
+        data  = _ausfuehren(client, nodes, conns, max_parallel=4)
+        assert time.time() - t0 < 1.8
+        assert data["statuses"] == {"w1": "success", "w2": "success", "end": "success"}
+
+    def test_gleiche_ergebnisse_wie_sequenziell(self, wf_client):
+        client, _ = wf_client
+        nodes = [
+            make_node("t",  "trigger", {"startMessage": "Start"}),
+            make_node("a",  "set",     {"value": "A: {{input}}"}),
+            make_node("b",  "code",    {"code": "print('B')"}),
+            make_node("c",  "code",    {"code": "print('C')"}),
+            make_node("ab", "set",     {"value": "{{input}}"}),
+            make_node("x",  "note",    {"text": "isoliert"}),
+        ]
+        conns = [make_connection("t", "a"), make_connection("t", "b"),
+                 make_connection("t", "c"), make_connection("a", "ab"),
+                 make_connection("b", "ab"), make_connection("c", "ab")]
+        seq = _ausfuehren(client, nodes, conns, max_parallel=1)
+        par = _ausfuehren(client, nodes, conns, max_parallel=8)
+        assert par["results"] == seq["results"]
+        assert par["statuses"] == seq["statuses"]
+        assert par["order"] == seq["order"]
+        assert par["results"]["ab"] == "A: Start\nB\nC"
+
+    def test_chatfilter_stoppt_nur_spaetere_nodes(self, wf_client):
+        """Ein früherer, langsamer Zweig läuft zu Ende, spätere Nodes werden übersprungen."""
+        client, _ = wf_client
+        nodes = [
+            make_node("t1",   "trigger",    {"startMessage": "x"}),
+            make_node("t2",   "set",        {"value": ""}),
+            make_node("slow", "wait",       {"sekunden": 1}),
+            make_node("cf",   "chatfilter", {"modus": "einfach"}),
+            make_node("a",    "set",        {"value": "A"}),
+            make_node("b",    "set",        {"value": "B"}),
+        ]
+        conns = [make_connection("t1", "slow"), make_connection("t2", "cf"),
+                 make_connection("slow", "a"), make_connection("cf", "b")]
+        data = _ausfuehren(client, nodes, conns, max_parallel=4)
+        assert data["order"] == ["t1", "t2", "slow", "cf", "a", "b"]
+        assert data["statuses"]["slow"] == "success"
+        assert data["statuses"]["cf"] == "skipped"
+        assert data["statuses"]["a"] == "skipped"
+        assert data["statuses"]["b"] == "skipped"
+
+    def test_fehler_handler_stoppen_bricht_ab(self, wf_client):
+        client, _ = wf_client
+        nodes = [
+            make_node("t",  "trigger",       {"startMessage": "kaputt"}),
+            make_node("eh", "error_handler", {"aktion": "stoppen"}),
+            make_node("n",  "set",           {"value": "danach"}),
+        ]
+        conns = [make_connection("t", "eh"), make_connection("eh", "n")]
+        data  = _ausfuehren(client, nodes, conns, max_parallel=4)
+        assert data["statuses"]["eh"] == "error"
+        assert "n" not in data["statuses"]
+
+    def test_code_nodes_vermischen_ausgaben_nicht(self, wf_client):
+        client, _ = wf_client
+        nodes = [make_node(f"c{i}", "code", {"code": f"for _ in range(200): print({i})"})
+                 for i in range(4)]
+        data  = _ausfuehren(client, nodes, max_parallel=4)
+        for i in range(4):
+            assert set(data["results"][f"c{i}"].split()) == {str(i)}
+
+
+class TestRunDag:
+
+    def test_begrenzt_gleichzeitige_nodes(self):
+        from workflow_routes import _run_dag
+        order   = [f"n{i}" for i in range(6)]
+        aktiv   = []
+        maximum = []
+        lock    = threading.Lock()
+
+        def run(nid):
+            with lock:
+                aktiv.append(nid)
+                maximum.append(len(aktiv))
+            time.sleep(0.05)
+            with lock:
+                aktiv.remove(nid)
+
+        _run_dag(order, {n: [] for n in order}, {}, run, max_parallel=2)
+        assert max(maximum) == 2
+        assert len(maximum) == 6
+
+    def test_barriere_haelt_spaetere_nodes_zurueck(self):
+        from workflow_routes import _run_dag
+        order     = ["barriere", "spaeter"]
+        gestartet = []
+
+        def run(nid):
+            gestartet.append(nid)
+            if nid == "barriere":
+                time.sleep(0.05)
+                assert gestartet == ["barriere"]
+
+        _run_dag(order, {n: [] for n in order}, {}, run,
+                 max_parallel=4, barriers=["barriere"])
+        assert gestartet == ["barriere", "spaeter"]
+
+
+# ── Ausführungskontext pro Lauf ───────────────────────────────────────────────
+
+class _Provider:
+    def __init__(self, name="p1"):
+        self.name = name
+
+    def chat(self, messages, system):
+        return f"{self.name}: {messages[-1]['content']}"
+
+
+class _Manager:
+    skills = {}
+
+    def get_skills_description(self, names=None):
+        return ""
+
+
+def _echter_kernel():
+    pytest.importorskip("dotenv")
+    from kernel import Kernel
+    from agent_state import AgentState
+    k = Kernel.__new__(Kernel)
+    k.state    = AgentState()
+    k.state.active_provider = "Test"
+    k.manager  = _Manager()
+    k.provider = _Provider()
+    k._prompt_cache = None
+    return k
+
+
+@pytest.fixture
+def ctx_client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from flask import Flask
+    app    = Flask(__name__)
+    kernel = _echter_kernel()
+    lock   = threading.RLock()
+    with patch("workflow_routes._start_scheduler"):
+        from workflow_routes import register_workflow_routes
+        register_workflow_routes(app, lambda: kernel, lock)
+    app.config["TESTING"] = True
+    return app.test_client(), kernel, lock
+
+
+class TestAusfuehrungsKontext:
+
+    def test_kontext_hat_eigenen_verlauf(self):
+        k   = _echter_kernel()
+        ctx = k.create_context()
+        assert ctx.chat("Hallo") == "p1: Hallo"
+        assert len(ctx.state.chat_history) == 2
+        assert k.state.chat_history == []
+        assert ctx.manager is k.manager
+
+    def test_providerwechsel_betrifft_laufenden_kontext_nicht(self):
+        k   = _echter_kernel()
+        ctx = k.create_context()
+        k.provider = _Provider("p2")
+        assert ctx.chat("x") == "p1: x"
+
+    def test_workflow_chat_nicht_im_nutzer_verlauf(self, ctx_client):
+        client, kernel, _ = ctx_client
+        data = _ausfuehren(client, [make_node("c", "chat", {"message": "Workflow"})])
+        assert data["results"]["c"] == "p1: Workflow"
+        assert kernel.state.chat_history == []
+
+    def test_kernel_lock_waehrend_lauf_frei(self, ctx_client):
+        client, _, lock = ctx_client
+        lauf = threading.Thread(target=_ausfuehren, args=(
+            client, [make_node("w", "wait", {"sekunden": 1})]))
+        lauf.start()
+        time.sleep(0.2)
+        frei = lock.acquire(timeout=0.5)
+        if frei:
+            lock.release()
+        lauf.join()
+        assert frei
+
+
+# ── run_workflow: Sub-Workflows und Webhooks im Prozess ───────────────────────
+
+def _speichern(wid, nodes, conns=None, name=None):
+    from workflow_routes import WORKFLOWS_DIR
+    os.makedirs(WORKFLOWS_DIR, exist_ok=True)
+    with open(os.path.join(WORKFLOWS_DIR, f"{wid}.json"), "w", encoding="utf-8") as f:
+        json.dump({"id": wid, "name": name or wid, "nodes": nodes,
+                   "connections": conns or []}, f)
+
+
+class TestRunWorkflow:
+
+    def test_sub_workflow_im_prozess(self, wf_client):
+        client, _ = wf_client
+        _speichern("sub", [make_node("t", "trigger"),
+                           make_node("s", "set", {"value": "{{input}} verarbeitet"})],
+                   [make_connection("t", "s")], name="Unterablauf")
+        nodes = [make_node("a", "set", {"value": "Hallo"}),
+                 make_node("sw", "sub_workflow", {"workflow_id": "sub"})]
+        with patch("requests.post", side_effect=AssertionError("kein HTTP")):
+            data = _ausfuehren(client, nodes, [make_connection("a", "sw")])
+        assert data["results"]["sw"] == "▶ Sub-Workflow 'Unterablauf':\nHallo verarbeitet"
+
+    def test_sub_workflow_zyklus(self, wf_client):
+        client, _ = wf_client
+        nodes = [make_node("sw", "sub_workflow", {"workflow_id": "selbst"})]
+        _speichern("selbst", nodes)
+        data = _ausfuehren(client, nodes, id="selbst")
+        assert "Sub-Workflow-Zyklus: selbst → selbst" in data["results"]["sw"]
+
+    def test_maximale_tiefe(self, monkeypatch):
+        from workflow_routes import run_workflow, WorkflowError
+        monkeypatch.setenv("WORKFLOW_MAX_DEPTH", "2")
+        with pytest.raises(WorkflowError, match="Verschachtelungstiefe"):
+            run_workflow({"nodes": [make_node("n", "note")]}, kernel=MockKernel(),
+                         _stack=("a", "b"))
+
+    def test_strukturiertes_ergebnis(self):
+        from workflow_routes import run_workflow
+        nodes = [make_node("t", "trigger", {"startMessage": "x"}),
+                 make_node("s", "set", {"value": "Ende: {{input}}"})]
+        res = run_workflow({"nodes": nodes, "connections": [make_connection("t", "s")]},
+                           {"input": "Start"}, kernel=MockKernel())
+        assert res["order"] == ["t", "s"]
+        assert res["output"] == "Ende: Start"
+        assert nodes[0]["config"] == {"startMessage": "x"}   # Definition unverändert
+
+    def test_ungueltiger_workflow(self):
+        from workflow_routes import run_workflow, WorkflowError
+        with pytest.raises(WorkflowError):
+            run_workflow({"nodes": []}, kernel=MockKernel())
+
+    def test_webhook_im_prozess(self, wf_client):
+        client, _ = wf_client
+        _speichern("wh", [make_node("w", "webhook", {"webhook_id": "abc"}),
+                          make_node("s", "set", {"value": "Daten: {{input}}"})],
+                   [make_connection("w", "s")], name="Hook")
+        with patch("requests.post", side_effect=AssertionError("kein HTTP")):
+            r = client.post("/api/webhook/abc", json={"x": 1})
+        body = r.get_json()
+        assert r.status_code == 200
+        assert body["workflow"] == "Hook"
+        assert '"x": 1' in body["result"]
+        assert client.post("/api/webhook/gibtsnicht", json={}).status_code == 404
+
+
+# ── Webhook-Index ─────────────────────────────────────────────────────────────
+
+def _hook_workflow(hook_id):
+    return [make_node("w", "webhook", {"webhook_id": hook_id}),
+            make_node("s", "set", {"value": "{{input}}"})]
+
+
+class TestWebhookIndex:
+
+    def test_keine_dateizugriffe_pro_aufruf(self, tmp_path, monkeypatch):
+        from workflow_routes import WebhookIndex
+        monkeypatch.chdir(tmp_path)
+        for i in range(3):
+            _speichern(f"wf{i}", _hook_workflow(f"hook{i}"))
+        index   = WebhookIndex()
+        gelesen = []
+        orig    = WebhookIndex._read
+        monkeypatch.setattr(WebhookIndex, "_read",
+                            lambda self, fname: (gelesen.append(fname), orig(self, fname)))
+        assert index.lookup("hook1")["id"] == "wf1"
+        assert len(gelesen) == 3
+        assert index.lookup("hook2")["id"] == "wf2"
+        assert index.lookup("gibtsnicht") is None
+        assert len(gelesen) == 3
+
+    def test_doppelte_id_erste_datei_gewinnt(self, tmp_path, monkeypatch):
+        from workflow_routes import WebhookIndex
+        monkeypatch.chdir(tmp_path)
+        _speichern("b", _hook_workflow("gleich"))
+        _speichern("a", _hook_workflow("gleich"))
+        assert WebhookIndex().lookup("gleich")["id"] == "a"
+
+    def test_aenderung_von_aussen(self, tmp_path, monkeypatch):
+        from workflow_routes import WebhookIndex
+        monkeypatch.chdir(tmp_path)
+        _speichern("wf", _hook_workflow("alt"))
+        index = WebhookIndex()
+        assert index.lookup("alt") is not None
+        _speichern("wf", _hook_workflow("neu"))
+        pfad = os.path.join("data", "workflows", "wf.json")
+        os.utime(pfad, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        assert index.lookup("alt") is None
+        _speichern("wf2", _hook_workflow("zweiter"))
+        assert index.lookup("zweiter")["id"] == "wf2"
+
+    def test_speichern_und_loeschen_pflegen_index(self, wf_client):
+        client, _ = wf_client
+        assert client.post("/api/webhook/x1", json={}).status_code == 404
+        client.post("/api/workflows", json={"id": "wfx", "name": "X",
+                                            "nodes": _hook_workflow("x1")})
+        assert client.post("/api/webhook/x1", json={"a": 1}).status_code == 200
+        client.delete("/api/workflows/wfx")
+        assert client.post("/api/webhook/x1", json={}).status_code == 404
+
+
+# ── Kompilierte Pläne / Node-Handler ──────────────────────────────────────────
+
+@pytest.fixture
+def zaehl_node(monkeypatch):
+    """Registriert einen Test-Node-Typ, der prepare()- und run()-Aufrufe zählt."""
+    import workflow_routes
+    from workflow_routes import NodeHandler
+    aufrufe = {"prepare": 0, "run": 0}
+
+    class ZaehlNode(NodeHandler):
+        def prepare(self, config):
+            aufrufe["prepare"] += 1
+            return config.get("text", "").upper()
+
+        def run(self, ctx, text):
+            aufrufe["run"] += 1
+            return f"{text}|{ctx.context}"
+
+    monkeypatch.setitem(workflow_routes.NODE_HANDLERS, "zaehler", ZaehlNode())
+    monkeypatch.setattr(workflow_routes, "_plan_cache", workflow_routes.OrderedDict())
+    return aufrufe
+
+
+class TestKompilierterPlan:
+
+    def test_plan_wird_wiederverwendet(self, zaehl_node):
+        from workflow_routes import run_workflow, compile_plan
+        definition = {"id": "wf", "updated": "2026-01-01T00:00:00",
+                      "nodes": [make_node("t", "trigger", {"startMessage": "a"}),
+                                make_node("z", "zaehler", {"text": "hallo"})],
+                      "connections": [make_connection("t", "z")]}
+        for eingabe in ("eins", "zwei"):
+            res = run_workflow(definition, {"input": eingabe}, kernel=MockKernel())
+            assert res["results"]["z"] == f"HALLO|{eingabe}"
+        assert zaehl_node == {"prepare": 1, "run": 2}
+        assert compile_plan(definition) is compile_plan(dict(definition))
+
+    def test_neue_fassung_neuer_plan(self, zaehl_node):
+        from workflow_routes import compile_plan
+        definition = {"id": "wf", "updated": "1", "nodes": [make_node("z", "zaehler")]}
+        alt = compile_plan(definition)
+        assert compile_plan(dict(definition, updated="2")) is alt
+        ohne_id = {"nodes": [make_node("z", "zaehler", {"text": "x"})]}
+        assert compile_plan(ohne_id) is compile_plan(json.loads(json.dumps(ohne_id)))
+        assert compile_plan({"nodes": [make_node("z", "zaehler", {"text": "y"})]}) \
+            is not compile_plan(ohne_id)
+
+    def test_geaenderter_node_bei_gleichem_updated(self, zaehl_node):
+        from workflow_routes import run_workflow
+        definition = {"id": "wf", "updated": "2026-01-01T00:00:00",
+                      "nodes": [make_node("z", "zaehler", {"text": "alt"})]}
+        assert run_workflow(definition, kernel=MockKernel())["results"]["z"].startswith("ALT")
+        geaendert = dict(definition, nodes=[make_node("z", "zaehler", {"text": "neu"})])
+        assert run_workflow(geaendert, kernel=MockKernel())["results"]["z"].startswith("NEU")
+
+    def test_plan_inhalt(self):
+        from workflow_routes import WorkflowPlan
+        nodes = [make_node("t", "trigger"), make_node("l", "loop"),
+                 make_node("a", "set"), make_node("b", "set"),
+                 make_node("f", "chatfilter")]
+        conns = [make_connection("t", "l"), make_connection("l", "a"),
+                 make_connection("a", "b"), make_connection("t", "f")]
+        plan = WorkflowPlan(nodes, conns)
+        assert plan.order == ["t", "l", "f", "a", "b"]
+        assert plan.preds["b"] == ["a"]
+        assert plan.loop_bodies == {"l": ["a", "b"]}
+        assert plan.barriers == ["f"]
+
+    def test_fehler_beim_kompilieren_betrifft_nur_den_node(self, wf_client):
+        client, _ = wf_client
+        nodes = [make_node("w", "wait", {"sekunden": "viele"}),
+                 make_node("s", "set", {"value": "ok"})]
+        data = _ausfuehren(client, nodes)
+        assert data["statuses"] == {"w": "error", "s": "success"}
+        assert data["results"]["w"].startswith("❌ Fehler:")
+
+    def test_unbekannter_node_typ(self, wf_client):
+        client, _ = wf_client
+        data = _ausfuehren(client, [make_node("x", "gibtsnicht")])
+        assert data["results"]["x"] == "[Unbekannter Node-Typ: gibtsnicht]"
+
+    def test_eigener_node_typ_per_dekorator(self, monkeypatch):
+        import workflow_routes
+        from workflow_routes import register_node, NodeHandler, run_workflow
+        monkeypatch.setattr(workflow_routes, "NODE_HANDLERS", dict(workflow_routes.NODE_HANDLERS))
+
+        @register_node("echo", "echo2")
+        class EchoNode(NodeHandler):
+            def run(self, ctx, config):
+                return ctx.error(f"Echo: {ctx.context}")
+
+        res = run_workflow({"nodes": [make_node("s", "set", {"value": "hi"}),
+                                      make_node("e", "echo2")],
+                            "connections": [make_connection("s", "e")]}, kernel=MockKernel())
+        assert res["results"]["e"] == "Echo: hi"
+        assert res["statuses"]["e"] == "error"
+
+
+# ── Loop-Node ─────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def langsam_node(monkeypatch):
+    """Node-Typ "langsam": wartet 0.2 s und gibt die Eingabe in Großbuchstaben zurück."""
+    import workflow_routes
+    from workflow_routes import NodeHandler
+
+    class LangsamNode(NodeHandler):
+        def run(self, ctx, config):
+            time.sleep(0.2)
+            return ctx.context.upper()
+
+    monkeypatch.setitem(workflow_routes.NODE_HANDLERS, "langsam", LangsamNode())
+
+
+class TestLoopNode:
+
+    def _loop(self, client, loop_cfg, body_nodes, body_conns=()):
+        nodes = [make_node("l", "loop", loop_cfg)] + body_nodes
+        conns = [make_connection("l", body_nodes[0]["id"])] + list(body_conns)
+        return _ausfuehren(client, nodes, conns)
+
+    def test_alle_node_typen_im_koerper(self, wf_client):
+        client, _ = wf_client
+        data = self._loop(client, {"items": "a, b"},
+                          [make_node("c", "code", {"code": "output = input * 2"}),
+                           make_node("k", "condition", {"condition": "{{input}} == bb"})],
+                          [make_connection("c", "k")])
+        assert data["results"]["l"] == ("🔁 Loop — 2 Iteration(en):\n"
+                                        "[1] ❌ Bedingung nicht erfüllt\naa\n"
+                                        "[2] ✅ Bedingung erfüllt\nbb")
+        assert data["results"]["c"] == "bb"          # letzte Iteration sichtbar
+
+    def test_parallel_in_reihenfolge(self, wf_client, langsam_node):
+        client, _ = wf_client
+        t0   = time.time()
+        data = self._loop(client, {"items": '["a", "b", "c", "d"]', "parallel": 4},
+                          [make_node("x", "langsam")])
+        assert time.time() - t0 < 0.6
+        assert data["results"]["l"].endswith("[1] A\n[2] B\n[3] C\n[4] D")
+
+    def test_ohne_parallel_nacheinander(self, wf_client, langsam_node):
+        client, _ = wf_client
+        t0 = time.time()
+        self._loop(client, {"items": "a, b, c"}, [make_node("x", "langsam")])
+        assert time.time() - t0 >= 0.6
+
+    def test_fehler_nur_im_element(self, wf_client, monkeypatch):
+        import workflow_routes
+        from workflow_routes import NodeHandler
+
+        class TeilenNode(NodeHandler):
+            def run(self, ctx, config):
+                return 10 // int(ctx.context)
+
+        monkeypatch.setitem(workflow_routes.NODE_HANDLERS, "teilen", TeilenNode())
+        client, _ = wf_client
+        data = self._loop(client, {"items": "1, 0, 2", "parallel": 3},
+                          [make_node("c", "teilen")])
+        zeilen = data["results"]["l"].split("\n")
+        assert zeilen[0] == "🔁 Loop — 3 Iteration(en), 1 mit Fehler:"
+        assert zeilen[1] == "[1] 10"
+        assert zeilen[2].startswith("[2] ❌")
+        assert zeilen[3] == "[3] 5"
+        assert data["statuses"]["l"] == "success"
+
+    def test_memory_node_im_koerper_abgelehnt(self):
+        from workflow_routes import WorkflowPlan, WorkflowError
+        nodes = [make_node("l", "loop", {"items": "a, b"}),
+                 make_node("m", "memory_window"), make_node("c", "chat")]
+        conns = [make_connection("l", "m"), make_connection("m", "c")]
+        with pytest.raises(WorkflowError, match="Memory-Node 'm'"):
+            WorkflowPlan(nodes, conns)
+
+    def test_chatfilter_stoppt_nur_das_element(self, wf_client):
+        client, _ = wf_client
+        data = self._loop(client, {"items": '["📭 leer", "echt"]'},
+                          [make_node("f", "chatfilter", {"modus": "einfach"}),
+                           make_node("s", "set", {"value": "Antwort: {{input}}"})],
+                          [make_connection("f", "s")])
+        assert data["results"]["l"].endswith("[1] 📭 leer\n[2] Antwort: echt")
@@ -10,7 +10,8 @@ import os
 import json
 import threading
 import sys
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import (Flask, Response, request, jsonify, render_template,
+                   send_from_directory, stream_with_context)
 from flask_cors import CORS
 from dotenv import load_dotenv
 from kernel import Kernel
@@ -48,6 +49,10 @@ register_dms_routes(app)
 from workflow_routes import register_workflow_routes
 register_workflow_routes(app, get_kernel, kernel_lock)
 
+# ── Hintergrund-Jobs einbinden ────────────────────────────────
+from job_routes import register_job_routes
+register_job_routes(app, get_kernel, kernel_lock)
+
 # ── Lokaler Kalender einbinden ────────────────────────────────
 from local_calendar_routes import register_local_calendar_routes
 register_local_calendar_routes(app)
@@ -99,6 +104,36 @@ def chat():
     return jsonify({"response": response, "provider": k.state.active_provider})
 
 
+@app.route("/api/chat/stream", methods=["GET", "POST"])
+def chat_stream():
+    """
+    Wie /api/chat, aber als Server-Sent-Events: Text-Chunks werden sofort
+    weitergereicht. GET (?message=...) für EventSource, POST mit JSON-Body.
+    """
+    if request.method == "POST":
+        msg = (request.get_json() or {}).get("message", "").strip()
+    else:
+        msg = request.args.get("message", "").strip()
+    if not msg:
+        return jsonify({"error": "Leere Nachricht"}), 400
+    # Wie bei /api/chat: nur die Kernel-Referenz im Lock holen
+    with kernel_lock:
+        k = get_kernel()
+
+    def _events():
+        for event in k.chat_stream(msg):
+            if event["type"] == "done":
+                event["provider"] = k.state.active_provider
+            yield (f"event: {event['type']}\n"
+                   f"data: {json.dumps(event, ensure_ascii=False)}\n\n")
+
+    return Response(
+        stream_with_context(_events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/api/status")
 def status():
     with kernel_lock: